@@ -1,18 +1,840 @@
+from __future__ import annotations
+
+import calendar
+import hashlib
+import io
+import json
 import os
+import traceback
+import zipfile
+from array import array
+from collections import defaultdict, deque
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime, timedelta, tzinfo
 from getpass import getpass
-from pathlib import Path
+from pathlib import Path, PurePosixPath
+from typing import TYPE_CHECKING, Any, NamedTuple, TextIO, TypeVar
 from zoneinfo import ZoneInfo
 
-import pandas as pd
 import typer
 
+if TYPE_CHECKING:
+    # numpy and pandas take most of the start-up time, so they are imported
+    # where they are first used; --help and argument errors never load them
+    import numpy as np
+    import pandas as pd
+
 app = typer.Typer()
 
+# Garmin.__init__ sizes the garth connection pool to 20, so more workers
+# than that would only queue waiting for a free connection.
+MAX_UPLOAD_CONCURRENCY = 20
+MAX_UPLOAD_ERRORS = 10
+# Reuse the Garmin profile cached next to the tokens for scheduled syncs
+PROFILE_CACHE_TTL_SECONDS = 12 * 3600
+# Refresh the OAuth2 token in the background this long before it expires
+TOKEN_REFRESH_MARGIN_SECONDS = 5 * 60
+
+# Garmin reports weigh-ins in grams
+GRAMS_PER_UNIT = {"kg": 1000.0, "lbs": 453.59237}
+# Fitbit rounds to 0.1 lbs (~45 g), so allow for rounding on either side
+WEIGHT_MATCH_TOLERANCE_GRAMS = 50.0
+WEIGH_IN_FETCH_CHUNK_DAYS = 90
+
+# How wall-clock times that are ambiguous or skipped at DST transitions are
+# resolved: (ambiguous, nonexistent) arguments for Series.dt.tz_localize.
+# "earliest" and "latest" pick the earlier or later of the two instants a
+# time can mean; a skipped time is read with the offset after or before the
+# transition, which is the same as shifting it by the (one hour) DST gap.
+DST_POLICIES = {
+    "earliest": (True, timedelta(hours=-1)),
+    "latest": (False, timedelta(hours=1)),
+    "skip": ("NaT", "NaT"),
+    "error": ("raise", "raise"),
+}
+
+READ_CHUNK_SIZE = 1 << 16
+READ_BATCH_SIZE = 10_000
+REQUIRED_FIELDS = ("date", "time", "weight")
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def run_in_order(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    concurrency: int = 1,
+    on_close: Callable[[T, R | None, Exception | None], None] | None = None,
+) -> Iterator[tuple[T, R | None, Exception | None]]:
+    """Call fn on each item and yield (item, result, error) in input order.
+
+    With concurrency > 1 the calls run on a thread pool. At most
+    2 * concurrency calls are queued at once, so large inputs are not
+    submitted up front. Closing the generator cancels calls not yet started;
+    calls already running are waited for and their (item, result, error)
+    passed to on_close, so their side effects can still be accounted for.
+    """
+    if concurrency <= 1:
+        for item in items:
+            try:
+                yield item, fn(item), None
+            except Exception as e:
+                yield item, None, e
+        return
+
+    def call(item: T) -> tuple[R | None, Exception | None]:
+        try:
+            return fn(item), None
+        except Exception as e:
+            return None, e
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = deque()
+        try:
+            for item in items:
+                pending.append((item, executor.submit(call, item)))
+                if len(pending) >= 2 * concurrency:
+                    done_item, future = pending.popleft()
+                    yield done_item, *future.result()
+            while pending:
+                done_item, future = pending.popleft()
+                yield done_item, *future.result()
+        finally:
+            for _, future in pending:
+                future.cancel()
+            if on_close is not None:
+                for item, future in pending:
+                    if not future.cancelled():
+                        on_close(item, *future.result())
+
+
+_WHITESPACE = json.decoder.WHITESPACE
+
+
+def iter_json_array(f: TextIO, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array, reading f in chunks."""
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+
+    def fill() -> bool:
+        nonlocal buf, pos
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip_whitespace() -> str:
+        nonlocal pos
+        while True:
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos < len(buf):
+                return buf[pos]
+            if not fill():
+                raise ValueError("unexpected end of JSON array")
+
+    if skip_whitespace() != "[":
+        raise ValueError("expected a JSON array")
+    pos += 1
+    if skip_whitespace() == "]":
+        return
+
+    while True:
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if not fill():
+                raise
+            continue
+        # Only trust the value once its delimiter is buffered; a number at
+        # the end of the buffer may continue in the next chunk
+        delimiter = _WHITESPACE.match(buf, end).end()
+        if delimiter == len(buf) or buf[delimiter] not in ",]":
+            if fill():
+                continue
+            raise ValueError("expected ',' or ']' in JSON array")
+        pos = delimiter + 1
+        yield item
+
+        if buf[delimiter] == "]":
+            return
+        skip_whitespace()
+
+
+class WeightColumns:
+    """Fitbit weight records as compact typed columns.
+
+    timestamp holds the local wall-clock time as seconds since the epoch
+    (i.e. as if it were UTC); missing logId/bmi/fat are stored as -1/NaN.
+    """
+
+    def __init__(self) -> None:
+        self.log_id = array("q")
+        self.timestamp = array("q")
+        self.weight = array("d")
+        self.bmi = array("d")
+        self.fat = array("d")
+        self._day_cache: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def _parse_timestamp(self, date_str: str, time_str: str) -> int:
+        # Fitbit uses "%m/%d/%y" and "%H:%M:%S"; days repeat, so cache them
+        day = self._day_cache.get(date_str)
+        if day is None:
+            parsed = datetime.strptime(date_str, "%m/%d/%y")
+            day = calendar.timegm(parsed.timetuple())
+            self._day_cache[date_str] = day
+        hours, minutes, seconds = time_str.split(":")
+        return day + int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+    def append(self, record: dict[str, Any]) -> None:
+        missing = [field for field in REQUIRED_FIELDS if field not in record]
+        if missing:
+            raise ValueError(f"Missing required columns: {missing}")
+        log_id = record.get("logId")
+        bmi = record.get("bmi")
+        fat = record.get("fat")
+        self.timestamp.append(self._parse_timestamp(record["date"], record["time"]))
+        self.weight.append(float(record["weight"]))
+        self.log_id.append(-1 if log_id is None else int(log_id))
+        self.bmi.append(float("nan") if bmi is None else float(bmi))
+        self.fat.append(float("nan") if fat is None else float(fat))
+
+    def to_frame(self) -> pd.DataFrame:
+        import numpy as np
+
+        return _weight_frame(
+            log_id=np.frombuffer(self.log_id, dtype=np.int64).copy(),
+            timestamp=np.frombuffer(self.timestamp, dtype=np.int64).copy(),
+            weight=np.frombuffer(self.weight, dtype=np.float64).copy(),
+            bmi=np.frombuffer(self.bmi, dtype=np.float64).copy(),
+            fat=np.frombuffer(self.fat, dtype=np.float64).copy(),
+        )
+
+
+def _weight_frame(
+    log_id: np.ndarray,
+    timestamp: np.ndarray,
+    weight: np.ndarray,
+    bmi: np.ndarray,
+    fat: np.ndarray,
+) -> pd.DataFrame:
+    import pandas as pd
+
+    return pd.DataFrame(
+        {
+            "logId": pd.arrays.IntegerArray(log_id, log_id == -1),
+            "timestamp": timestamp,
+            "weight": weight,
+            "bmi": bmi,
+            "fat": fat,
+        }
+    )
+
+
+class ZipMember(NamedTuple):
+    """A JSON file inside a Takeout zip archive."""
+
+    archive: Path
+    name: str
+
+    def __str__(self) -> str:
+        return f"{self.archive}:{self.name}"
+
+
+WeightSource = Path | ZipMember
+
+
+def find_weight_sources(inputs: Iterable[Path], glob_pattern: str) -> list[WeightSource]:
+    """List weight files in directories and zip archives matching glob_pattern.
+
+    Zip members are matched like rglob matches files: against the end of
+    their path inside the archive.
+    """
+    sources: list[WeightSource] = []
+    for path in inputs:
+        if path.is_dir():
+            sources.extend(path.rglob(glob_pattern))
+        elif zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                sources.extend(
+                    ZipMember(path, info.filename)
+                    for info in archive.infolist()
+                    if not info.is_dir()
+                    and PurePosixPath(info.filename).match(glob_pattern)
+                )
+        elif path.is_file():
+            sources.append(path)
+        else:
+            raise FileNotFoundError(f"No such file or directory: {path}")
+    return sorted(sources, key=str)
+
+
+# Archives opened to read their members, keyed by (path, pid) so forked
+# workers never share the parent's file offset
+_open_archives: dict[tuple[Path, int], zipfile.ZipFile] = {}
+
+
+def _open_archive(path: Path) -> zipfile.ZipFile:
+    key = (path, os.getpid())
+    archive = _open_archives.get(key)
+    if archive is None:
+        archive = _open_archives[key] = zipfile.ZipFile(path)
+    return archive
+
+
+def close_archives() -> None:
+    """Close the archives this process opened to read zip members."""
+    pid = os.getpid()
+    for key in [key for key in _open_archives if key[1] == pid]:
+        _open_archives.pop(key).close()
+
+
+@contextmanager
+def _open_source(source: WeightSource) -> Iterator[TextIO]:
+    if isinstance(source, ZipMember):
+        archive = _open_archive(source.archive)
+        # Decompresses on the fly; nothing is extracted to disk
+        with archive.open(source.name) as raw:
+            yield io.TextIOWrapper(raw, encoding="utf-8")
+    else:
+        with open(source, encoding="utf-8") as f:
+            yield f
+
+
+def read_weight_batches(
+    files: Iterable[WeightSource], batch_size: int = READ_BATCH_SIZE
+) -> Iterator[pd.DataFrame]:
+    """Stream Fitbit weight JSON files as DataFrames of up to batch_size rows.
+
+    Files are parsed incrementally, so memory is bounded by the batch size
+    rather than the size of the export.
+    """
+    columns = WeightColumns()
+    for file in files:
+        with _open_source(file) as f:
+            try:
+                for record in iter_json_array(f):
+                    columns.append(record)
+                    if len(columns) >= batch_size:
+                        yield columns.to_frame()
+                        columns = WeightColumns()
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"{file}: {e}") from e
+    if len(columns):
+        yield columns.to_frame()
+
+
+def read_weight_file(file: WeightSource) -> pd.DataFrame:
+    """Parse one Fitbit weight JSON file into a compact DataFrame."""
+    columns = WeightColumns()
+    with _open_source(file) as f:
+        try:
+            for record in iter_json_array(f):
+                columns.append(record)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"{file}: {e}") from e
+    return columns.to_frame()
+
+
+class IngestCache:
+    """Parsed weight files cached on disk as one .npz of columns per file.
+
+    An entry is valid while the source's path, size and mtime match. If only
+    the mtime changed, the content hash (sha256, or the CRC-32 stored in the
+    zip for archive members) decides whether the entry can be reused.
+    """
+
+    VERSION = 1
+    COLUMNS = ("log_id", "timestamp", "weight", "bmi", "fat")
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    def _entry_path(self, source: WeightSource) -> Path:
+        key = hashlib.sha256(str(source).encode()).hexdigest()
+        return self.directory / f"{key}.npz"
+
+    @staticmethod
+    def _stat(source: WeightSource) -> tuple[int, int]:
+        if isinstance(source, ZipMember):
+            info = _open_archive(source.archive).getinfo(source.name)
+            return info.file_size, int(datetime(*info.date_time).timestamp())
+        stat = source.stat()
+        return stat.st_size, stat.st_mtime_ns
+
+    @staticmethod
+    def _content_hash(source: WeightSource) -> str:
+        if isinstance(source, ZipMember):
+            info = _open_archive(source.archive).getinfo(source.name)
+            return f"crc32:{info.CRC:08x}"
+        digest = hashlib.sha256()
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return f"sha256:{digest.hexdigest()}"
+
+    def read(self, source: WeightSource) -> pd.DataFrame:
+        """Return the parsed source, from the cache when it is still valid."""
+        import numpy as np
+
+        entry = self._entry_path(source)
+        size, mtime = self._stat(source)
+        meta = None
+        try:
+            with np.load(entry) as data:
+                meta = json.loads(str(data["meta"]))
+                columns = {name: data[name] for name in self.COLUMNS}
+        except (OSError, KeyError, ValueError):
+            pass
+
+        content_hash = None
+        if meta is not None and meta.get("version") == self.VERSION:
+            if meta["source"] == str(source) and meta["size"] == size:
+                if meta["mtime"] == mtime:
+                    return _weight_frame(**columns)
+                content_hash = self._content_hash(source)
+                if meta["hash"] == content_hash:
+                    self._store(entry, source, size, mtime, content_hash, columns)
+                    return _weight_frame(**columns)
+
+        df = read_weight_file(source)
+        columns = {
+            "log_id": df["logId"].fillna(-1).to_numpy(np.int64),
+            "timestamp": df["timestamp"].to_numpy(np.int64),
+            "weight": df["weight"].to_numpy(np.float64),
+            "bmi": df["bmi"].to_numpy(np.float64),
+            "fat": df["fat"].to_numpy(np.float64),
+        }
+        if content_hash is None:
+            content_hash = self._content_hash(source)
+        self._store(entry, source, size, mtime, content_hash, columns)
+        return df
+
+    def _store(
+        self,
+        entry: Path,
+        source: WeightSource,
+        size: int,
+        mtime: int,
+        content_hash: str,
+        columns: dict[str, np.ndarray],
+    ) -> None:
+        import numpy as np
+
+        meta = {
+            "version": self.VERSION,
+            "source": str(source),
+            "size": size,
+            "mtime": mtime,
+            "hash": content_hash,
+        }
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write then rename so concurrent or interrupted runs never see a
+        # partial entry
+        tmp = entry.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), **columns)
+        os.replace(tmp, entry)
+
+
+def default_cache_dir() -> Path:
+    base = os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "fitbit_garmin_converter" / "ingest"
+
+
+def ingest_weight_files(
+    files: Iterable[WeightSource],
+    jobs: int = 1,
+    cache: IngestCache | None = None,
+    batch_size: int = READ_BATCH_SIZE,
+) -> pd.DataFrame:
+    """Parse all files, in parallel processes when jobs > 1.
+
+    With a cache only new or changed files are parsed. Parsed batches (one
+    per file with jobs > 1 or a cache, otherwise up to batch_size records)
+    are consumed as they arrive, and records whose logId was already seen,
+    i.e. weigh-ins exported in several files, are dropped before a batch is
+    kept, so overlap in the export costs no memory. The distinct records are
+    still all merged and sorted in memory, and with jobs > 1 or a cache each
+    file is parsed whole, so memory grows with the distinct records plus the
+    largest file. The result is ordered by timestamp, then logId, then file
+    path, so it does not depend on the number of jobs or on rglob's ordering.
+    """
+    import pandas as pd
+
+    files = sorted(files, key=str)
+    read = cache.read if cache is not None else read_weight_file
+    seen: set[int] = set()
+    frames = []
+
+    def keep(batches: Iterable[pd.DataFrame]) -> None:
+        for batch in batches:
+            batch = _drop_seen_log_ids(batch, seen)
+            if len(batch):
+                frames.append(batch)
+
+    try:
+        if jobs > 1 and len(files) > 1:
+            chunksize = max(1, len(files) // (jobs * 4))
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                keep(executor.map(read, files, chunksize=chunksize))
+        elif cache is not None:
+            keep(cache.read(file) for file in files)
+        else:
+            keep(read_weight_batches(files, batch_size))
+    finally:
+        # Worker processes close theirs when the pool shuts down
+        close_archives()
+    if not frames:
+        return WeightColumns().to_frame()
+    df = pd.concat(frames, ignore_index=True)
+    # Stable sort keeps file order for identical (timestamp, logId) pairs
+    return df.sort_values(["timestamp", "logId"], kind="mergesort", ignore_index=True)
+
+
+def _drop_seen_log_ids(batch: pd.DataFrame, seen: set[int]) -> pd.DataFrame:
+    """Drop records whose logId is in seen, then add the batch's logIds."""
+    import numpy as np
+
+    log_ids = batch["logId"].to_numpy(dtype=np.int64, na_value=-1).tolist()
+    mask = np.ones(len(log_ids), dtype=bool)
+    for i, log_id in enumerate(log_ids):
+        if log_id == -1:
+            continue
+        if log_id in seen:
+            mask[i] = False
+        else:
+            seen.add(log_id)
+    return batch if mask.all() else batch[mask]
+
+
+class UploadJournal:
+    """Append-only log of uploaded Fitbit logIds, one per line.
+
+    Loading keeps the ids in a set so reruns can skip finished records in
+    O(1). Appends are flushed immediately but only fsync'ed every
+    `sync_every` records (and on close), so a crash loses at most that many
+    entries. A torn last line from a crash is dropped when the journal is
+    reopened.
+    """
+
+    def __init__(self, path: Path, sync_every: int = 100) -> None:
+        self.path = path
+        self.sync_every = sync_every
+        self.ids: set[int] = set()
+        self._file = None
+        self._unsynced = 0
+        if path.exists():
+            self._load()
+
+    def _load(self) -> None:
+        data = self.path.read_bytes()
+        complete = data[: data.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            line = line.strip()
+            if line:
+                self.ids.add(int(line))
+        if len(complete) != len(data):
+            # Truncate the partial line so new entries start on a clean line
+            with self.path.open("r+b") as f:
+                f.truncate(len(complete))
+
+    def __contains__(self, log_id: int) -> bool:
+        return log_id in self.ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def record(self, log_id: int) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("a", encoding="ascii")
+        self._file.write(f"{log_id}\n")
+        self._file.flush()
+        self.ids.add(log_id)
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            self.sync()
+
+    def sync(self) -> None:
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def close(self) -> None:
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "UploadJournal":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class WeighInIndex:
+    """Weigh-ins already stored in Garmin Connect, keyed by GMT second.
+
+    Weights are compared in grams within WEIGHT_MATCH_TOLERANCE_GRAMS since
+    Garmin stores the converted value and Fitbit the rounded one.
+    """
+
+    def __init__(self) -> None:
+        self._by_timestamp: dict[int, list[float]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return sum(len(weights) for weights in self._by_timestamp.values())
+
+    def add(self, gmt_seconds: int, grams: float) -> None:
+        self._by_timestamp[gmt_seconds].append(grams)
+
+    def contains(self, gmt_seconds: int, grams: float) -> bool:
+        return any(
+            abs(existing - grams) <= WEIGHT_MATCH_TOLERANCE_GRAMS
+            for existing in self._by_timestamp.get(gmt_seconds, ())
+        )
+
+    def add_weigh_ins_response(self, response: dict[str, Any] | None) -> None:
+        """Add the metrics from a Garmin.get_weigh_ins response."""
+        for summary in (response or {}).get("dailyWeightSummaries") or []:
+            for metric in summary.get("allWeightMetrics") or []:
+                timestamp = metric.get("timestampGMT")
+                weight = metric.get("weight")
+                if timestamp is not None and weight is not None:
+                    self.add(int(timestamp) // 1000, float(weight))
+
+    @classmethod
+    def fetch(
+        cls,
+        api: Any,
+        start: date,
+        end: date,
+        chunk_days: int = WEIGH_IN_FETCH_CHUNK_DAYS,
+        concurrency: int = 1,
+    ) -> "WeighInIndex":
+        """Fetch all weigh-ins from start to end with one request per chunk."""
+        chunks = []
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(end, chunk_start + timedelta(days=chunk_days - 1))
+            chunks.append((chunk_start, chunk_end))
+            chunk_start = chunk_end + timedelta(days=1)
+
+        def fetch_chunk(chunk: tuple[date, date]) -> Any:
+            return api.get_weigh_ins(chunk[0].isoformat(), chunk[1].isoformat())
+
+        index = cls()
+        for _, response, error in run_in_order(fetch_chunk, chunks, concurrency):
+            if error is not None:
+                raise error
+            index.add_weigh_ins_response(response)
+        return index
+
+
+def localize_timestamps(
+    local_seconds: pd.Series, tz: tzinfo | str, dst_policy: str = "earliest"
+) -> pd.DataFrame:
+    """Localize naive wall-clock epoch seconds to tz in one vectorized pass.
+
+    Returns the tz-aware "datetime" and the "local_ms"/"gmt_ms" epoch
+    milliseconds for each input row. Rows dropped by the "skip" policy are
+    NaT/NA; the "error" policy raises ValueError.
+    """
+    import numpy as np
+    import pandas as pd
+
+    ambiguous, nonexistent = DST_POLICIES[dst_policy]
+    if ambiguous is True or ambiguous is False:
+        ambiguous = np.full(len(local_seconds), ambiguous)
+    naive = pd.to_datetime(local_seconds, unit="s")
+    localized = naive.dt.tz_localize(tz, ambiguous=ambiguous, nonexistent=nonexistent)
+    second = pd.Timedelta(seconds=1)
+    gmt_seconds = (localized - pd.Timestamp(0, tz="UTC")) // second
+    wall_seconds = (localized.dt.tz_localize(None) - pd.Timestamp(0)) // second
+    return pd.DataFrame(
+        {
+            "datetime": localized,
+            "local_ms": wall_seconds.astype("Int64") * 1000,
+            "gmt_ms": gmt_seconds.astype("Int64") * 1000,
+        }
+    )
+
+
+def _upload_weigh_ins(
+    api: Any,
+    df: pd.DataFrame,
+    unit: str,
+    concurrency: int,
+    journal: UploadJournal | None,
+) -> tuple[int, int]:
+    """Upload one weigh-in per record. Returns (success_count, error_count)."""
+    import pandas as pd
+
+    success_count = 0
+    error_count = 0
+
+    def upload_row(row: Any) -> Any:
+        return api.add_weigh_in_epoch_ms(
+            weight=row.weight,
+            local_ms=row.local_ms,
+            gmt_ms=row.gmt_ms,
+            unitKey=unit,
+        )
+
+    def record_upload(row: Any) -> None:
+        if journal is not None and pd.notna(row.logId):
+            journal.record(int(row.logId))
+
+    def record_unread(row: Any, result: Any, error: Exception | None) -> None:
+        # Uploads still in flight when aborting; journal the finished ones
+        # so a rerun does not upload them again
+        if error is None:
+            record_upload(row)
+
+    rows = df.itertuples(index=False)
+    results = run_in_order(upload_row, rows, concurrency, on_close=record_unread)
+    try:
+        for row, result, error in results:
+            typer.echo(f"\n🔄 Uploading: {row.datetime} - {row.weight} {unit}")
+            typer.echo(f"   Timestamp: {row.datetime.isoformat()}")
+
+            if error is None:
+                typer.echo(f"   ✅ Success - API response: {result}")
+                success_count += 1
+                record_upload(row)
+                continue
+
+            error_count += 1
+            _echo_upload_error(error)
+
+            if error_count > MAX_UPLOAD_ERRORS:
+                typer.echo("\nToo many errors, aborting upload")
+                raise typer.Exit(1)
+    finally:
+        # Cancel uploads that have not started yet when aborting
+        results.close()
+
+    return success_count, error_count
+
+
+def _body_composition_columns(batch: pd.DataFrame, unit: str) -> dict[str, Any]:
+    """Convert Fitbit records to Garmin.add_body_composition_columns columns."""
+    # FIT weight_scale records are always in kg
+    kg_per_unit = GRAMS_PER_UNIT[unit] / 1000
+    nan = float("nan")
+    columns = {
+        # Epoch seconds, so the FIT encoder needs no timezone handling
+        "timestamp": batch["gmt_ms"].to_numpy(dtype="float64") / 1000,
+        "weight": batch["weight"].to_numpy(dtype="float64") * kg_per_unit,
+    }
+    if "bmi" in batch:
+        columns["bmi"] = batch["bmi"].to_numpy(dtype="float64", na_value=nan)
+    if "fat" in batch:
+        columns["percent_fat"] = batch["fat"].to_numpy(dtype="float64", na_value=nan)
+    return columns
+
+
+def _upload_fit_batches(
+    api: Any,
+    df: pd.DataFrame,
+    unit: str,
+    batch_size: int,
+    concurrency: int,
+    journal: UploadJournal | None,
+) -> tuple[int, int]:
+    """Upload records packed into FIT files. Returns (success_count, error_count)."""
+    success_count = 0
+    error_count = 0
+    failed_files = 0
+
+    def upload_batch(batch: pd.DataFrame) -> Any:
+        columns = _body_composition_columns(batch, unit)
+        return api.add_body_composition_columns(
+            max_records_per_file=batch_size, **columns
+        )
+
+    def record_upload(batch: pd.DataFrame) -> None:
+        if journal is not None:
+            for log_id in batch["logId"].dropna():
+                journal.record(int(log_id))
+
+    def record_unread(
+        batch: pd.DataFrame, result: Any, error: Exception | None
+    ) -> None:
+        # FIT files still in flight when aborting, as in _upload_weigh_ins
+        if error is None:
+            record_upload(batch)
+
+    batches = (df.iloc[i : i + batch_size] for i in range(0, len(df), batch_size))
+    results = run_in_order(upload_batch, batches, concurrency, on_close=record_unread)
+    try:
+        for batch, result, error in results:
+            first = batch["datetime"].iloc[0]
+            last = batch["datetime"].iloc[-1]
+            typer.echo(
+                f"\n🔄 Uploading FIT file: {len(batch)} records from {first} to {last}"
+            )
+
+            if error is None:
+                typer.echo(f"   ✅ Success - API response: {result}")
+                success_count += len(batch)
+                record_upload(batch)
+                continue
+
+            error_count += len(batch)
+            failed_files += 1
+            _echo_upload_error(error)
+
+            if failed_files > MAX_UPLOAD_ERRORS:
+                typer.echo("\nToo many errors, aborting upload")
+                raise typer.Exit(1)
+    finally:
+        results.close()
+
+    return success_count, error_count
+
+
+def _echo_upload_error(e: Exception) -> None:
+    typer.echo(f"   ❌ Error: {e}")
+    typer.echo(f"   Error type: {type(e).__name__}")
+    if "Expecting value" in str(e):
+        # JSONDecodeError from an empty (possibly successful) response
+        typer.echo("   ⚠️  Got empty response (likely success, checking...)")
+
+    # Look for HTTP response details in various places
+    response_obj = None
+    if hasattr(e, "response"):
+        response_obj = e.response
+    elif hasattr(e, "__context__") and hasattr(e.__context__, "response"):
+        response_obj = e.__context__.response
+
+    if response_obj:
+        try:
+            typer.echo(f"   HTTP Status: {response_obj.status_code}")
+            typer.echo(f"   Response headers: {dict(response_obj.headers)}")
+            typer.echo(f"   Response body: {response_obj.text[:500]}")
+        except Exception as ex:
+            typer.echo(f"   Could not read response: {ex}")
+    else:
+        # Print the full traceback to see where the error is coming from
+        tb = "".join(traceback.format_exception(e))
+        typer.echo(f"   Full traceback:\n{tb}")
+
 
 @app.command()
 def upload_to_garmin(
-    input_dir: Path = typer.Argument(
-        ..., help="Directory containing weight JSON files"
+    input_paths: list[Path] = typer.Argument(
+        ..., help="Directories or Takeout .zip archives containing weight JSON files"
     ),
     glob_pattern: str = typer.Option(
         "weight*.json", help="Glob pattern for weight files"
@@ -21,12 +843,66 @@ def upload_to_garmin(
     timezone_name: str = typer.Option(
         "America/Los_Angeles", help="Timezone for weight timestamps (e.g., America/New_York, Europe/London)"
     ),
+    dst_policy: str = typer.Option(
+        "earliest",
+        help="Resolve times that are ambiguous or skipped at DST changes: "
+        "earliest, latest, skip or error",
+    ),
     dry_run: bool = typer.Option(
         False, help="Simulate upload without actually sending data"
     ),
     limit: int = typer.Option(
         None, help="Limit the number of records to upload"
     ),
+    jobs: int = typer.Option(
+        1, min=1, help="Number of processes used to parse the input files"
+    ),
+    read_batch_size: int = typer.Option(
+        READ_BATCH_SIZE,
+        min=1,
+        help="Records parsed per batch when reading with one job and no cache",
+    ),
+    use_cache: bool = typer.Option(
+        False,
+        "--cache/--no-cache",
+        help="Store parsed records of each input file in --cache-dir and reuse "
+        "them for unchanged files; entries are never pruned",
+    ),
+    cache_dir: Path = typer.Option(
+        None,
+        help="Ingest cache directory (default: "
+        "$XDG_CACHE_HOME/fitbit_garmin_converter/ingest or "
+        "~/.cache/fitbit_garmin_converter/ingest)",
+    ),
+    concurrency: int = typer.Option(
+        1,
+        min=1,
+        max=MAX_UPLOAD_CONCURRENCY,
+        help="Number of weigh-ins to upload in parallel",
+    ),
+    rate_limit: float = typer.Option(
+        None, min=0.01, help="Maximum Garmin API requests per second"
+    ),
+    burst: int = typer.Option(
+        5, min=1, help="Requests allowed in a burst when --rate-limit is set"
+    ),
+    resume: bool = typer.Option(
+        True, help="Skip records already uploaded according to the journal"
+    ),
+    journal_path: Path = typer.Option(
+        None,
+        "--journal",
+        help="Upload journal file (default: upload_journal.txt in GARMINTOKENS dir)",
+    ),
+    skip_existing: bool = typer.Option(
+        True, help="Skip weigh-ins that already exist in Garmin Connect"
+    ),
+    fit_batch_size: int = typer.Option(
+        None,
+        min=1,
+        help="Upload as FIT body composition files of this many records each "
+        "(at most garminconnect.MAX_FIT_WEIGHT_RECORDS)",
+    ),
 ):
     """Upload Fitbit weight data directly to Garmin Connect via API."""
 
@@ -40,48 +916,87 @@ def upload_to_garmin(
         typer.echo("   For a full list, see: https://en.wikipedia.org/wiki/List_of_tz_database_time_zones")
         raise typer.Exit(1)
 
+    if dst_policy not in DST_POLICIES:
+        typer.echo(
+            f"❌ Invalid DST policy: {dst_policy} (expected one of {list(DST_POLICIES)})"
+        )
+        raise typer.Exit(1)
+
+    if unit not in GRAMS_PER_UNIT:
+        typer.echo(f"❌ Invalid unit: {unit} (expected one of {list(GRAMS_PER_UNIT)})")
+        raise typer.Exit(1)
+
     try:
         from garminconnect import (
+            MAX_FIT_WEIGHT_RECORDS,
             Garmin,
             GarminConnectAuthenticationError,
             GarminConnectConnectionError,
+            RateLimiter,
         )
     except ImportError as e:
         typer.echo(f"Error: Could not import garminconnect library: {e}")
         typer.echo("Please run 'uv sync' to install dependencies")
         raise typer.Exit(1)
 
+    if fit_batch_size is not None and fit_batch_size > MAX_FIT_WEIGHT_RECORDS:
+        typer.echo(
+            f"❌ Invalid --fit-batch-size: {fit_batch_size} "
+            f"(at most {MAX_FIT_WEIGHT_RECORDS} records per FIT file)"
+        )
+        raise typer.Exit(1)
+
     # Read and combine all weight data files
-    files = list(input_dir.rglob(glob_pattern))
+    try:
+        files = find_weight_sources(input_paths, glob_pattern)
+    except (OSError, zipfile.BadZipFile) as e:
+        typer.echo(f"Error reading input: {e}")
+        raise typer.Exit(1)
     if not files:
-        typer.echo(f"No files found matching {glob_pattern} in {input_dir}")
+        inputs = ", ".join(str(path) for path in input_paths)
+        typer.echo(f"No files found matching {glob_pattern} in {inputs}")
         raise typer.Exit(1)
 
-    all_data = []
-    for file in files:
-        try:
-            data = pd.read_json(file, convert_dates=False)
-            all_data.append(data)
-        except Exception as e:
-            typer.echo(f"Error reading {file}: {e}")
-            raise typer.Exit(1)
-
-    df = pd.concat(all_data, ignore_index=True)
+    try:
+        cache = IngestCache(cache_dir or default_cache_dir()) if use_cache else None
+        df = ingest_weight_files(files, jobs, cache, read_batch_size)
+    except (OSError, ValueError) as e:
+        typer.echo(f"Error reading weight files: {e}")
+        raise typer.Exit(1)
+    if df.empty:
+        typer.echo(f"No weight records found in {len(files)} files")
+        raise typer.Exit(1)
 
-    # Validate required columns
-    required_cols = ["date", "time", "weight"]
-    missing_cols = [col for col in required_cols if col not in df.columns]
-    if missing_cols:
-        typer.echo(f"Error: Missing required columns: {missing_cols}")
+    try:
+        localized = localize_timestamps(df["timestamp"], tz, dst_policy)
+    except ValueError as e:
+        typer.echo(f"❌ Ambiguous or nonexistent local time: {e}")
+        typer.echo("   Choose how to resolve it with --dst-policy")
         raise typer.Exit(1)
+    df = df.join(localized)
+    skipped_dst = df["datetime"].isna().sum()
+    if skipped_dst:
+        typer.echo(
+            f"⚠️  Skipping {skipped_dst} records with ambiguous or nonexistent times"
+        )
+        df = df[df["datetime"].notna()]
 
-    # Combine date and time into datetime
-    df["datetime"] = pd.to_datetime(
-        df["date"] + " " + df["time"], format="%m/%d/%y %H:%M:%S"
-    )
+    # Configure token storage
+    tokenstore = os.getenv("GARMINTOKENS", "~/.garminconnect")
+    tokenstore_path = Path(tokenstore).expanduser()
 
-    # Sort by datetime
-    df = df.sort_values("datetime")
+    journal = None
+    if resume:
+        journal = UploadJournal(journal_path or tokenstore_path / "upload_journal.txt")
+        total = len(df)
+        # Duplicate logIds across export files were dropped while ingesting
+        log_ids = df["logId"]
+        df = df[log_ids.isna() | ~log_ids.isin(journal.ids)]
+        if len(df) < total:
+            typer.echo(
+                f"Skipping {total - len(df)} records already uploaded "
+                f"(journal: {journal.path})"
+            )
 
     # Apply limit if specified
     if limit is not None and limit > 0:
@@ -90,6 +1005,11 @@ def upload_to_garmin(
     else:
         typer.echo(f"Found {len(df)} weight records to upload")
 
+    if df.empty:
+        # Incremental runs often have nothing new; skip the login round trips
+        typer.echo("Nothing to upload")
+        return
+
     if dry_run:
         typer.echo("\nDRY RUN MODE - No data will be uploaded")
         typer.echo("\nSample records to be uploaded:")
@@ -103,16 +1023,21 @@ def upload_to_garmin(
     typer.echo("\n🔐 Garmin Connect Authentication")
     typer.echo("=" * 50)
 
-    # Configure token storage
-    tokenstore = os.getenv("GARMINTOKENS", "~/.garminconnect")
-    tokenstore_path = Path(tokenstore).expanduser()
-
     api = None
+    rate_limiter = (
+        RateLimiter(requests_per_second=rate_limit, burst=burst)
+        if rate_limit
+        else None
+    )
 
     # Try to login with stored tokens first
     try:
         typer.echo("Attempting to use saved authentication tokens...")
-        api = Garmin()
+        api = Garmin(
+            rate_limiter=rate_limiter,
+            profile_cache_ttl=PROFILE_CACHE_TTL_SECONDS,
+            token_refresh_margin=TOKEN_REFRESH_MARGIN_SECONDS,
+        )
         api.login(str(tokenstore_path))
         typer.echo("✅ Successfully logged in using saved tokens!")
     except (
@@ -133,7 +1058,14 @@ def upload_to_garmin(
 
         try:
             typer.echo("Logging in with credentials...")
-            api = Garmin(email=email, password=password, is_cn=False)
+            api = Garmin(
+                email=email,
+                password=password,
+                is_cn=False,
+                rate_limiter=rate_limiter,
+                profile_cache_ttl=PROFILE_CACHE_TTL_SECONDS,
+                token_refresh_margin=TOKEN_REFRESH_MARGIN_SECONDS,
+            )
             api.login()
 
             # Save tokens
@@ -150,78 +1082,51 @@ def upload_to_garmin(
         typer.echo("❌ Failed to initialize Garmin API")
         raise typer.Exit(1)
 
-    # Upload each weight record
-    typer.echo(f"\n📤 Uploading {len(df)} weight records...")
-    typer.echo("=" * 50)
-
-    success_count = 0
-    error_count = 0
-
-    for idx, row in df.iterrows():
+    if skip_existing and len(df) > 0:
+        # Pad by a day: Garmin buckets weigh-ins by the user's profile timezone
+        start = df["datetime"].min().date() - timedelta(days=1)
+        end = df["datetime"].max().date() + timedelta(days=1)
+        typer.echo(f"\n🔎 Checking existing Garmin weigh-ins from {start} to {end}...")
         try:
-            # Convert datetime to timezone-aware using specified timezone
-            dt = row["datetime"]
-            if dt.tzinfo is None:
-                dt = dt.replace(tzinfo=tz)
-
-            # Format timestamp
-            timestamp = dt.isoformat()
-
-            weight_value = float(row["weight"])
-
-            typer.echo(f"\n🔄 Uploading: {dt} - {weight_value} {unit}")
-            typer.echo(f"   Timestamp: {timestamp}")
+            existing = WeighInIndex.fetch(api, start, end, concurrency=concurrency)
+        except Exception as e:
+            typer.echo(f"❌ Could not fetch existing weigh-ins: {e}")
+            raise typer.Exit(1)
 
-            # Upload weight - the API might return empty response on success
-            try:
-                result = api.add_weigh_in(
-                    weight=weight_value,
-                    unitKey=unit,
-                    timestamp=timestamp
-                )
-                typer.echo(f"   ✅ Success - API response: {result}")
-            except Exception as json_error:
-                # Check if this is a JSONDecodeError from an empty successful response
-                if "Expecting value" in str(json_error):
-                    # Try to check the underlying HTTP response
-                    typer.echo("   ⚠️  Got empty response (likely success, checking...)")
-                    raise
-                else:
-                    raise
+        grams = df["weight"].to_numpy() * GRAMS_PER_UNIT[unit]
+        gmt_seconds = (df["gmt_ms"] // 1000).tolist()
+        already_present = [
+            existing.contains(seconds, weight)
+            for seconds, weight in zip(gmt_seconds, grams.tolist())
+        ]
+        skipped = sum(already_present)
+        df = df[[not present for present in already_present]]
+        typer.echo(
+            f"   Found {len(existing)} existing weigh-ins, "
+            f"skipping {skipped} records already in Garmin Connect"
+        )
 
-            success_count += 1
+    # Upload each weight record
+    if concurrency > 1:
+        typer.echo(
+            f"\n📤 Uploading {len(df)} weight records with {concurrency} workers..."
+        )
+    else:
+        typer.echo(f"\n📤 Uploading {len(df)} weight records...")
+    typer.echo("=" * 50)
 
-        except Exception as e:
-            error_count += 1
-            typer.echo(f"   ❌ Error: {e}")
-            typer.echo(f"   Error type: {type(e).__name__}")
-
-            # For JSONDecodeError, check if there's a response object in the chain
-            import traceback
-
-            tb = traceback.format_exc()
-
-            # Look for HTTP response details in various places
-            response_obj = None
-            if hasattr(e, "response"):
-                response_obj = e.response
-            elif hasattr(e, "__context__") and hasattr(e.__context__, "response"):
-                response_obj = e.__context__.response
-
-            if response_obj:
-                try:
-                    typer.echo(f"   HTTP Status: {response_obj.status_code}")
-                    typer.echo(f"   Response headers: {dict(response_obj.headers)}")
-                    typer.echo(f"   Response body: {response_obj.text[:500]}")
-                except Exception as ex:
-                    typer.echo(f"   Could not read response: {ex}")
-            else:
-                # Print the full traceback to see where the error is coming from
-                typer.echo(f"   Full traceback:\n{tb}")
-
-            if error_count > 10:
-                typer.echo("\nToo many errors, aborting upload")
-                raise typer.Exit(1)
+    try:
+        if fit_batch_size:
+            success_count, error_count = _upload_fit_batches(
+                api, df, unit, fit_batch_size, concurrency, journal
+            )
+        else:
+            success_count, error_count = _upload_weigh_ins(
+                api, df, unit, concurrency, journal
+            )
+    finally:
+        if journal is not None:
+            journal.close()
 
     typer.echo("\n" + "=" * 50)
     typer.echo("✅ Upload complete!")
@@ -1 +1,419 @@
-# Tests for fitbit_garmin_converter CLI
\ No newline at end of file
+# Tests for fitbit_garmin_converter CLI
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import zipfile
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+import pytest
+import typer
+from typer.testing import CliRunner
+
+from fitbit_garmin_converter import cli
+from fitbit_garmin_converter.cli import (
+    IngestCache,
+    UploadJournal,
+    WeighInIndex,
+    ZipMember,
+    find_weight_sources,
+    ingest_weight_files,
+    iter_json_array,
+    localize_timestamps,
+    read_weight_batches,
+    run_in_order,
+)
+
+TEST_DATA = Path(__file__).parent / "test_data"
+CLI = Path(cli.__file__)
+# Time from starting the script to its first exit, excluding interpreter start-up
+STARTUP_BUDGET_SECONDS = 0.2
+HEAVY_MODULES = ("pandas", "numpy", "garth", "requests")
+
+_STARTUP_BENCHMARK = """
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+from fitbit_garmin_converter import cli
+stopped = False
+
+def stop(*args, **kwargs):
+    # First call that needs pandas; measure up to here
+    global stopped
+    stopped = True
+    raise SystemExit
+
+cli.ingest_weight_files = stop
+try:
+    cli.app(sys.argv[1:], prog_name="cli.py")
+except SystemExit:
+    pass
+elapsed = time.perf_counter() - start
+loaded = [m for m in {heavy!r} if m in sys.modules]
+print(elapsed, stopped, *loaded, file=sys.stderr)
+"""
+STARTUP_ARGS = [
+    ("--help",),
+    (str(TEST_DATA), "--dry-run"),
+    (str(TEST_DATA), "--timezone-name", "Not/AZone"),
+]
+
+
+def _slow_square(x: int) -> int:
+    # Later items finish first, so ordering has to come from run_in_order
+    time.sleep(0.01 * (5 - x))
+    if x == 3:
+        raise ValueError("boom")
+    return x * x
+
+
+def test_run_in_order_preserves_order_and_captures_errors() -> None:
+    for concurrency in (1, 4):
+        results = list(run_in_order(_slow_square, range(5), concurrency))
+        assert [item for item, _, _ in results] == [0, 1, 2, 3, 4]
+        assert [result for _, result, _ in results] == [0, 1, 4, None, 16]
+        errors = [error for _, _, error in results]
+        assert isinstance(errors[3], ValueError)
+        assert errors[:3] == [None, None, None]
+
+
+def test_upload_journal_resumes_and_drops_torn_line(tmp_path: Path) -> None:
+    path = tmp_path / "journal.txt"
+    with UploadJournal(path, sync_every=2) as journal:
+        for log_id in (1, 2, 3):
+            journal.record(log_id)
+    with path.open("a") as f:
+        f.write("4")  # crash in the middle of a write
+
+    journal = UploadJournal(path)
+    assert journal.ids == {1, 2, 3}
+    assert 4 not in journal
+    journal.record(5)
+    journal.close()
+    assert path.read_text() == "1\n2\n3\n5\n"
+
+
+class FailingUploadApi:
+    """Fails the first MAX_UPLOAD_ERRORS + 1 uploads, the last one only after
+    the upload behind it has finished."""
+
+    def __init__(self) -> None:
+        self.uploaded: list[int] = []
+        self.first_success = threading.Event()
+
+    def add_weigh_in_epoch_ms(
+        self, weight: float, local_ms: int, gmt_ms: int, unitKey: str
+    ) -> dict[str, Any]:
+        if gmt_ms < cli.MAX_UPLOAD_ERRORS:
+            raise ValueError("boom")
+        if gmt_ms == cli.MAX_UPLOAD_ERRORS:
+            assert self.first_success.wait(5)
+            raise ValueError("boom")
+        self.uploaded.append(gmt_ms)
+        self.first_success.set()
+        return {}
+
+
+def test_upload_abort_journals_finished_uploads(tmp_path: Path) -> None:
+    api = FailingUploadApi()
+    n = cli.MAX_UPLOAD_ERRORS + 10
+    df = pd.DataFrame(
+        {
+            "datetime": pd.date_range("2024-01-01", periods=n, freq="h"),
+            "weight": 80.0,
+            "local_ms": range(n),
+            "gmt_ms": range(n),
+            "logId": range(n),
+        }
+    )
+    with UploadJournal(tmp_path / "journal.txt") as journal:
+        with pytest.raises(typer.Exit):
+            cli._upload_weigh_ins(api, df, "kg", 4, journal)
+    assert api.uploaded
+    assert UploadJournal(tmp_path / "journal.txt").ids == set(api.uploaded)
+
+
+class FakeFitUploadApi:
+    """Records the FIT files uploaded and fails those starting at fail_from."""
+
+    def __init__(self, fail_from: set[float] | None = None) -> None:
+        self.files: list[list[float]] = []
+        self.attempts = 0
+        self.fail_from = fail_from
+
+    def add_body_composition_columns(
+        self, timestamp: Any, weight: Any, max_records_per_file: int, **columns: Any
+    ) -> list[dict[str, Any]]:
+        assert len(timestamp) <= max_records_per_file
+        self.attempts += 1
+        if self.fail_from is None or timestamp[0] in self.fail_from:
+            raise ValueError("boom")
+        self.files.append(timestamp.tolist())
+        return [{}]
+
+
+def _fit_upload_frame(n: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "datetime": pd.date_range("2024-01-01", periods=n, freq="h"),
+            "weight": 180.0,
+            "bmi": 24.5,
+            "fat": float("nan"),
+            "gmt_ms": [i * 1000 for i in range(n)],
+            "logId": range(n),
+        }
+    )
+
+
+def test_fit_uploads_are_split_and_journaled(tmp_path: Path) -> None:
+    api = FakeFitUploadApi(fail_from={5.0})
+    df = _fit_upload_frame(12)
+    with UploadJournal(tmp_path / "journal.txt") as journal:
+        counts = cli._upload_fit_batches(api, df, "lbs", 5, 2, journal)
+    assert counts == (7, 5)
+    assert api.files == [[0, 1, 2, 3, 4], [10, 11]]
+    assert UploadJournal(tmp_path / "journal.txt").ids == {0, 1, 2, 3, 4, 10, 11}
+
+
+def test_fit_upload_aborts_after_too_many_failed_files(tmp_path: Path) -> None:
+    api = FakeFitUploadApi()
+    df = _fit_upload_frame(2 * (cli.MAX_UPLOAD_ERRORS + 5))
+    with UploadJournal(tmp_path / "journal.txt") as journal:
+        with pytest.raises(typer.Exit):
+            cli._upload_fit_batches(api, df, "kg", 2, 1, journal)
+    assert api.files == []
+    assert api.attempts == cli.MAX_UPLOAD_ERRORS + 1
+    assert not UploadJournal(tmp_path / "journal.txt").ids
+
+
+def test_fit_batch_size_is_capped_at_the_fit_file_limit() -> None:
+    from garminconnect import MAX_FIT_WEIGHT_RECORDS
+
+    args = [str(TEST_DATA), "--dry-run", "--fit-batch-size"]
+    result = CliRunner().invoke(cli.app, [*args, str(MAX_FIT_WEIGHT_RECORDS + 1)])
+    assert result.exit_code == 1
+    assert "Invalid --fit-batch-size" in result.output
+
+
+class FakeWeighInApi:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, str]] = []
+
+    def get_weigh_ins(self, startdate: str, enddate: str) -> dict[str, Any]:
+        self.calls.append((startdate, enddate))
+        metric = {"timestampGMT": 1754918887000, "weight": 86455.0}
+        return {"dailyWeightSummaries": [{"allWeightMetrics": [metric]}]}
+
+
+def test_weigh_in_index_fetches_in_chunks() -> None:
+    api = FakeWeighInApi()
+    index = WeighInIndex.fetch(
+        api, date(2025, 1, 1), date(2025, 1, 25), chunk_days=10, concurrency=2
+    )
+    assert api.calls == [
+        ("2025-01-01", "2025-01-10"),
+        ("2025-01-11", "2025-01-20"),
+        ("2025-01-21", "2025-01-25"),
+    ]
+    assert index.contains(1754918887, 86455.0 + 40)
+    assert not index.contains(1754918887, 86455.0 + 100)
+    assert not index.contains(1754918888, 86455.0)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1 << 16])
+def test_iter_json_array_across_chunk_boundaries(chunk_size: int) -> None:
+    values = [{"a": 1, "b": [1, 2]}, 12345, "x]y", {"c": {"d": None}}, 6.5]
+    text = json.dumps(values, indent=2)
+    assert list(iter_json_array(io.StringIO(text), chunk_size)) == values
+    assert list(iter_json_array(io.StringIO(" [ ] "), chunk_size)) == []
+
+
+def test_read_weight_batches() -> None:
+    files = sorted(TEST_DATA.glob("weight*.json"))
+    batches = list(read_weight_batches(files, batch_size=4))
+    assert [len(batch) for batch in batches] == [4, 2]
+    first = batches[0].iloc[0]
+    assert first["logId"] == 1754767314000
+    assert first["timestamp"] == 1754767314  # 08/09/25 19:21:54 as naive epoch
+    assert first["weight"] == 190.9
+    assert first["bmi"] == 25.86
+
+
+def test_ingest_weight_files_is_deterministic_across_jobs() -> None:
+    files = list(TEST_DATA.glob("weight*.json"))
+    serial = ingest_weight_files(files, jobs=1)
+    parallel = ingest_weight_files(list(reversed(files)), jobs=2)
+    pd.testing.assert_frame_equal(serial, parallel)
+    assert serial["timestamp"].is_monotonic_increasing
+    assert len(serial) == 5  # one record is in two of the files
+
+
+def test_ingest_weight_files_drops_records_exported_twice(tmp_path: Path) -> None:
+    for file in TEST_DATA.glob("weight*.json"):
+        shutil.copy(file, tmp_path / file.name)
+        shutil.copy(file, tmp_path / f"copy-{file.name}")
+    files = list(tmp_path.glob("*.json"))
+    expected = ingest_weight_files(TEST_DATA.glob("weight*.json"))
+    for jobs in (1, 2):
+        df = ingest_weight_files(files, jobs=jobs, batch_size=4)
+        pd.testing.assert_frame_equal(df, expected)
+
+
+def test_upload_dry_run_reads_in_batches(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    for file in TEST_DATA.glob("weight*.json"):
+        shutil.copy(file, tmp_path / file.name)
+        shutil.copy(file, tmp_path / f"copy-{file.name}")
+    monkeypatch.setenv("GARMINTOKENS", str(tmp_path / "tokens"))
+    batch_sizes = []
+    read_weight_batches = cli.read_weight_batches
+
+    def recording_read(files: Any, batch_size: int) -> Any:
+        batch_sizes.append(batch_size)
+        return read_weight_batches(files, batch_size)
+
+    monkeypatch.setattr(cli, "read_weight_batches", recording_read)
+    args = [str(tmp_path), "--dry-run", "--no-cache"]
+    for jobs in ("1", "2"):
+        result = CliRunner().invoke(
+            cli.app, [*args, "--jobs", jobs, "--read-batch-size", "2"]
+        )
+        assert result.exit_code == 0, result.output
+        assert "Found 5 weight records to upload" in result.output
+    # Only the single-process run streams; --jobs parses whole files
+    assert batch_sizes == [2]
+
+
+def test_ingest_cache_is_opt_in(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("GARMINTOKENS", str(tmp_path / "tokens"))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    result = CliRunner().invoke(cli.app, [str(TEST_DATA), "--dry-run"])
+    assert result.exit_code == 0, result.output
+    assert not (tmp_path / "cache").exists()
+
+    result = CliRunner().invoke(cli.app, [str(TEST_DATA), "--dry-run", "--cache"])
+    assert result.exit_code == 0, result.output
+    assert len(list((tmp_path / "cache").rglob("*.npz"))) == 3
+
+
+def test_weight_files_are_read_from_zip_archives(tmp_path: Path) -> None:
+    archive = tmp_path / "takeout.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        for file in TEST_DATA.glob("weight*.json"):
+            zf.write(file, f"Takeout/Fitbit/Global Export Data/{file.name}")
+        zf.writestr("Takeout/Fitbit/Global Export Data/sleep-1.json", "[]")
+
+    sources = find_weight_sources([archive], "weight*.json")
+    assert all(isinstance(source, ZipMember) for source in sources)
+    assert len(sources) == 3
+
+    from_zip = ingest_weight_files(sources, jobs=2)
+    assert not cli._open_archives
+    assert len(ingest_weight_files(sources)) == len(from_zip)
+    assert not cli._open_archives
+    from_dir = ingest_weight_files(find_weight_sources([TEST_DATA], "weight*.json"))
+    pd.testing.assert_frame_equal(from_zip, from_dir)
+
+
+def test_ingest_cache_reparses_only_changed_files(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    source = tmp_path / "weight-1.json"
+    shutil.copy(TEST_DATA / "weight_data1.json", source)
+    cache = IngestCache(tmp_path / "cache")
+    parsed = []
+    read_weight_file = cli.read_weight_file
+
+    def counting_read(file: Path) -> pd.DataFrame:
+        parsed.append(file)
+        return read_weight_file(file)
+
+    monkeypatch.setattr(cli, "read_weight_file", counting_read)
+
+    first = cache.read(source)
+    pd.testing.assert_frame_equal(cache.read(source), first)
+    assert len(parsed) == 1
+
+    # Touching the file alone is resolved by the content hash
+    os.utime(source, ns=(0, 0))
+    pd.testing.assert_frame_equal(cache.read(source), first)
+    assert len(parsed) == 1
+
+    source.write_text(json.dumps([{"date": "01/02/25", "time": "03:04:05", "weight": 80}]))
+    changed = cache.read(source)
+    assert len(parsed) == 2
+    assert changed["weight"].tolist() == [80.0]
+    assert changed["logId"].isna().all()
+
+
+@pytest.mark.parametrize(
+    ("dst_policy", "expected_gmt"),
+    [
+        # 2025-11-02 01:30 happens twice in Los Angeles, 2025-03-09 02:30 never
+        ("earliest", ["2025-11-02T08:30:00", "2025-03-09T09:30:00"]),
+        ("latest", ["2025-11-02T09:30:00", "2025-03-09T10:30:00"]),
+        ("skip", [None, None]),
+    ],
+)
+def test_localize_timestamps_dst_policies(
+    dst_policy: str, expected_gmt: list[str | None]
+) -> None:
+    naive = pd.Series(
+        pd.to_datetime(
+            ["2025-11-02 01:30:00", "2025-03-09 02:30:00", "2025-06-01 12:00:00"]
+        )
+    )
+    local_seconds = (naive - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+    result = localize_timestamps(local_seconds, "America/Los_Angeles", dst_policy)
+    gmt = [
+        None if pd.isna(ms) else pd.Timestamp(ms, unit="ms").isoformat()
+        for ms in result["gmt_ms"]
+    ]
+    assert gmt == [*expected_gmt, "2025-06-01T19:00:00"]
+    assert result["local_ms"].iloc[2] == local_seconds.iloc[2] * 1000
+
+
+def test_localize_timestamps_error_policy() -> None:
+    local_seconds = pd.Series([1762047000])  # 2025-11-02 01:30:00
+    with pytest.raises(ValueError):
+        localize_timestamps(local_seconds, "America/Los_Angeles", "error")
+
+
+def _startup(*args: str) -> tuple[float, bool, list[str]]:
+    """Run the CLI in a fresh interpreter until it first needs pandas.
+
+    Returns the seconds taken, whether it got as far as reading the weight
+    files and the heavy modules loaded by then.
+    """
+    code = _STARTUP_BENCHMARK.format(root=str(CLI.parent.parent), heavy=HEAVY_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-c", code, *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed, stopped, *loaded = result.stderr.splitlines()[-1].split()
+    return float(elapsed), stopped == "True", loaded
+
+
+@pytest.mark.parametrize("args", STARTUP_ARGS)
+def test_startup_loads_no_heavy_modules(args: tuple[str, ...]) -> None:
+    # Argument validation and file discovery happen before any heavy import
+    _, stopped, loaded = _startup(*args)
+    assert stopped == ("--dry-run" in args)
+    assert loaded == []
+
+
+# --help is left out: typer renders it with rich, which alone takes ~75 ms
+@pytest.mark.benchmark
+@pytest.mark.parametrize("args", STARTUP_ARGS[1:])
+def test_startup_budget(args: tuple[str, ...]) -> None:
+    assert min(_startup(*args)[0] for _ in range(3)) < STARTUP_BUDGET_SECONDS
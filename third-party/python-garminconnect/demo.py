@@ -1418,56 +1418,21 @@ def download_activities_by_date(api: Garmin) -> None:
 
         print(f"📊 Found {len(activities)} activities to download")
 
-        # Download each activity in multiple formats
-        for activity in activities:
-            activity_id = activity.get("activityId")
-            activity_name = activity.get("activityName", "Unknown")
-            start_time = activity.get("startTimeLocal", "").replace(":", "-")
-
-            if not activity_id:
-                continue
-
-            print(f"📥 Downloading: {activity_name} (ID: {activity_id})")
-
-            # Download formats: GPX, TCX, ORIGINAL, CSV
-            formats = ["GPX", "TCX", "ORIGINAL", "CSV"]
-
-            for fmt in formats:
-                try:
-                    filename = f"{start_time}_{activity_id}_ACTIVITY.{fmt.lower()}"
-                    if fmt == "ORIGINAL":
-                        filename = f"{start_time}_{activity_id}_ACTIVITY.zip"
-
-                    filepath = config.export_dir / filename
-
-                    if fmt == "CSV":
-                        # Get activity details for CSV export
-                        activity_details = api.get_activity_details(activity_id)
-                        with open(filepath, "w", encoding="utf-8") as f:
-                            import json
-
-                            json.dump(activity_details, f, indent=2, ensure_ascii=False)
-                        print(f"  ✅ {fmt}: {filename}")
-                    else:
-                        # Download the file from Garmin using proper enum values
-                        format_mapping = {
-                            "GPX": api.ActivityDownloadFormat.GPX,
-                            "TCX": api.ActivityDownloadFormat.TCX,
-                            "ORIGINAL": api.ActivityDownloadFormat.ORIGINAL,
-                        }
-
-                        dl_fmt = format_mapping[fmt]
-                        content = api.download_activity(activity_id, dl_fmt=dl_fmt)
-
-                        if content:
-                            with open(filepath, "wb") as f:
-                                f.write(content)
-                            print(f"  ✅ {fmt}: {filename}")
-                        else:
-                            print(f"  ❌ {fmt}: No content available")
-
-                except Exception as e:
-                    print(f"  ❌ {fmt}: Error downloading - {e}")
+        # Download formats: GPX, TCX, ORIGINAL (zip), CSV; several files are
+        # streamed to disk at once and files from earlier runs are skipped
+        formats = [
+            api.ActivityDownloadFormat.GPX,
+            api.ActivityDownloadFormat.TCX,
+            api.ActivityDownloadFormat.ORIGINAL,
+            api.ActivityDownloadFormat.CSV,
+        ]
+        downloads = api.download_activities(activities, config.export_dir, formats)
+        for activity_id, dl_fmt, path in downloads:
+            print(f"  ✅ {dl_fmt.name} (ID: {activity_id}): {path.name}")
+        for (activity_id, dl_fmt), error in downloads.failures.items():
+            print(f"  ❌ {dl_fmt.name} (ID: {activity_id}): Error downloading - {error}")
+        if downloads.skipped:
+            print(f"ℹ️ Skipped {len(downloads.skipped)} files already downloaded")
 
         print(f"✅ Activity downloads completed! Files saved to: {config.export_dir}")
 
@@ -1,26 +1,78 @@
 """Python 3 API wrapper for Garmin Connect."""
 
+import hashlib
+import json
 import logging
 import numbers
 import os
 import re
-from collections.abc import Callable
-from datetime import date, datetime, timezone
+import threading
+import time
+import uuid
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict
+from datetime import date, datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 from enum import Enum, auto
+from itertools import islice
 from pathlib import Path
-from typing import Any
-
-import garth
-import requests
-from garth.exc import GarthException, GarthHTTPError
-from requests import HTTPError
+from typing import TYPE_CHECKING, Any, BinaryIO, NamedTuple
 
+from .cache import ResponseCache, default_cache_ttl  # noqa: F401
 from .fit import FitEncoderWeight  # type: ignore
 
+if TYPE_CHECKING:
+    import garth
+    import requests
+    from garth.exc import GarthException, GarthHTTPError
+    from requests import HTTPError
+
 logger = logging.getLogger(__name__)
 
+
+def _import_http() -> None:
+    """Import garth and requests on first use.
+
+    They take a few hundred milliseconds to import, which dominated the
+    start-up of scripts that only need the FIT codec, the exceptions or a
+    quick --help. Garmin() and the helpers that inspect HTTP errors call
+    this first.
+    """
+    global garth, requests, GarthException, GarthHTTPError, HTTPError
+    import garth
+    import requests
+    from garth.exc import GarthException, GarthHTTPError
+    from requests import HTTPError
+
+
+def __getattr__(name: str) -> Any:
+    # Keep garminconnect.garth, garminconnect.requests and the re-exported
+    # exception classes available as module attributes
+    if name in ("garth", "requests", "GarthException", "GarthHTTPError", "HTTPError"):
+        _import_http()
+        return globals()[name]
+    if name == "AsyncGarmin":
+        # Needs the optional aiohttp dependency
+        from .aio import AsyncGarmin
+
+        return AsyncGarmin
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # Constants for validation
 MAX_ACTIVITY_LIMIT = 1000
+ACTIVITY_PAGE_SIZE = 100  # activities per page of get_activities_by_date
+ACTIVITY_PAGE_PREFETCH = 2  # pages requested ahead of the one being read
+MAX_FIT_WEIGHT_RECORDS = 5000  # weight_scale records per uploaded FIT file
+UPLOAD_CHUNK_SIZE = 1 << 16  # bytes read per chunk of a streamed upload
+DOWNLOAD_CHUNK_SIZE = 1 << 16  # bytes written per chunk of a streamed download
+DEFAULT_DOWNLOAD_CONCURRENCY = 4  # workers per download_activities call
+PROFILE_CACHE_FILE = "profile_cache.json"  # written next to the tokens
+PROFILE_CACHE_VERSION = 1
+DEFAULT_FETCH_CONCURRENCY = 4  # workers per fetch_range call
+TOKEN_REFRESH_RETRY_SECONDS = 60  # pause after a failed background refresh
 MAX_HYDRATION_ML = 10000  # 10 liters
 DATE_FORMAT_REGEX = r"^\d{4}-\d{2}-\d{2}$"
 DATE_FORMAT_STR = "%Y-%m-%d"
@@ -50,6 +102,28 @@ def _validate_date_format(date_str: str, param_name: str = "date") -> str:
     return date_str
 
 
+def _as_date(value: str | date, param_name: str = "date") -> date:
+    """Return a date from a 'YYYY-MM-DD' string, date or datetime."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    value = _validate_date_format(value, param_name)
+    return datetime.strptime(value, DATE_FORMAT_STR).date()
+
+
+def _epoch_seconds(timestamp: datetime | float | str | None) -> float:
+    """Return epoch seconds for a datetime or ISO string (local time when
+    naive), epoch seconds, or None for now."""
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    if timestamp:
+        return datetime.fromisoformat(timestamp).timestamp()
+    return time.time()
+
+
 def _validate_positive_number(
     value: int | float, param_name: str = "value"
 ) -> int | float:
@@ -91,180 +165,619 @@ def _fmt_ts(dt: datetime) -> str:
     return dt.replace(tzinfo=None).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3]
 
 
-class Garmin:
-    """Class for fetching data from Garmin Connect."""
+def _fmt_epoch_ms(epoch_ms: int) -> str:
+    """Format wall-clock milliseconds since the epoch like _fmt_ts."""
+    seconds, ms = divmod(int(epoch_ms), 1000)
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)) + f".{ms:03d}"
 
-    def __init__(
-        self,
-        email: str | None = None,
-        password: str | None = None,
-        is_cn: bool = False,
-        prompt_mfa: Callable[[], str] | None = None,
-        return_on_mfa: bool = False,
-    ) -> None:
-        """Create a new class instance."""
 
-        # Validate input types
-        if email is not None and not isinstance(email, str):
-            raise ValueError("email must be a string or None")
-        if password is not None and not isinstance(password, str):
-            raise ValueError("password must be a string or None")
-        if not isinstance(is_cn, bool):
-            raise ValueError("is_cn must be a boolean")
-        if not isinstance(return_on_mfa, bool):
-            raise ValueError("return_on_mfa must be a boolean")
+def _http_response(e: Exception) -> Any:
+    """Return the requests.Response behind an HTTPError or GarthHTTPError."""
+    _import_http()
+    if isinstance(e, GarthHTTPError):
+        e = e.error
+    return getattr(e, "response", None)
 
-        self.username = email
-        self.password = password
-        self.is_cn = is_cn
-        self.prompt_mfa = prompt_mfa
-        self.return_on_mfa = return_on_mfa
 
-        self.garmin_connect_user_settings_url = (
-            "/userprofile-service/userprofile/user-settings"
-        )
-        self.garmin_connect_userprofile_settings_url = (
-            "/userprofile-service/userprofile/settings"
-        )
-        self.garmin_connect_devices_url = "/device-service/deviceregistration/devices"
-        self.garmin_connect_device_url = "/device-service/deviceservice"
+def _multipart_file_body(
+    fileobj: BinaryIO, field: str, filename: str, boundary: str, chunk_size: int
+) -> Iterator[bytes]:
+    """Yield a multipart/form-data body with one file part, read in chunks."""
+    yield (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    while chunk := fileobj.read(chunk_size):
+        yield chunk
+    yield f"\r\n--{boundary}--\r\n".encode()
 
-        self.garmin_connect_primary_device_url = (
-            "/web-gateway/device-info/primary-training-device"
-        )
 
-        self.garmin_connect_solar_url = "/web-gateway/solar"
-        self.garmin_connect_weight_url = "/weight-service"
-        self.garmin_connect_daily_summary_url = "/usersummary-service/usersummary/daily"
-        self.garmin_connect_metrics_url = "/metrics-service/metrics/maxmet/daily"
-        self.garmin_connect_biometric_url = "/biometric-service/biometric"
+def _parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header (delay in seconds or HTTP-date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
 
-        self.garmin_connect_biometric_stats_url = "/biometric-service/stats"
-        self.garmin_connect_daily_hydration_url = (
-            "/usersummary-service/usersummary/hydration/daily"
-        )
-        self.garmin_connect_set_hydration_url = (
-            "/usersummary-service/usersummary/hydration/log"
-        )
-        self.garmin_connect_daily_stats_steps_url = (
-            "/usersummary-service/stats/steps/daily"
-        )
-        self.garmin_connect_personal_record_url = (
-            "/personalrecord-service/personalrecord/prs"
-        )
-        self.garmin_connect_earned_badges_url = "/badge-service/badge/earned"
-        self.garmin_connect_available_badges_url = "/badge-service/badge/available"
-        self.garmin_connect_adhoc_challenges_url = (
-            "/adhocchallenge-service/adHocChallenge/historical"
-        )
-        self.garmin_connect_badge_challenges_url = (
-            "/badgechallenge-service/badgeChallenge/completed"
-        )
-        self.garmin_connect_available_badge_challenges_url = (
-            "/badgechallenge-service/badgeChallenge/available"
-        )
-        self.garmin_connect_non_completed_badge_challenges_url = (
-            "/badgechallenge-service/badgeChallenge/non-completed"
-        )
-        self.garmin_connect_inprogress_virtual_challenges_url = (
-            "/badgechallenge-service/virtualChallenge/inProgress"
-        )
-        self.garmin_connect_daily_sleep_url = (
-            "/wellness-service/wellness/dailySleepData"
-        )
-        self.garmin_connect_daily_stress_url = "/wellness-service/wellness/dailyStress"
-        self.garmin_connect_hill_score_url = "/metrics-service/metrics/hillscore"
 
-        self.garmin_connect_daily_body_battery_url = (
-            "/wellness-service/wellness/bodyBattery/reports/daily"
-        )
+def _connectapi_error(status: int | None, e: Exception) -> Exception:
+    """Map a failed API call to the matching GarminConnect exception."""
+    if status == 401:
+        return GarminConnectAuthenticationError(f"Authentication failed: {e}")
+    elif status == 429:
+        return GarminConnectTooManyRequestsError(f"Rate limit exceeded: {e}")
+    elif status and 400 <= status < 500:
+        # Client errors (400-499) - API endpoint issues, bad parameters, etc.
+        return GarminConnectConnectionError(f"API client error ({status}): {e}")
+    else:
+        return GarminConnectConnectionError(f"HTTP error: {e}")
+
 
-        self.garmin_connect_body_battery_events_url = (
-            "/wellness-service/wellness/bodyBattery/events"
-        )
+def _download_error(status: int | None, e: Exception) -> Exception:
+    """Map a failed download to the matching GarminConnect exception."""
+    if status == 401:
+        return GarminConnectAuthenticationError(f"Download error: {e}")
+    elif status == 429:
+        return GarminConnectTooManyRequestsError(f"Download error: {e}")
+    elif status and 400 <= status < 500:
+        # Client errors (400-499) - API endpoint issues, bad parameters, etc.
+        return GarminConnectConnectionError(f"Download client error ({status}): {e}")
+    else:
+        return GarminConnectConnectionError(f"Download error: {e}")
 
-        self.garmin_connect_blood_pressure_endpoint = (
-            "/bloodpressure-service/bloodpressure/range"
-        )
 
-        self.garmin_connect_set_blood_pressure_endpoint = (
-            "/bloodpressure-service/bloodpressure"
-        )
+def _weigh_in_payload(
+    weight: int | float, unitKey: str, dateTimestamp: str, gmtTimestamp: str
+) -> dict[str, Any]:
+    """Build the body of a manual weigh-in from formatted timestamps."""
+    return {
+        "dateTimestamp": dateTimestamp,
+        "gmtTimestamp": gmtTimestamp,
+        "unitKey": unitKey,
+        "sourceType": "MANUAL",
+        "value": weight,
+    }
 
-        self.garmin_connect_endurance_score_url = (
-            "/metrics-service/metrics/endurancescore"
-        )
-        self.garmin_connect_menstrual_calendar_url = (
-            "/periodichealth-service/menstrualcycle/calendar"
-        )
 
-        self.garmin_connect_menstrual_dayview_url = (
-            "/periodichealth-service/menstrualcycle/dayview"
-        )
-        self.garmin_connect_pregnancy_snapshot_url = (
-            "/periodichealth-service/menstrualcycle/pregnancysnapshot"
-        )
-        self.garmin_connect_goals_url = "/goal-service/goal/goals"
+class _ApiCall(NamedTuple):
+    """A connectapi request as built for both Garmin and AsyncGarmin."""
+
+    path: str
+    params: dict[str, Any] | None = None
+    method: str = "GET"
+    json: Any = None
+    # Maps the decoded response to what the public method returns
+    result: Callable[[Any], Any] | None = None
+
+
+def _user_summary_result(response: Any) -> dict[str, Any]:
+    if not response:
+        raise GarminConnectConnectionError("No data received from server")
+
+    if response.get("privacyProtected") is True:
+        raise GarminConnectAuthenticationError("Authentication error")
+
+    return response
+
+
+def _steps_result(response: Any) -> list[dict[str, Any]]:
+    if response is None:
+        logger.warning("No steps data received")
+        return []
+
+    return response
+
+
+def _heart_rates_result(response: Any) -> dict[str, Any]:
+    if response is None:
+        raise GarminConnectConnectionError("No heart rate data received")
+
+    return response
+
+
+def _activities_result(response: Any) -> dict[str, Any] | list[Any]:
+    if response is None:
+        logger.warning("No activities data received")
+        return []
+
+    return response
+
+
+def _weigh_in_result(response: Any) -> dict[str, Any]:
+    if response is None:
+        # Garmin API sometimes returns empty responses on success
+        return {"success": True, "message": "Weight added successfully"}
+
+    return response
+
+
+def _body_composition_file(
+    timestamp: str | None, weight: float, **fields: float | None
+) -> bytes:
+    """Encode one body composition measurement as a FIT file.
+
+    fields are the optional add_body_composition measurements.
+    """
+    weight = _validate_positive_number(weight, "weight")
+    # Timestamps without an offset are local time
+    dt = (
+        datetime.fromisoformat(timestamp).astimezone()
+        if timestamp
+        else datetime.now().astimezone()
+    )
+    fitEncoder = FitEncoderWeight()
+    fitEncoder.write_file_info()
+    fitEncoder.write_file_creator()
+    fitEncoder.write_device_info(dt)
+    fitEncoder.write_weight_scale(dt, weight=weight, **fields)
+    fitEncoder.finish()
+    return fitEncoder.getvalue()
+
 
-        self.garmin_connect_rhr_url = "/userstats-service/wellness/daily"
+def _activity_upload_path(activity_path: str) -> Path:
+    """Validate an activity file for upload_activity and return its path."""
+    # Validate input
+    if not activity_path:
+        raise ValueError("activity_path cannot be empty")
 
-        self.garmin_connect_hrv_url = "/hrv-service/hrv"
+    if not isinstance(activity_path, str):
+        raise ValueError("activity_path must be a string")
 
-        self.garmin_connect_training_readiness_url = (
-            "/metrics-service/metrics/trainingreadiness"
-        )
+    # Check if file exists
+    p = Path(activity_path)
+    if not p.exists():
+        raise FileNotFoundError(f"File not found: {activity_path}")
 
-        self.garmin_connect_race_predictor_url = (
-            "/metrics-service/metrics/racepredictions"
-        )
-        self.garmin_connect_training_status_url = (
-            "/metrics-service/metrics/trainingstatus/aggregated"
-        )
-        self.garmin_connect_user_summary_chart = (
-            "/wellness-service/wellness/dailySummaryChart"
-        )
-        self.garmin_connect_floors_chart_daily_url = (
-            "/wellness-service/wellness/floorsChartData/daily"
-        )
-        self.garmin_connect_heartrates_daily_url = (
-            "/wellness-service/wellness/dailyHeartRate"
-        )
-        self.garmin_connect_daily_respiration_url = (
-            "/wellness-service/wellness/daily/respiration"
+    # Check if it's actually a file
+    if not p.is_file():
+        raise ValueError(f"path is not a file: {activity_path}")
+
+    if not p.name:
+        raise ValueError("invalid file path - no filename found")
+
+    # More robust extension checking
+    file_parts = p.name.split(".")
+    if len(file_parts) < 2:
+        raise GarminConnectInvalidFileFormatError(
+            f"File has no extension: {activity_path}"
         )
-        self.garmin_connect_daily_spo2_url = "/wellness-service/wellness/daily/spo2"
-        self.garmin_connect_daily_intensity_minutes = (
-            "/wellness-service/wellness/daily/im"
+
+    file_extension = file_parts[-1]
+    if file_extension.upper() not in Garmin.ActivityUploadFormat.__members__:
+        allowed_formats = ", ".join(Garmin.ActivityUploadFormat.__members__.keys())
+        raise GarminConnectInvalidFileFormatError(
+            f"Invalid file format '{file_extension}'. Allowed formats: {allowed_formats}"
         )
-        self.garmin_daily_events_url = "/wellness-service/wellness/dailyEvents"
-        self.garmin_connect_activities = (
-            "/activitylist-service/activities/search/activities"
+
+    return p
+
+
+class RateLimiter:
+    """Thread-safe token bucket shared by all requests of a Garmin client.
+
+    Allows `requests_per_second` on average with bursts of up to `burst`
+    requests. When the server answers 429 the rate is halved and requests
+    pause for Retry-After; each success then adds back a small step until
+    the configured rate is reached again, so throughput settles just below
+    the server limit.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float = 2.0,
+        burst: int = 5,
+        min_rate: float = 0.1,
+        recovery_step: float = 0.02,
+        max_retries: int = 3,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        _validate_positive_number(requests_per_second, "requests_per_second")
+        _validate_positive_integer(burst, "burst")
+        _validate_positive_number(min_rate, "min_rate")
+        _validate_non_negative_integer(max_retries, "max_retries")
+
+        self.max_rate = float(requests_per_second)
+        self.burst = burst
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.recovery_step = recovery_step
+        self.max_retries = max_retries
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._rate = self.max_rate
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._blocked_until = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Current (possibly backed-off) requests per second."""
+        return self._rate
+
+    def acquire(self) -> None:
+        """Block until the caller may send one request."""
+        wait = self.reserve()
+        if wait > 0:
+            self._sleep(wait)
+
+    def reserve(self) -> float:
+        """Reserve one request and return the seconds to wait before it.
+
+        For callers that do their own waiting, e.g. with asyncio.sleep.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self._rate
+            )
+            self._updated = now
+            # Reserve a token; a negative balance queues callers behind each other
+            self._tokens -= 1
+            return max(-self._tokens / self._rate, self._blocked_until - now, 0.0)
+
+    def on_success(self) -> None:
+        """Grow the rate back toward the configured limit."""
+        with self._lock:
+            self._rate = min(
+                self.max_rate, self._rate + self.max_rate * self.recovery_step
+            )
+
+    def on_rate_limited(self, retry_after: float | None = None) -> None:
+        """Halve the rate and pause all callers for retry_after seconds."""
+        with self._lock:
+            now = self._clock()
+            self._rate = max(self.min_rate, self._rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = now
+            pause = retry_after if retry_after is not None else 1 / self._rate
+            self._blocked_until = max(self._blocked_until, now + pause)
+        logger.warning(
+            "Rate limited by Garmin Connect, pausing %.1fs and slowing to %.2f req/s",
+            pause,
+            self._rate,
         )
-        self.garmin_connect_activities_baseurl = "/activitylist-service/activities/"
-        self.garmin_connect_activity = "/activity-service/activity"
-        self.garmin_connect_activity_types = "/activity-service/activity/activityTypes"
-        self.garmin_connect_activity_fordate = "/mobile-gateway/heartRate/forDate"
-        self.garmin_connect_fitnessstats = "/fitnessstats-service/activity"
-        self.garmin_connect_fitnessage = "/fitnessage-service/fitnessage"
 
-        self.garmin_connect_fit_download = "/download-service/files/activity"
-        self.garmin_connect_tcx_download = "/download-service/export/tcx/activity"
-        self.garmin_connect_gpx_download = "/download-service/export/gpx/activity"
-        self.garmin_connect_kml_download = "/download-service/export/kml/activity"
-        self.garmin_connect_csv_download = "/download-service/export/csv/activity"
 
-        self.garmin_connect_upload = "/upload-service/upload"
+def _as_completed(
+    fn: Callable[[Any], Any], items: Iterable[Any], concurrency: int
+) -> Iterator[tuple[Any, Any, Exception | None]]:
+    """Call fn on each item on a thread pool, yielding (item, result, error).
+
+    Triples are yielded as the calls complete. At most 2 * concurrency calls
+    are queued at once, so long inputs are consumed lazily; closing the
+    generator cancels the calls not yet started.
+    """
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending: dict[Future, Any] = {}
+
+        def submit_next() -> None:
+            for item in items:
+                pending[executor.submit(fn, item)] = item
+                return
+
+        try:
+            for _ in range(2 * concurrency):
+                submit_next()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = pending.pop(future)
+                    submit_next()
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        yield item, None, e
+                    else:
+                        yield item, result, None
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+class RangeFetch:
+    """Results of Garmin.fetch_range as (date, result) pairs.
+
+    Pairs are yielded as the calls complete, not in date order. Days whose
+    call raised are not yielded; their exceptions are collected in
+    `failures`, which is complete once iteration has finished.
+    """
+
+    def __init__(
+        self, fn: Callable[[str], Any], days: list[date], concurrency: int
+    ) -> None:
+        self.fn = fn
+        self.days = days
+        self.concurrency = concurrency
+        self.failures: dict[date, Exception] = {}
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def __iter__(self) -> Iterator[tuple[date, Any]]:
+        def fetch_day(day: date) -> Any:
+            return self.fn(day.isoformat())
+
+        for day, result, error in _as_completed(fetch_day, self.days, self.concurrency):
+            if error is not None:
+                logger.warning("Fetching %s failed: %s", day, error)
+                self.failures[day] = error
+                continue
+            yield day, result
+
+
+class ActivityDownloads:
+    """Files written by Garmin.download_activities.
+
+    Iterating runs the downloads and yields (activity_id, dl_fmt, path) as
+    each file is finished. Files already on disk are yielded without being
+    downloaded again and listed in `skipped`; failed downloads are collected
+    in `failures` instead of stopping the run. Activity dicts without an
+    activityId are passed over and collected in `unidentified`.
+    """
+
+    def __init__(
+        self,
+        garmin: "Garmin",
+        activities: Iterable[int | str | dict[str, Any]],
+        directory: Path,
+        formats: list["Garmin.ActivityDownloadFormat"],
+        concurrency: int,
+        chunk_size: int,
+    ) -> None:
+        self.garmin = garmin
+        self.activities = activities
+        self.directory = directory
+        self.formats = formats
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.skipped: list[tuple[str, Garmin.ActivityDownloadFormat]] = []
+        self.failures: dict[tuple[str, Garmin.ActivityDownloadFormat], Exception] = {}
+        self.unidentified: list[dict[str, Any]] = []
+
+    def __iter__(self) -> Iterator[tuple[str, "Garmin.ActivityDownloadFormat", Path]]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        def files() -> Iterator[tuple[str, Garmin.ActivityDownloadFormat, Path]]:
+            for activity in self.activities:
+                if isinstance(activity, dict):
+                    if activity.get("activityId") is None:
+                        logger.warning("Skipping activity without an id: %s", activity)
+                        self.unidentified.append(activity)
+                        continue
+                    activity = activity["activityId"]
+                activity_id = str(activity)
+                for dl_fmt in self.formats:
+                    name = Garmin.activity_file_name(activity_id, dl_fmt)
+                    yield activity_id, dl_fmt, self.directory / name
+
+        def download(file: tuple[str, Garmin.ActivityDownloadFormat, Path]) -> bool:
+            activity_id, dl_fmt, path = file
+            if path.exists():
+                return False
+            url = self.garmin._activity_download_url(activity_id, dl_fmt)
+            self.garmin.download_to_file(url, path, self.chunk_size)
+            return True
+
+        for file, downloaded, error in _as_completed(
+            download, files(), self.concurrency
+        ):
+            activity_id, dl_fmt, path = file
+            if error is not None:
+                logger.warning(
+                    "Downloading activity %s as %s failed: %s",
+                    activity_id,
+                    dl_fmt.name,
+                    error,
+                )
+                self.failures[(activity_id, dl_fmt)] = error
+                continue
+            if not downloaded:
+                self.skipped.append((activity_id, dl_fmt))
+            yield activity_id, dl_fmt, path
+
+
+class Garmin:
+    """Class for fetching data from Garmin Connect."""
+
+    # API endpoint paths, shared by all instances
+    garmin_connect_user_settings_url = "/userprofile-service/userprofile/user-settings"
+    garmin_connect_userprofile_settings_url = (
+        "/userprofile-service/userprofile/settings"
+    )
+    garmin_connect_devices_url = "/device-service/deviceregistration/devices"
+    garmin_connect_device_url = "/device-service/deviceservice"
+
+    garmin_connect_primary_device_url = (
+        "/web-gateway/device-info/primary-training-device"
+    )
+
+    garmin_connect_solar_url = "/web-gateway/solar"
+    garmin_connect_weight_url = "/weight-service"
+    garmin_connect_daily_summary_url = "/usersummary-service/usersummary/daily"
+    garmin_connect_metrics_url = "/metrics-service/metrics/maxmet/daily"
+    garmin_connect_biometric_url = "/biometric-service/biometric"
+
+    garmin_connect_biometric_stats_url = "/biometric-service/stats"
+    garmin_connect_daily_hydration_url = (
+        "/usersummary-service/usersummary/hydration/daily"
+    )
+    garmin_connect_set_hydration_url = "/usersummary-service/usersummary/hydration/log"
+    garmin_connect_daily_stats_steps_url = "/usersummary-service/stats/steps/daily"
+    garmin_connect_personal_record_url = "/personalrecord-service/personalrecord/prs"
+    garmin_connect_earned_badges_url = "/badge-service/badge/earned"
+    garmin_connect_available_badges_url = "/badge-service/badge/available"
+    garmin_connect_adhoc_challenges_url = (
+        "/adhocchallenge-service/adHocChallenge/historical"
+    )
+    garmin_connect_badge_challenges_url = (
+        "/badgechallenge-service/badgeChallenge/completed"
+    )
+    garmin_connect_available_badge_challenges_url = (
+        "/badgechallenge-service/badgeChallenge/available"
+    )
+    garmin_connect_non_completed_badge_challenges_url = (
+        "/badgechallenge-service/badgeChallenge/non-completed"
+    )
+    garmin_connect_inprogress_virtual_challenges_url = (
+        "/badgechallenge-service/virtualChallenge/inProgress"
+    )
+    garmin_connect_daily_sleep_url = "/wellness-service/wellness/dailySleepData"
+    garmin_connect_daily_stress_url = "/wellness-service/wellness/dailyStress"
+    garmin_connect_hill_score_url = "/metrics-service/metrics/hillscore"
+
+    garmin_connect_daily_body_battery_url = (
+        "/wellness-service/wellness/bodyBattery/reports/daily"
+    )
+
+    garmin_connect_body_battery_events_url = (
+        "/wellness-service/wellness/bodyBattery/events"
+    )
+
+    garmin_connect_blood_pressure_endpoint = (
+        "/bloodpressure-service/bloodpressure/range"
+    )
+
+    garmin_connect_set_blood_pressure_endpoint = "/bloodpressure-service/bloodpressure"
+
+    garmin_connect_endurance_score_url = "/metrics-service/metrics/endurancescore"
+    garmin_connect_menstrual_calendar_url = (
+        "/periodichealth-service/menstrualcycle/calendar"
+    )
+
+    garmin_connect_menstrual_dayview_url = (
+        "/periodichealth-service/menstrualcycle/dayview"
+    )
+    garmin_connect_pregnancy_snapshot_url = (
+        "/periodichealth-service/menstrualcycle/pregnancysnapshot"
+    )
+    garmin_connect_goals_url = "/goal-service/goal/goals"
+
+    garmin_connect_rhr_url = "/userstats-service/wellness/daily"
+
+    garmin_connect_hrv_url = "/hrv-service/hrv"
+
+    garmin_connect_training_readiness_url = "/metrics-service/metrics/trainingreadiness"
+
+    garmin_connect_race_predictor_url = "/metrics-service/metrics/racepredictions"
+    garmin_connect_training_status_url = (
+        "/metrics-service/metrics/trainingstatus/aggregated"
+    )
+    garmin_connect_user_summary_chart = "/wellness-service/wellness/dailySummaryChart"
+    garmin_connect_floors_chart_daily_url = (
+        "/wellness-service/wellness/floorsChartData/daily"
+    )
+    garmin_connect_heartrates_daily_url = "/wellness-service/wellness/dailyHeartRate"
+    garmin_connect_daily_respiration_url = (
+        "/wellness-service/wellness/daily/respiration"
+    )
+    garmin_connect_daily_spo2_url = "/wellness-service/wellness/daily/spo2"
+    garmin_connect_daily_intensity_minutes = "/wellness-service/wellness/daily/im"
+    garmin_daily_events_url = "/wellness-service/wellness/dailyEvents"
+    garmin_connect_activities = "/activitylist-service/activities/search/activities"
+    garmin_connect_activities_baseurl = "/activitylist-service/activities/"
+    garmin_connect_activity = "/activity-service/activity"
+    garmin_connect_activity_types = "/activity-service/activity/activityTypes"
+    garmin_connect_activity_fordate = "/mobile-gateway/heartRate/forDate"
+    garmin_connect_fitnessstats = "/fitnessstats-service/activity"
+    garmin_connect_fitnessage = "/fitnessage-service/fitnessage"
+
+    garmin_connect_fit_download = "/download-service/files/activity"
+    garmin_connect_tcx_download = "/download-service/export/tcx/activity"
+    garmin_connect_gpx_download = "/download-service/export/gpx/activity"
+    garmin_connect_kml_download = "/download-service/export/kml/activity"
+    garmin_connect_csv_download = "/download-service/export/csv/activity"
+
+    garmin_connect_upload = "/upload-service/upload"
+
+    garmin_connect_gear = "/gear-service/gear/filterGear"
+    garmin_connect_gear_baseurl = "/gear-service/gear/"
+
+    garmin_request_reload_url = "/wellness-service/wellness/epoch/request"
+
+    garmin_workouts = "/workout-service"
+
+    garmin_connect_delete_activity_url = "/activity-service/activity"
+
+    garmin_graphql_endpoint = "graphql-gateway/graphql"
+
+    def __init__(
+        self,
+        email: str | None = None,
+        password: str | None = None,
+        is_cn: bool = False,
+        prompt_mfa: Callable[[], str] | None = None,
+        return_on_mfa: bool = False,
+        rate_limiter: RateLimiter | None = None,
+        profile_cache_ttl: float | None = None,
+        token_refresh_margin: float | None = None,
+        response_cache: ResponseCache | None = None,
+    ) -> None:
+        """Create a new class instance.
+
+        Pass a RateLimiter to throttle every API call made by this client.
 
-        self.garmin_connect_gear = "/gear-service/gear/filterGear"
-        self.garmin_connect_gear_baseurl = "/gear-service/gear/"
+        Pass a ResponseCache to answer repeated connectapi() GET requests
+        from disk for as long as its TTL policy allows.
 
-        self.garmin_request_reload_url = "/wellness-service/wellness/epoch/request"
+        With profile_cache_ttl (seconds), login(tokenstore) caches the display
+        name, full name and unit system in the tokenstore directory and reuses
+        them for that long instead of fetching the profile and user settings
+        again. Any 401 response drops the cache.
 
-        self.garmin_workouts = "/workout-service"
+        With token_refresh_margin (seconds), the OAuth2 token is refreshed in
+        a background thread once it is that close to expiry, so long runs
+        never wait on an expired token. Concurrent callers share a single
+        refresh, and refreshed tokens are written back to the login()
+        tokenstore directory atomically.
+        """
+        _import_http()
 
-        self.garmin_connect_delete_activity_url = "/activity-service/activity"
+        # Validate input types
+        if email is not None and not isinstance(email, str):
+            raise ValueError("email must be a string or None")
+        if password is not None and not isinstance(password, str):
+            raise ValueError("password must be a string or None")
+        if not isinstance(is_cn, bool):
+            raise ValueError("is_cn must be a boolean")
+        if not isinstance(return_on_mfa, bool):
+            raise ValueError("return_on_mfa must be a boolean")
 
-        self.garmin_graphql_endpoint = "graphql-gateway/graphql"
+        self.username = email
+        self.password = password
+        self.is_cn = is_cn
+        self.prompt_mfa = prompt_mfa
+        self.return_on_mfa = return_on_mfa
+        self.rate_limiter = rate_limiter
+        self.response_cache = response_cache
+        if profile_cache_ttl is not None:
+            profile_cache_ttl = _validate_positive_number(
+                profile_cache_ttl, "profile_cache_ttl"
+            )
+        self.profile_cache_ttl = profile_cache_ttl
+        self._profile_cache_path: Path | None = None
+        if token_refresh_margin is not None:
+            token_refresh_margin = _validate_positive_number(
+                token_refresh_margin, "token_refresh_margin"
+            )
+        self.token_refresh_margin = token_refresh_margin
+        self._tokenstore_path: Path | None = None
+        # Held while refreshing; _refresh_state_lock guards the thread handle
+        self._token_lock = threading.Lock()
+        self._refresh_state_lock = threading.Lock()
+        self._refresh_thread: threading.Thread | None = None
+        self._next_background_refresh = 0.0
 
         self.garth = garth.Client(
             domain="garmin.cn" if is_cn else "garmin.com",
@@ -272,14 +785,79 @@ class Garmin:
             pool_maxsize=20,
         )
 
-        self.display_name = None
+        self.display_name: str | None = None
         self.full_name = None
         self.unit_system = None
 
+    def _rate_limited(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Call fn under the rate limiter, retrying on 429 responses.
+
+        A 401 response drops the cached profile, so the next login() checks
+        the tokens against the API again.
+        """
+        try:
+            self._ensure_fresh_token()
+            return self._call_rate_limited(fn, *args, **kwargs)
+        except (HTTPError, GarthHTTPError) as e:
+            if getattr(_http_response(e), "status_code", None) == 401:
+                self._invalidate_profile_cache()
+            raise
+
+    def _call_rate_limited(
+        self, fn: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Any:
+        limiter = self.rate_limiter
+        if limiter is None:
+            return fn(*args, **kwargs)
+
+        attempt = 0
+        while True:
+            limiter.acquire()
+            try:
+                result = fn(*args, **kwargs)
+            except (HTTPError, GarthHTTPError) as e:
+                response = _http_response(e)
+                if getattr(response, "status_code", None) != 429:
+                    raise
+                limiter.on_rate_limited(
+                    _parse_retry_after(response.headers.get("Retry-After"))
+                )
+                if attempt >= limiter.max_retries:
+                    raise
+                attempt += 1
+                continue
+            limiter.on_success()
+            return result
+
     def connectapi(self, path: str, **kwargs: Any) -> Any:
-        """Wrapper for garth connectapi with error handling."""
+        """Wrapper for garth connectapi with error handling.
+
+        GET requests are answered from response_cache when it has them.
+        """
+        policy = self._cache_policy(path, kwargs)
+        if policy is None:
+            return self._connectapi(path, self.garth.connectapi, path, **kwargs)
+
+        def fetch(headers: dict[str, str]) -> Any:
+            return self._connectapi(
+                path,
+                self.garth.request,
+                "GET",
+                "connectapi",
+                path,
+                api=True,
+                headers=headers,
+                **kwargs,
+            )
+
+        body = self._cached_get(path, *policy, fetch)
+        return json.loads(body) if body else None
+
+    def _connectapi(
+        self, path: str, fn: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Any:
         try:
-            return self.garth.connectapi(path, **kwargs)
+            return self._rate_limited(fn, *args, **kwargs)
         except (HTTPError, GarthHTTPError) as e:
             # For GarthHTTPError, extract status from the wrapped HTTPError
             if isinstance(e, GarthHTTPError):
@@ -292,29 +870,39 @@ class Garmin:
             logger.error(
                 "API call failed for path '%s': %s (status=%s)", path, e, status
             )
-            if status == 401:
-                raise GarminConnectAuthenticationError(
-                    f"Authentication failed: {e}"
-                ) from e
-            elif status == 429:
-                raise GarminConnectTooManyRequestsError(
-                    f"Rate limit exceeded: {e}"
-                ) from e
-            elif status and 400 <= status < 500:
-                # Client errors (400-499) - API endpoint issues, bad parameters, etc.
-                raise GarminConnectConnectionError(
-                    f"API client error ({status}): {e}"
-                ) from e
-            else:
-                raise GarminConnectConnectionError(f"HTTP error: {e}") from e
+            raise _connectapi_error(status, e) from e
         except Exception as e:
             logger.exception("Connection error during connectapi path=%s", path)
             raise GarminConnectConnectionError(f"Connection error: {e}") from e
 
     def download(self, path: str, **kwargs: Any) -> Any:
-        """Wrapper for garth download with error handling."""
+        """Wrapper for garth download with error handling.
+
+        Downloads are answered from response_cache when it has them.
+        """
+        policy = self._cache_policy(path, kwargs)
+        if policy is None:
+            return self._download(path, self.garth.download, path, **kwargs)
+
+        def fetch(headers: dict[str, str]) -> Any:
+            return self._download(
+                path,
+                self.garth.request,
+                "GET",
+                "connectapi",
+                path,
+                api=True,
+                headers=headers,
+                **kwargs,
+            )
+
+        return self._cached_get(path, *policy, fetch)
+
+    def _download(
+        self, path: str, fn: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Any:
         try:
-            return self.garth.download(path, **kwargs)
+            return self._rate_limited(fn, *args, **kwargs)
         except (HTTPError, GarthHTTPError) as e:
             # For GarthHTTPError, extract status from the wrapped HTTPError
             if isinstance(e, GarthHTTPError):
@@ -325,21 +913,127 @@ class Garmin:
                 status = getattr(getattr(e, "response", None), "status_code", None)
 
             logger.exception("Download failed for path '%s' (status=%s)", path, status)
-            if status == 401:
-                raise GarminConnectAuthenticationError(f"Download error: {e}") from e
-            elif status == 429:
-                raise GarminConnectTooManyRequestsError(f"Download error: {e}") from e
-            elif status and 400 <= status < 500:
-                # Client errors (400-499) - API endpoint issues, bad parameters, etc.
-                raise GarminConnectConnectionError(
-                    f"Download client error ({status}): {e}"
-                ) from e
-            else:
-                raise GarminConnectConnectionError(f"Download error: {e}") from e
+            raise _download_error(status, e) from e
         except Exception as e:
             logger.exception("Download failed for path '%s'", path)
             raise GarminConnectConnectionError(f"Download error: {e}") from e
 
+    def _send_call(self, call: _ApiCall) -> Any:
+        """Send a GET built by one of the _*_call methods."""
+        if call.params is None:
+            response = self.connectapi(call.path)
+        else:
+            response = self.connectapi(call.path, params=call.params)
+        return response if call.result is None else call.result(response)
+
+    def _cache_policy(
+        self, path: str, kwargs: dict[str, Any]
+    ) -> tuple[ResponseCache, str, float] | None:
+        """Return the response_cache, key and TTL of a request, if cacheable."""
+        cache = self.response_cache
+        # Only plain GETs: anything with a method, body or headers goes through
+        if cache is None or not set(kwargs) <= {"params"}:
+            return None
+        params = kwargs.get("params")
+        ttl = cache.ttl(path, params)
+        if ttl is None:
+            return None
+        key = cache.key(self.garth.domain, self.display_name, path, params)
+        return cache, key, ttl
+
+    def _cached_get(
+        self,
+        path: str,
+        cache: ResponseCache,
+        key: str,
+        ttl: float,
+        fetch: Callable[[dict[str, str]], Any],
+    ) -> bytes:
+        """Return the body of a GET from cache or fetch(headers).
+
+        An expired entry is revalidated with its ETag and Last-Modified; a
+        304 answer renews it without transferring the body again.
+        """
+        entry = cache.lookup(key)
+        if entry is not None and entry.fresh:
+            logger.debug("Cache hit for path '%s'", path)
+            return entry.body
+
+        response = fetch({} if entry is None else entry.conditional_headers())
+        if response.status_code == 304 and entry is not None:
+            logger.debug("Cached response for path '%s' not modified", path)
+        return cache.update(
+            key, ttl, entry, response.status_code, response.headers, response.content
+        )
+
+    def download_to_file(
+        self, path: str, dest: str | Path, chunk_size: int = DOWNLOAD_CHUNK_SIZE
+    ) -> Path:
+        """Stream a download to dest in chunks instead of into memory.
+
+        The body is written to a temporary file next to dest and renamed
+        over it once complete, so dest never holds a partial download.
+        Raises the same errors as download().
+        """
+        dest = Path(dest)
+        chunk_size = _validate_positive_integer(chunk_size, "chunk_size")
+        tmp = dest.with_name(f"{dest.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            response = self._rate_limited(
+                self.garth.get, "connectapi", path, api=True, stream=True
+            )
+            with response, open(tmp, "wb") as f:
+                for chunk in response.iter_content(chunk_size):
+                    f.write(chunk)
+            os.replace(tmp, dest)
+        except (HTTPError, GarthHTTPError) as e:
+            status = getattr(_http_response(e), "status_code", None)
+            logger.exception("Download failed for path '%s' (status=%s)", path, status)
+            raise _download_error(status, e) from e
+        except Exception as e:
+            logger.exception("Download failed for path '%s'", path)
+            raise GarminConnectConnectionError(f"Download error: {e}") from e
+        finally:
+            tmp.unlink(missing_ok=True)
+        return dest
+
+    def fetch_range(
+        self,
+        method: Callable[[str], Any] | str,
+        start: str | date,
+        end: str | date,
+        concurrency: int = DEFAULT_FETCH_CONCURRENCY,
+    ) -> RangeFetch:
+        """Call a per-day getter for every day from start to end inclusive.
+
+        `method` is a getter taking a 'YYYY-MM-DD' date, e.g.
+        `api.get_sleep_data` or its name, and runs on `concurrency` threads
+        under this client's rate limiter. Iterate the result for
+        (date, result) pairs as they complete; failed days end up in its
+        `failures` instead of stopping the range:
+
+            fetch = api.fetch_range("get_hrv_data", "2024-01-01", "2024-12-31")
+            hrv = dict(fetch)
+            retry = sorted(fetch.failures)
+        """
+
+        fn: Callable[[str], Any]
+        if isinstance(method, str):
+            resolved = getattr(self, method, None)
+            if not callable(resolved):
+                raise ValueError(f"Unknown Garmin method: {method}")
+            fn = resolved
+        else:
+            fn = method
+        start = _as_date(start, "start")
+        end = _as_date(end, "end")
+        if start > end:
+            raise ValueError("start date cannot be after end date")
+        concurrency = _validate_positive_integer(concurrency, "concurrency")
+
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        return RangeFetch(fn, days, concurrency)
+
     def login(self, /, tokenstore: str | None = None) -> tuple[str | None, str | None]:
         """
         Log in using Garth.
@@ -359,6 +1053,14 @@ class Garmin:
                     self.garth.loads(tokenstore)
                 else:
                     self.garth.load(tokenstore)
+                    self._tokenstore_path = Path(tokenstore).expanduser()
+                    if self.profile_cache_ttl is not None:
+                        self._profile_cache_path = (
+                            Path(tokenstore).expanduser() / PROFILE_CACHE_FILE
+                        )
+                        if self._load_profile_cache(self._profile_cache_path):
+                            logger.debug("Using cached profile and settings")
+                            return token1, token2
             else:
                 # Validate credentials before attempting login
                 if not self.username or not self.password:
@@ -418,6 +1120,8 @@ class Garmin:
                 raise GarminConnectAuthenticationError("Invalid user settings found")
 
             self.unit_system = settings["userData"].get("measurementSystem")
+            if self._profile_cache_path is not None:
+                self._save_profile_cache(self._profile_cache_path)
 
             return token1, token2
 
@@ -465,6 +1169,149 @@ class Garmin:
             logger.exception("Login failed")
             raise GarminConnectConnectionError(f"Login failed: {e}") from e
 
+    def _ensure_fresh_token(self) -> None:
+        """Refresh the OAuth2 token ahead of its expiry.
+
+        A token inside the refresh margin is still valid, so it is refreshed
+        in the background while callers go on using it. An expired token
+        blocks callers until the one refresh they share has finished.
+        """
+        margin = self.token_refresh_margin
+        if margin is None:
+            return
+        expires_at = getattr(self.garth.oauth2_token, "expires_at", None)
+        if expires_at is None:
+            return
+        remaining = expires_at - time.time()
+        if remaining > margin:
+            return
+        if remaining > 0:
+            self._start_background_refresh(expires_at)
+        else:
+            self._refresh_tokens(expires_at)
+
+    def _start_background_refresh(self, expires_at: float) -> None:
+        with self._refresh_state_lock:
+            thread = self._refresh_thread
+            if thread is not None and thread.is_alive():
+                return
+            if time.monotonic() < self._next_background_refresh:
+                return
+            self._refresh_thread = threading.Thread(
+                target=self._background_refresh,
+                args=(expires_at,),
+                name="garminconnect-token-refresh",
+                daemon=True,
+            )
+            self._refresh_thread.start()
+
+    def _background_refresh(self, expires_at: float) -> None:
+        try:
+            self._refresh_tokens(expires_at)
+        except Exception as e:
+            # The token is still valid; retry later, or in the foreground
+            # once it has expired
+            logger.warning("Background token refresh failed: %s", e)
+            with self._refresh_state_lock:
+                self._next_background_refresh = (
+                    time.monotonic() + TOKEN_REFRESH_RETRY_SECONDS
+                )
+
+    def _refresh_tokens(self, expires_at: float | None) -> None:
+        """Refresh the OAuth2 token unless another caller already has.
+
+        expires_at is the expiry the caller saw, None if it had no token.
+        """
+        with self._token_lock:
+            current = getattr(self.garth.oauth2_token, "expires_at", None)
+            if current != expires_at:
+                return
+            logger.debug("Refreshing OAuth2 token")
+            self.garth.refresh_oauth2()
+            self._persist_tokens()
+
+    def _persist_tokens(self) -> None:
+        """Write the refreshed OAuth2 token where login() loaded it from."""
+        token = self.garth.oauth2_token
+        if self._tokenstore_path is None or not isinstance(
+            token, garth.auth_tokens.OAuth2Token
+        ):
+            return
+        path = self._tokenstore_path / "oauth2_token.json"
+        # Same format as garth.Client.dump, but written then renamed so a
+        # concurrent load never sees a partial file
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(asdict(token), f, indent=4)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning("Could not save refreshed token to %s: %s", path, e)
+
+    def _token_fingerprint(self) -> str | None:
+        # Ties the cache to the tokens it was written with, so re-login or
+        # another account's tokens never pick up a stale profile
+        token = getattr(self.garth.oauth1_token, "oauth_token", None)
+        if not token:
+            return None
+        return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+    def _load_profile_cache(self, path: Path) -> bool:
+        """Restore the profile fields from a fresh cache entry at path."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return False
+        fingerprint = self._token_fingerprint()
+        if (
+            not isinstance(cache, dict)
+            or cache.get("version") != PROFILE_CACHE_VERSION
+            or fingerprint is None
+            or cache.get("token") != fingerprint
+            or not cache.get("display_name")
+        ):
+            return False
+        age = time.time() - cache.get("cached_at", 0)
+        if not 0 <= age < self.profile_cache_ttl:
+            return False
+        self.display_name = cache["display_name"]
+        self.full_name = cache.get("full_name")
+        self.unit_system = cache.get("unit_system")
+        return True
+
+    def _save_profile_cache(self, path: Path) -> None:
+        fingerprint = self._token_fingerprint()
+        if fingerprint is None:
+            return
+        cache = {
+            "version": PROFILE_CACHE_VERSION,
+            "token": fingerprint,
+            "cached_at": time.time(),
+            "display_name": self.display_name,
+            "full_name": self.full_name,
+            "unit_system": self.unit_system,
+        }
+        # Write then rename so concurrent runs never read a partial file
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(cache, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.debug("Could not write profile cache %s: %s", path, e)
+
+    def _invalidate_profile_cache(self) -> None:
+        if self._profile_cache_path is None:
+            return
+        try:
+            self._profile_cache_path.unlink()
+            logger.debug("Dropped profile cache %s", self._profile_cache_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.debug("Could not drop profile cache: %s", e)
+
     def resume_login(
         self, client_state: dict[str, Any], mfa_code: str
     ) -> tuple[Any, Any]:
@@ -502,40 +1349,34 @@ class Garmin:
     def get_user_summary(self, cdate: str) -> dict[str, Any]:
         """Return user activity summary for 'cdate' format 'YYYY-MM-DD'."""
 
+        call = self._user_summary_call(cdate)
+        logger.debug("Requesting user summary")
+
+        return self._send_call(call)
+
+    def _user_summary_call(self, cdate: str) -> _ApiCall:
         # Validate input
         cdate = _validate_date_format(cdate, "cdate")
 
         url = f"{self.garmin_connect_daily_summary_url}/{self.display_name}"
         params = {"calendarDate": cdate}
-        logger.debug("Requesting user summary")
-
-        response = self.connectapi(url, params=params)
-
-        if not response:
-            raise GarminConnectConnectionError("No data received from server")
-
-        if response.get("privacyProtected") is True:
-            raise GarminConnectAuthenticationError("Authentication error")
-
-        return response
+        return _ApiCall(url, params, result=_user_summary_result)
 
     def get_steps_data(self, cdate: str) -> list[dict[str, Any]]:
         """Fetch available steps data 'cDate' format 'YYYY-MM-DD'."""
 
+        call = self._steps_data_call(cdate)
+        logger.debug("Requesting steps data")
+
+        return self._send_call(call)
+
+    def _steps_data_call(self, cdate: str) -> _ApiCall:
         # Validate input
         cdate = _validate_date_format(cdate, "cdate")
 
         url = f"{self.garmin_connect_user_summary_chart}/{self.display_name}"
         params = {"date": cdate}
-        logger.debug("Requesting steps data")
-
-        response = self.connectapi(url, params=params)
-
-        if response is None:
-            logger.warning("No steps data received")
-            return []
-
-        return response
+        return _ApiCall(url, params, result=_steps_result)
 
     def get_floors(self, cdate: str) -> dict[str, Any]:
         """Fetch available floors data 'cDate' format 'YYYY-MM-DD'."""
@@ -587,19 +1428,18 @@ class Garmin:
             GarminConnectAuthenticationError: If authentication fails
         """
 
+        call = self._heart_rates_call(cdate)
+        logger.debug("Requesting heart rates")
+
+        return self._send_call(call)
+
+    def _heart_rates_call(self, cdate: str) -> _ApiCall:
         # Validate input
         cdate = _validate_date_format(cdate, "cdate")
 
         url = f"{self.garmin_connect_heartrates_daily_url}/{self.display_name}"
         params = {"date": cdate}
-        logger.debug("Requesting heart rates")
-
-        response = self.connectapi(url, params=params)
-
-        if response is None:
-            raise GarminConnectConnectionError("No heart rate data received")
-
-        return response
+        return _ApiCall(url, params, result=_heart_rates_result)
 
     def get_stats_and_body(self, cdate: str) -> dict[str, Any]:
         """Return activity data and body composition (compat for garminconnect)."""
@@ -650,15 +1490,9 @@ class Garmin:
         visceral_fat_rating: float | None = None,
         bmi: float | None = None,
     ) -> dict[str, Any]:
-        weight = _validate_positive_number(weight, "weight")
-        dt = datetime.fromisoformat(timestamp) if timestamp else datetime.now()
-        fitEncoder = FitEncoderWeight()
-        fitEncoder.write_file_info()
-        fitEncoder.write_file_creator()
-        fitEncoder.write_device_info(dt)
-        fitEncoder.write_weight_scale(
-            dt,
-            weight=weight,
+        data = _body_composition_file(
+            timestamp,
+            weight,
             percent_fat=percent_fat,
             percent_hydration=percent_hydration,
             visceral_fat_mass=visceral_fat_mass,
@@ -671,19 +1505,160 @@ class Garmin:
             visceral_fat_rating=visceral_fat_rating,
             bmi=bmi,
         )
-        fitEncoder.finish()
 
+        url = self.garmin_connect_upload
+        files = {
+            "file": ("body_composition.fit", data),
+        }
+        return self._rate_limited(
+            self.garth.post, "connectapi", url, files=files, api=True
+        ).json()
+
+    def add_body_compositions(
+        self,
+        measurements: Iterable[dict[str, Any]],
+        max_records_per_file: int = MAX_FIT_WEIGHT_RECORDS,
+    ) -> list[dict[str, Any]]:
+        """
+        Upload many body composition measurements packed into FIT files.
+
+        Each measurement is a dict of `add_body_composition` keyword arguments
+        ('timestamp' may also be a datetime or epoch seconds). Measurements
+        are written into one FIT file per `max_records_per_file` records, so N
+        measurements cost ceil(N / max_records_per_file) uploads. Returns one
+        upload response per file. Requires numpy; data already held in arrays
+        can go to `add_body_composition_columns` directly.
+        """
+
+        max_records_per_file = _validate_positive_integer(
+            max_records_per_file, "max_records_per_file"
+        )
+
+        responses = []
+        measurements = iter(measurements)
+        while chunk := [dict(m) for m in islice(measurements, max_records_per_file)]:
+            for measurement in chunk:
+                measurement["timestamp"] = _epoch_seconds(measurement.get("timestamp"))
+                weight = measurement.get("weight")
+                if weight is None:
+                    raise ValueError("weight is required")
+                measurement["weight"] = _validate_positive_number(weight, "weight")
+            # One column per field; fields a measurement lacks are invalid
+            names = {name for measurement in chunk for name in measurement}
+            columns = {name: [m.get(name) for m in chunk] for name in names}
+            responses.append(self._upload_body_composition_fit(columns))
+        return responses
+
+    def add_body_composition_columns(
+        self,
+        timestamp: Any,
+        weight: Any,
+        max_records_per_file: int = MAX_FIT_WEIGHT_RECORDS,
+        **columns: Any,
+    ) -> list[dict[str, Any]]:
+        """
+        Upload body composition measurements given as columns.
+
+        `timestamp` holds epoch seconds or numpy datetime64 values (UTC).
+        `weight` and the other `add_body_composition` fields, passed by name,
+        are equal-length sequences or numpy arrays with None/NaN for missing
+        values. They are packed by `FitEncoderWeight.write_weight_scale_batch`
+        into one FIT file per `max_records_per_file` records. Returns one
+        upload response per file. Requires numpy.
+        """
+        import numpy as np
+
+        max_records_per_file = _validate_positive_integer(
+            max_records_per_file, "max_records_per_file"
+        )
+        seconds = np.asarray(timestamp)
+        if seconds.dtype.kind == "M":
+            seconds = seconds.astype("datetime64[ms]").astype(np.int64) / 1000
+        seconds = seconds.astype(np.float64)
+        weights = np.asarray(weight, dtype=np.float64)
+        if weights.shape != seconds.shape or seconds.ndim != 1:
+            raise ValueError("timestamp and weight must be one value per record")
+        if not np.all(weights > 0):
+            raise ValueError("weight must be positive")
+        arrays = {
+            name: None if values is None else np.asarray(values)
+            for name, values in columns.items()
+        }
+
+        responses = []
+        for start in range(0, len(seconds), max_records_per_file):
+            part = slice(start, start + max_records_per_file)
+            file_columns = {
+                name: None if values is None else values[part]
+                for name, values in arrays.items()
+            }
+            file_columns["timestamp"] = seconds[part]
+            file_columns["weight"] = weights[part]
+            responses.append(self._upload_body_composition_fit(file_columns))
+        return responses
+
+    def _upload_body_composition_fit(self, columns: dict[str, Any]) -> dict[str, Any]:
+        fitEncoder = FitEncoderWeight(incremental_crc=True)
+        fitEncoder.write_file_info()
+        fitEncoder.write_file_creator()
+        fitEncoder.write_device_info(float(columns["timestamp"][0]))
+        fitEncoder.write_weight_scale_batch(**columns)
+        fitEncoder.finish()
         url = self.garmin_connect_upload
         files = {
             "file": ("body_composition.fit", fitEncoder.getvalue()),
         }
-        return self.garth.post("connectapi", url, files=files, api=True).json()
+        logger.debug("Uploading body composition FIT file")
+        return self._rate_limited(
+            self.garth.post, "connectapi", url, files=files, api=True
+        ).json()
+
+    def upload_fit_stream(
+        self,
+        fileobj: BinaryIO,
+        filename: str = "upload.fit",
+        chunk_size: int = UPLOAD_CHUNK_SIZE,
+    ) -> dict[str, Any]:
+        """
+        Upload a FIT file read incrementally from a binary file object.
+
+        The multipart body is sent with chunked transfer encoding, reading
+        `chunk_size` bytes at a time, so memory use does not depend on the
+        file size. Pair it with a streaming FitEncoder writing to a temporary
+        file.
+        """
+
+        chunk_size = _validate_positive_integer(chunk_size, "chunk_size")
+        boundary = uuid.uuid4().hex
+        headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+        url = self.garmin_connect_upload
+        logger.debug("Streaming FIT upload %s", filename)
+
+        def post() -> Any:
+            # A fresh body generator per attempt, rewound for rate-limit retries
+            if fileobj.seekable():
+                fileobj.seek(start)
+            body = _multipart_file_body(fileobj, "file", filename, boundary, chunk_size)
+            return self.garth.post(
+                "connectapi", url, data=body, headers=headers, api=True
+            )
+
+        start = fileobj.tell() if fileobj.seekable() else 0
+        return self._rate_limited(post).json()
 
     def add_weigh_in(
         self, weight: int | float, unitKey: str = "kg", timestamp: str = ""
     ) -> dict[str, Any]:
         """Add a weigh-in (default to kg)"""
 
+        call = self._add_weigh_in_call(weight, unitKey, timestamp)
+        logger.debug("Adding weigh-in")
+
+        return self._post_weigh_in(call)
+
+    def _add_weigh_in_call(
+        self, weight: int | float, unitKey: str, timestamp: str
+    ) -> _ApiCall:
         # Validate inputs
         weight = _validate_positive_number(weight, "weight")
 
@@ -699,25 +1674,55 @@ class Garmin:
 
         # Apply timezone offset to get UTC/GMT time
         dtGMT = dt.astimezone(timezone.utc)
-        payload = {
-            "dateTimestamp": _fmt_ts(dt),
-            "gmtTimestamp": _fmt_ts(dtGMT),
-            "unitKey": unitKey,
-            "sourceType": "MANUAL",
-            "value": weight,
-        }
-        logger.debug("Adding weigh-in")
+        payload = _weigh_in_payload(weight, unitKey, _fmt_ts(dt), _fmt_ts(dtGMT))
+        return _ApiCall(url, method="POST", json=payload, result=_weigh_in_result)
 
-        response = self.garth.post("connectapi", url, json=payload)
+    def _post_weigh_in(self, call: _ApiCall) -> dict[str, Any]:
+        response = self._rate_limited(
+            self.garth.post, "connectapi", call.path, json=call.json
+        )
         try:
             return response.json()
         except ValueError:
             # Garmin API sometimes returns empty responses on success
             # If we can't parse JSON but got a successful status code, treat as success
             if response.status_code in (200, 201, 204):
-                return {"success": True, "message": "Weight added successfully"}
+                return _weigh_in_result(None)
             raise
 
+    def add_weigh_in_epoch_ms(
+        self,
+        weight: int | float,
+        local_ms: int,
+        gmt_ms: int,
+        unitKey: str = "kg",
+    ) -> dict[str, Any]:
+        """
+        Add a weigh-in from precomputed epoch milliseconds (default to kg).
+
+        `local_ms` is the local wall-clock time counted as if it were UTC and
+        `gmt_ms` the actual UTC instant, e.g. as computed for a whole batch
+        with pandas. Nothing is parsed or converted per call.
+        """
+
+        call = self._add_weigh_in_epoch_ms_call(weight, local_ms, gmt_ms, unitKey)
+        logger.debug("Adding weigh-in")
+
+        return self._post_weigh_in(call)
+
+    def _add_weigh_in_epoch_ms_call(
+        self, weight: int | float, local_ms: int, gmt_ms: int, unitKey: str
+    ) -> _ApiCall:
+        weight = _validate_positive_number(weight, "weight")
+        if unitKey not in VALID_WEIGHT_UNITS:
+            raise ValueError(f"unitKey must be one of {VALID_WEIGHT_UNITS}")
+
+        url = f"{self.garmin_connect_weight_url}/user-weight"
+        payload = _weigh_in_payload(
+            weight, unitKey, _fmt_epoch_ms(local_ms), _fmt_epoch_ms(gmt_ms)
+        )
+        return _ApiCall(url, method="POST", json=payload, result=_weigh_in_result)
+
     def add_weigh_in_with_timestamps(
         self,
         weight: int | float,
@@ -761,28 +1766,36 @@ class Garmin:
         logger.debug("Adding weigh-in with explicit timestamps: %s", payload)
 
         # Make the POST request
-        return self.garth.post("connectapi", url, json=payload).json()
+        return self._rate_limited(
+            self.garth.post, "connectapi", url, json=payload
+        ).json()
 
     def get_weigh_ins(self, startdate: str, enddate: str) -> dict[str, Any]:
         """Get weigh-ins between startdate and enddate using format 'YYYY-MM-DD'."""
 
+        call = self._weigh_ins_call(startdate, enddate)
+        logger.debug("Requesting weigh-ins")
+
+        return self._send_call(call)
+
+    def _weigh_ins_call(self, startdate: str, enddate: str) -> _ApiCall:
         startdate = _validate_date_format(startdate, "startdate")
         enddate = _validate_date_format(enddate, "enddate")
         url = f"{self.garmin_connect_weight_url}/weight/range/{startdate}/{enddate}"
-        params = {"includeAll": True}
-        logger.debug("Requesting weigh-ins")
-
-        return self.connectapi(url, params=params)
+        return _ApiCall(url, {"includeAll": True})
 
     def get_daily_weigh_ins(self, cdate: str) -> dict[str, Any]:
         """Get weigh-ins for 'cdate' format 'YYYY-MM-DD'."""
 
-        cdate = _validate_date_format(cdate, "cdate")
-        url = f"{self.garmin_connect_weight_url}/weight/dayview/{cdate}"
-        params = {"includeAll": True}
+        call = self._daily_weigh_ins_call(cdate)
         logger.debug("Requesting weigh-ins")
 
-        return self.connectapi(url, params=params)
+        return self._send_call(call)
+
+    def _daily_weigh_ins_call(self, cdate: str) -> _ApiCall:
+        cdate = _validate_date_format(cdate, "cdate")
+        url = f"{self.garmin_connect_weight_url}/weight/dayview/{cdate}"
+        return _ApiCall(url, {"includeAll": True})
 
     def delete_weigh_in(self, weight_pk: str, cdate: str) -> Any:
         """Delete specific weigh-in."""
@@ -790,7 +1803,8 @@ class Garmin:
         url = f"{self.garmin_connect_weight_url}/weight/{cdate}/byversion/{weight_pk}"
         logger.debug("Deleting weigh-in")
 
-        return self.garth.request(
+        return self._rate_limited(
+            self.garth.request,
             "DELETE",
             "connectapi",
             url,
@@ -829,6 +1843,12 @@ class Garmin:
         'YYYY-MM-DD' through enddate 'YYYY-MM-DD'
         """
 
+        call = self._body_battery_call(startdate, enddate)
+        logger.debug("Requesting body battery data")
+
+        return self._send_call(call)
+
+    def _body_battery_call(self, startdate: str, enddate: str | None) -> _ApiCall:
         startdate = _validate_date_format(startdate, "startdate")
         if enddate is None:
             enddate = startdate
@@ -836,9 +1856,7 @@ class Garmin:
             enddate = _validate_date_format(enddate, "enddate")
         url = self.garmin_connect_daily_body_battery_url
         params = {"startDate": str(startdate), "endDate": str(enddate)}
-        logger.debug("Requesting body battery data")
-
-        return self.connectapi(url, params=params)
+        return _ApiCall(url, params)
 
     def get_body_battery_events(self, cdate: str) -> list[dict[str, Any]]:
         """
@@ -887,7 +1905,9 @@ class Garmin:
                 raise ValueError(f"{name} must be an int in [{lo}, {hi}]")
         logger.debug("Adding blood pressure")
 
-        return self.garth.post("connectapi", url, json=payload).json()
+        return self._rate_limited(
+            self.garth.post, "connectapi", url, json=payload
+        ).json()
 
     def get_blood_pressure(
         self, startdate: str, enddate: str | None = None
@@ -913,7 +1933,8 @@ class Garmin:
         url = f"{self.garmin_connect_set_blood_pressure_endpoint}/{cdate}/{version}"
         logger.debug("Deleting blood pressure measurement")
 
-        return self.garth.request(
+        return self._rate_limited(
+            self.garth.request,
             "DELETE",
             "connectapi",
             url,
@@ -1107,7 +2128,9 @@ class Garmin:
         }
 
         logger.debug("Adding hydration data")
-        return self.garth.put("connectapi", url, json=payload).json()
+        return self._rate_limited(
+            self.garth.put, "connectapi", url, json=payload
+        ).json()
 
     def get_hydration_data(self, cdate: str) -> dict[str, Any]:
         """Return available hydration data 'cdate' format 'YYYY-MM-DD'."""
@@ -1121,20 +2144,26 @@ class Garmin:
     def get_respiration_data(self, cdate: str) -> dict[str, Any]:
         """Return available respiration data 'cdate' format 'YYYY-MM-DD'."""
 
-        cdate = _validate_date_format(cdate, "cdate")
-        url = f"{self.garmin_connect_daily_respiration_url}/{cdate}"
+        call = self._respiration_data_call(cdate)
         logger.debug("Requesting respiration data")
 
-        return self.connectapi(url)
+        return self._send_call(call)
+
+    def _respiration_data_call(self, cdate: str) -> _ApiCall:
+        cdate = _validate_date_format(cdate, "cdate")
+        return _ApiCall(f"{self.garmin_connect_daily_respiration_url}/{cdate}")
 
     def get_spo2_data(self, cdate: str) -> dict[str, Any]:
         """Return available SpO2 data 'cdate' format 'YYYY-MM-DD'."""
 
-        cdate = _validate_date_format(cdate, "cdate")
-        url = f"{self.garmin_connect_daily_spo2_url}/{cdate}"
+        call = self._spo2_data_call(cdate)
         logger.debug("Requesting SpO2 data")
 
-        return self.connectapi(url)
+        return self._send_call(call)
+
+    def _spo2_data_call(self, cdate: str) -> _ApiCall:
+        cdate = _validate_date_format(cdate, "cdate")
+        return _ApiCall(f"{self.garmin_connect_daily_spo2_url}/{cdate}")
 
     def get_intensity_minutes_data(self, cdate: str) -> dict[str, Any]:
         """Return available Intensity Minutes data 'cdate' format 'YYYY-MM-DD'."""
@@ -1148,11 +2177,14 @@ class Garmin:
     def get_all_day_stress(self, cdate: str) -> dict[str, Any]:
         """Return available all day stress data 'cdate' format 'YYYY-MM-DD'."""
 
-        cdate = _validate_date_format(cdate, "cdate")
-        url = f"{self.garmin_connect_daily_stress_url}/{cdate}"
+        call = self._all_day_stress_call(cdate)
         logger.debug("Requesting all day stress data")
 
-        return self.connectapi(url)
+        return self._send_call(call)
+
+    def _all_day_stress_call(self, cdate: str) -> _ApiCall:
+        cdate = _validate_date_format(cdate, "cdate")
+        return _ApiCall(f"{self.garmin_connect_daily_stress_url}/{cdate}")
 
     def get_all_day_events(self, cdate: str) -> dict[str, Any]:
         """
@@ -1284,12 +2316,16 @@ class Garmin:
     def get_sleep_data(self, cdate: str) -> dict[str, Any]:
         """Return sleep data for current user."""
 
+        call = self._sleep_data_call(cdate)
+        logger.debug("Requesting sleep data")
+
+        return self._send_call(call)
+
+    def _sleep_data_call(self, cdate: str) -> _ApiCall:
         cdate = _validate_date_format(cdate, "cdate")
         url = f"{self.garmin_connect_daily_sleep_url}/{self.display_name}"
         params = {"date": cdate, "nonSleepBufferMinutes": 60}
-        logger.debug("Requesting sleep data")
-
-        return self.connectapi(url, params=params)
+        return _ApiCall(url, params)
 
     def get_stress_data(self, cdate: str) -> dict[str, Any]:
         """Return stress data for current user."""
@@ -1317,11 +2353,14 @@ class Garmin:
     def get_hrv_data(self, cdate: str) -> dict[str, Any] | None:
         """Return Heart Rate Variability (hrv) data for current user."""
 
-        cdate = _validate_date_format(cdate, "cdate")
-        url = f"{self.garmin_connect_hrv_url}/{cdate}"
+        call = self._hrv_data_call(cdate)
         logger.debug("Requesting Heart Rate Variability (hrv) data")
 
-        return self.connectapi(url)
+        return self._send_call(call)
+
+    def _hrv_data_call(self, cdate: str) -> _ApiCall:
+        cdate = _validate_date_format(cdate, "cdate")
+        return _ApiCall(f"{self.garmin_connect_hrv_url}/{cdate}")
 
     def get_training_readiness(self, cdate: str) -> dict[str, Any]:
         """Return training readiness data for current user."""
@@ -1540,6 +2579,14 @@ class Garmin:
         :return: List of activities from Garmin
         """
 
+        call = self._activities_call(start, limit, activitytype)
+        logger.debug("Requesting activities from %d with limit %d", start, limit)
+
+        return self._send_call(call)
+
+    def _activities_call(
+        self, start: int, limit: int, activitytype: str | None
+    ) -> _ApiCall:
         # Validate inputs
         start = _validate_non_negative_integer(start, "start")
         limit = _validate_positive_integer(limit, "limit")
@@ -1552,15 +2599,7 @@ class Garmin:
         if activitytype:
             params["activityType"] = str(activitytype)
 
-        logger.debug("Requesting activities from %d with limit %d", start, limit)
-
-        activities = self.connectapi(url, params=params)
-
-        if activities is None:
-            logger.warning("No activities data received")
-            return []
-
-        return activities
+        return _ApiCall(url, params, result=_activities_result)
 
     def get_activities_fordate(self, fordate: str) -> dict[str, Any]:
         """Return available activities for date."""
@@ -1577,7 +2616,9 @@ class Garmin:
         url = f"{self.garmin_connect_activity}/{activity_id}"
         payload = {"activityId": activity_id, "activityName": title}
 
-        return self.garth.put("connectapi", url, json=payload, api=True)
+        return self._rate_limited(
+            self.garth.put, "connectapi", url, json=payload, api=True
+        )
 
     def set_activity_type(
         self,
@@ -1596,12 +2637,16 @@ class Garmin:
             },
         }
         logger.debug("Changing activity type: %s", payload)
-        return self.garth.put("connectapi", url, json=payload, api=True)
+        return self._rate_limited(
+            self.garth.put, "connectapi", url, json=payload, api=True
+        )
 
     def create_manual_activity_from_json(self, payload: dict[str, Any]) -> Any:
         url = f"{self.garmin_connect_activity}"
         logger.debug("Uploading manual activity: %s", str(payload))
-        return self.garth.post("connectapi", url, json=payload, api=True)
+        return self._rate_limited(
+            self.garth.post, "connectapi", url, json=payload, api=True
+        )
 
     def create_manual_activity(
         self,
@@ -1657,55 +2702,23 @@ class Garmin:
         """Upload activity in fit format from file."""
         # This code is borrowed from python-garminconnect-enhanced ;-)
 
-        # Validate input
-        if not activity_path:
-            raise ValueError("activity_path cannot be empty")
-
-        if not isinstance(activity_path, str):
-            raise ValueError("activity_path must be a string")
-
-        # Check if file exists
-        p = Path(activity_path)
-        if not p.exists():
-            raise FileNotFoundError(f"File not found: {activity_path}")
-
-        # Check if it's actually a file
-        if not p.is_file():
-            raise ValueError(f"path is not a file: {activity_path}")
-
-        file_base_name = p.name
-
-        if not file_base_name:
-            raise ValueError("invalid file path - no filename found")
-
-        # More robust extension checking
-        file_parts = file_base_name.split(".")
-        if len(file_parts) < 2:
-            raise GarminConnectInvalidFileFormatError(
-                f"File has no extension: {activity_path}"
-            )
-
-        file_extension = file_parts[-1]
-        allowed_file_extension = (
-            file_extension.upper() in Garmin.ActivityUploadFormat.__members__
-        )
-
-        if allowed_file_extension:
-            try:
-                # Use context manager for file handling
-                with p.open("rb") as file_handle:
-                    files = {"file": (file_base_name, file_handle)}
-                    url = self.garmin_connect_upload
+        p = _activity_upload_path(activity_path)
+        try:
+            # Use context manager for file handling
+            with p.open("rb") as file_handle:
+                files = {"file": (p.name, file_handle)}
+                url = self.garmin_connect_upload
+
+                def post() -> Any:
+                    # Rewind the file for rate-limit retries
+                    file_handle.seek(0)
                     return self.garth.post("connectapi", url, files=files, api=True)
-            except OSError as e:
-                raise GarminConnectConnectionError(
-                    f"Failed to read file {activity_path}: {e}"
-                ) from e
-        else:
-            allowed_formats = ", ".join(Garmin.ActivityUploadFormat.__members__.keys())
-            raise GarminConnectInvalidFileFormatError(
-                f"Invalid file format '{file_extension}'. Allowed formats: {allowed_formats}"
-            )
+
+                return self._rate_limited(post)
+        except OSError as e:
+            raise GarminConnectConnectionError(
+                f"Failed to read file {activity_path}: {e}"
+            ) from e
 
     def delete_activity(self, activity_id: str) -> Any:
         """Delete activity with specified id"""
@@ -1713,7 +2726,8 @@ class Garmin:
         url = f"{self.garmin_connect_delete_activity_url}/{activity_id}"
         logger.debug("Deleting activity with id %s", activity_id)
 
-        return self.garth.request(
+        return self._rate_limited(
+            self.garth.request,
             "DELETE",
             "connectapi",
             url,
@@ -1726,6 +2740,8 @@ class Garmin:
         enddate: str | None = None,
         activitytype: str | None = None,
         sortorder: str | None = None,
+        page_size: int = ACTIVITY_PAGE_SIZE,
+        prefetch: int = ACTIVITY_PAGE_PREFETCH,
     ) -> list[dict[str, Any]]:
         """
         Fetch available activities between specific dates
@@ -1736,24 +2752,52 @@ class Garmin:
                              multi_sport, fitness_equipment, hiking, walking, other]
         :param sortorder: (Optional) sorting direction. By default, Garmin uses descending order by startLocal field.
                           Use "asc" to get activities from oldest to newest.
+        :param page_size: (Optional) activities per request, up to MAX_ACTIVITY_LIMIT
+        :param prefetch: (Optional) pages requested ahead, see iter_activities_by_date
         :return: list of JSON activities
         """
 
-        activities = []
-        start = 0
-        limit = 20
-        # mimicking the behavior of the web interface that fetches
-        # 20 activities at a time
-        # and automatically loads more on scroll
+        return list(
+            self.iter_activities_by_date(
+                startdate, enddate, activitytype, sortorder, page_size, prefetch
+            )
+        )
+
+    def iter_activities_by_date(
+        self,
+        startdate: str,
+        enddate: str | None = None,
+        activitytype: str | None = None,
+        sortorder: str | None = None,
+        page_size: int = ACTIVITY_PAGE_SIZE,
+        prefetch: int = ACTIVITY_PAGE_PREFETCH,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Yield the activities of get_activities_by_date as pages arrive.
+
+        The first page is requested alone. After each full page the next
+        `prefetch` pages are requested on worker threads, under the rate
+        limiter, while that page is consumed. Should the first page be shorter
+        than `page_size`, it may be the whole listing or the server may cap
+        pages below `page_size`, so the page right after it is requested to
+        find out, and later pages follow at the size the server returns. A
+        page shorter than one the server has already returned, or an empty
+        one, is the last. A listing that fits in one page therefore costs two
+        requests. A longer one may spend up to `prefetch` requests on pages
+        past its end, which are cancelled if not yet sent, as they are when
+        the generator is closed.
+        """
+
         url = self.garmin_connect_activities
         startdate = _validate_date_format(startdate, "startdate")
         if enddate is not None:
             enddate = _validate_date_format(enddate, "enddate")
-        params = {
-            "startDate": startdate,
-            "start": str(start),
-            "limit": str(limit),
-        }
+        page_size = _validate_positive_integer(page_size, "page_size")
+        if page_size > MAX_ACTIVITY_LIMIT:
+            raise ValueError(f"page_size cannot exceed {MAX_ACTIVITY_LIMIT}")
+        prefetch = _validate_non_negative_integer(prefetch, "prefetch")
+
+        params = {"startDate": startdate, "limit": str(page_size)}
         if enddate:
             params["endDate"] = enddate
         if activitytype:
@@ -1761,18 +2805,50 @@ class Garmin:
         if sortorder:
             params["sortOrder"] = str(sortorder)
 
-        logger.debug("Requesting activities by date from %s to %s", startdate, enddate)
-        while True:
-            params["start"] = str(start)
-            logger.debug("Requesting activities %d to %d", start, start + limit)
-            act = self.connectapi(url, params=params)
-            if act:
-                activities.extend(act)
-                start = start + limit
-            else:
-                break
+        def fetch_page(start: int) -> list[dict[str, Any]]:
+            logger.debug("Requesting activities %d to %d", start, start + page_size)
+            return self.connectapi(url, params={**params, "start": str(start)}) or []
 
-        return activities
+        logger.debug("Requesting activities by date from %s to %s", startdate, enddate)
+        with ThreadPoolExecutor(max_workers=prefetch + 1) as executor:
+            pending: deque[tuple[int, Future]] = deque()
+            stride = page_size  # offset between requested pages
+            longest = 0  # most activities the server has returned in a page
+            next_start = 0
+
+            def request_next() -> None:
+                nonlocal next_start
+                pending.append((next_start, executor.submit(fetch_page, next_start)))
+                next_start += stride
+
+            request_next()
+            try:
+                while True:
+                    start, future = pending.popleft()
+                    page = future.result()
+                    last = False
+                    if len(page) >= stride:
+                        # More pages may follow; keep the next ones in flight
+                        while len(pending) <= prefetch:
+                            request_next()
+                    elif page and len(page) >= longest:
+                        # The last page, or the server caps pages at this
+                        # size; continue right after it to find out
+                        for _, future in pending:
+                            future.cancel()
+                        pending.clear()
+                        stride = len(page)
+                        next_start = start + stride
+                        request_next()
+                    else:
+                        last = True
+                    longest = max(longest, len(page))
+                    yield from page
+                    if last:
+                        break
+            finally:
+                for _, future in pending:
+                    future.cancel()
 
     def get_progress_summary_between_dates(
         self,
@@ -1884,7 +2960,9 @@ class Garmin:
             f"{self.garmin_connect_gear_baseurl}{gearUUID}/"
             f"activityType/{activityType}{defaultGearString}"
         )
-        return self.garth.request(method_override, "connectapi", url, api=True)
+        return self._rate_limited(
+            self.garth.request, method_override, "connectapi", url, api=True
+        )
 
     class ActivityDownloadFormat(Enum):
         """Activity variables."""
@@ -1895,6 +2973,15 @@ class Garmin:
         KML = auto()
         CSV = auto()
 
+    # File name extension of each download format; ORIGINAL is a zip archive
+    activity_file_extensions = {
+        ActivityDownloadFormat.ORIGINAL: "zip",
+        ActivityDownloadFormat.TCX: "tcx",
+        ActivityDownloadFormat.GPX: "gpx",
+        ActivityDownloadFormat.KML: "kml",
+        ActivityDownloadFormat.CSV: "csv",
+    }
+
     class ActivityUploadFormat(Enum):
         FIT = auto()
         GPX = auto()
@@ -1910,6 +2997,57 @@ class Garmin:
         "Original" will return the zip file content, up to user to extract it.
         "CSV" will return a csv of the splits.
         """
+        url = self._activity_download_url(activity_id, dl_fmt)
+        logger.debug("Downloading activity from %s", url)
+
+        return self.download(url)
+
+    @classmethod
+    def activity_file_name(
+        cls, activity_id: int | str, dl_fmt: ActivityDownloadFormat
+    ) -> str:
+        """Return the file name download_activities uses, e.g. 42_ACTIVITY.zip."""
+        return f"{activity_id}_ACTIVITY.{cls.activity_file_extensions[dl_fmt]}"
+
+    def download_activities(
+        self,
+        activities: Iterable[int | str | dict[str, Any]],
+        directory: str | Path,
+        formats: Iterable[ActivityDownloadFormat] = (ActivityDownloadFormat.ORIGINAL,),
+        concurrency: int = DEFAULT_DOWNLOAD_CONCURRENCY,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+    ) -> ActivityDownloads:
+        """
+        Download activities to directory in each of the given formats.
+
+        `activities` are activity IDs or the dicts of get_activities and
+        iter_activities_by_date; an iterator is consumed lazily, so listing
+        and downloading overlap. Files are named by activity_file_name and
+        ones already present are skipped, so an interrupted archive can be
+        resumed by running it again. Up to `concurrency` downloads stream to
+        disk at once, each written atomically by download_to_file. Iterate
+        the result to run the downloads:
+
+            run = api.download_activities(api.iter_activities_by_date(start), "export")
+            for activity_id, dl_fmt, path in run:
+                print(path)
+            print(f"{len(run.failures)} downloads failed")
+        """
+
+        formats = list(formats)
+        for dl_fmt in formats:
+            if dl_fmt not in self.activity_file_extensions:
+                raise ValueError(f"unexpected value {dl_fmt} for dl_fmt")
+        concurrency = _validate_positive_integer(concurrency, "concurrency")
+        chunk_size = _validate_positive_integer(chunk_size, "chunk_size")
+
+        return ActivityDownloads(
+            self, activities, Path(directory), formats, concurrency, chunk_size
+        )
+
+    def _activity_download_url(
+        self, activity_id: str, dl_fmt: ActivityDownloadFormat
+    ) -> str:
         activity_id = str(activity_id)
         urls = {
             Garmin.ActivityDownloadFormat.ORIGINAL: f"{self.garmin_connect_fit_download}/{activity_id}",  # noqa
@@ -1920,11 +3058,7 @@ class Garmin:
         }
         if dl_fmt not in urls:
             raise ValueError(f"unexpected value {dl_fmt} for dl_fmt")
-        url = urls[dl_fmt]
-
-        logger.debug("Downloading activity from %s", url)
-
-        return self.download(url)
+        return urls[dl_fmt]
 
     def get_activity_splits(self, activity_id: str) -> dict[str, Any]:
         """Return activity splits."""
@@ -1975,11 +3109,13 @@ class Garmin:
     def get_activity(self, activity_id: str) -> dict[str, Any]:
         """Return activity summary, including basic splits."""
 
-        activity_id = str(activity_id)
-        url = f"{self.garmin_connect_activity}/{activity_id}"
+        call = self._activity_call(activity_id)
         logger.debug("Requesting activity summary data for activity id %s", activity_id)
 
-        return self.connectapi(url)
+        return self._send_call(call)
+
+    def _activity_call(self, activity_id: str) -> _ApiCall:
+        return _ApiCall(f"{self.garmin_connect_activity}/{activity_id}")
 
     def get_activity_details(
         self, activity_id: str, maxchart: int = 2000, maxpoly: int = 4000
@@ -2059,7 +3195,7 @@ class Garmin:
         url = f"{self.garmin_request_reload_url}/{cdate}"
         logger.debug("Requesting reload of data for %s.", cdate)
 
-        return self.garth.post("connectapi", url, api=True).json()
+        return self._rate_limited(self.garth.post, "connectapi", url, api=True).json()
 
     def get_workouts(self, start: int = 0, limit: int = 100) -> dict[str, Any]:
         """Return workouts starting at offset `start` with at most `limit` results."""
@@ -2106,7 +3242,9 @@ class Garmin:
             payload = workout_json
         if not isinstance(payload, dict | list):
             raise ValueError("workout_json must be a JSON object or array")
-        return self.garth.post("connectapi", url, json=payload, api=True).json()
+        return self._rate_limited(
+            self.garth.post, "connectapi", url, json=payload, api=True
+        ).json()
 
     def get_menstrual_data_for_date(self, fordate: str) -> dict[str, Any]:
         """Return menstrual data for date."""
@@ -2160,8 +3298,8 @@ class Garmin:
             else []
         )
         logger.debug("Querying Garmin GraphQL op=%s vars=%s", op, vars_keys)
-        return self.garth.post(
-            "connectapi", self.garmin_graphql_endpoint, json=query
+        return self._rate_limited(
+            self.garth.post, "connectapi", self.garmin_graphql_endpoint, json=query
         ).json()
 
     def logout(self) -> None:
@@ -0,0 +1,373 @@
+"""asyncio client for Garmin Connect.
+
+Requires aiohttp: ``pip install garminconnect[async]``.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections.abc import Mapping
+from typing import Any
+
+import aiohttp
+
+from . import (
+    Garmin,
+    GarminConnectConnectionError,
+    _activity_upload_path,
+    _ApiCall,
+    _body_composition_file,
+    _connectapi_error,
+    _download_error,
+    _parse_retry_after,
+    _validate_positive_integer,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONNECTIONS = 100  # open connections per AsyncGarmin session
+
+
+class AsyncGarmin:
+    """asyncio variant of Garmin for fan-out workloads.
+
+    Login, tokens, endpoint paths and parameters, the rate limiter, the
+    response cache and the error mapping all come from the wrapped Garmin
+    client. Requests share one aiohttp session that keeps up to
+    `max_connections` connections alive, so thousands of calls can be
+    awaited from a single event loop:
+
+        async with AsyncGarmin(Garmin()) as client:
+            await client.login("~/.garminconnect")
+            nights = await asyncio.gather(
+                *(client.get_sleep_data(day) for day in days)
+            )
+    """
+
+    ActivityDownloadFormat = Garmin.ActivityDownloadFormat
+
+    def __init__(
+        self,
+        garmin: Garmin | None = None,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    ) -> None:
+        self.garmin = garmin if garmin is not None else Garmin()
+        self.max_connections = _validate_positive_integer(
+            max_connections, "max_connections"
+        )
+        self.base_url = f"https://connectapi.{self.garmin.garth.domain}"
+        self._session: aiohttp.ClientSession | None = None
+        self._refresh_lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "AsyncGarmin":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the HTTP session and its connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @property
+    def display_name(self) -> str | None:
+        return self.garmin.display_name
+
+    async def login(
+        self, /, tokenstore: str | None = None
+    ) -> tuple[str | None, str | None]:
+        """Log in like Garmin.login, without blocking the event loop."""
+        return await asyncio.to_thread(self.garmin.login, tokenstore)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            garth = self.garmin.garth
+            user_agent = garth.sess.headers["User-Agent"]
+            if isinstance(user_agent, bytes):
+                user_agent = user_agent.decode()
+            self._session = aiohttp.ClientSession(
+                base_url=self.base_url,
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=garth.timeout),
+                headers={"User-Agent": user_agent},
+            )
+        return self._session
+
+    async def _authorization(self) -> str:
+        garmin = self.garmin
+        expires_at = getattr(garmin.garth.oauth2_token, "expires_at", None)
+        if expires_at is None or expires_at <= time.time():
+            # Requests queue here behind a single refresh; the token exchange
+            # is blocking, so it runs in a worker thread
+            async with self._refresh_lock:
+                await asyncio.to_thread(garmin._refresh_tokens, expires_at)
+        else:
+            # Starts a background refresh inside token_refresh_margin
+            garmin._ensure_fresh_token()
+        return str(garmin.garth.oauth2_token)
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        params: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
+        files: dict[str, tuple[str, bytes]] | None = None,
+        **kwargs: Any,
+    ) -> tuple[int, Mapping[str, str], bytes]:
+        """Send one request under the rate limiter, retrying on 429 responses.
+
+        files maps form fields to (file name, content) for a multipart
+        upload. Returns the status, headers and body, or raises
+        aiohttp.ClientResponseError.
+        """
+        if params:
+            # aiohttp refuses bools; send them the way requests does
+            params = {
+                key: str(value) if isinstance(value, bool) else value
+                for key, value in params.items()
+            }
+        session = self._get_session()
+        limiter = self.garmin.rate_limiter
+        attempt = 0
+        while True:
+            if limiter is not None:
+                await asyncio.sleep(limiter.reserve())
+            if files is not None:
+                # Sending consumes a FormData, so each attempt builds its own
+                form = aiohttp.FormData()
+                for name, (filename, content) in files.items():
+                    form.add_field(name, content, filename=filename)
+                kwargs["data"] = form
+            request_headers = {
+                **(headers or {}),
+                "Authorization": await self._authorization(),
+            }
+            async with session.request(
+                method, path, params=params, headers=request_headers, **kwargs
+            ) as response:
+                body = await response.read()
+                if response.status == 429 and limiter is not None:
+                    limiter.on_rate_limited(
+                        _parse_retry_after(response.headers.get("Retry-After"))
+                    )
+                    if attempt < limiter.max_retries:
+                        attempt += 1
+                        continue
+                if response.status == 401:
+                    self.garmin._invalidate_profile_cache()
+                response.raise_for_status()
+            if limiter is not None:
+                limiter.on_success()
+            return response.status, response.headers, body
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> bytes:
+        """Return the body of a request, answering GETs from response_cache.
+
+        The cache is the wrapped Garmin client's, so both share entries;
+        its file access runs in worker threads.
+        """
+        policy = self.garmin._cache_policy(path, kwargs) if method == "GET" else None
+        if policy is None:
+            _, _, body = await self._send(method, path, **kwargs)
+            return body
+
+        cache, key, ttl = policy
+        entry = await asyncio.to_thread(cache.lookup, key)
+        if entry is not None and entry.fresh:
+            logger.debug("Cache hit for path '%s'", path)
+            return entry.body
+
+        headers = {} if entry is None else entry.conditional_headers()
+        status, response_headers, body = await self._send(
+            method, path, headers=headers, **kwargs
+        )
+        if status == 304 and entry is not None:
+            logger.debug("Cached response for path '%s' not modified", path)
+        return await asyncio.to_thread(
+            cache.update, key, ttl, entry, status, response_headers, body
+        )
+
+    async def connectapi(self, path: str, method: str = "GET", **kwargs: Any) -> Any:
+        """Async counterpart of Garmin.connectapi, raising the same errors."""
+        try:
+            body = await self._request(method, path, **kwargs)
+            return json.loads(body) if body else None
+        except aiohttp.ClientResponseError as e:
+            logger.error(
+                "API call failed for path '%s': %s (status=%s)", path, e, e.status
+            )
+            raise _connectapi_error(e.status, e) from e
+        except Exception as e:
+            logger.exception("Connection error during connectapi path=%s", path)
+            raise GarminConnectConnectionError(f"Connection error: {e}") from e
+
+    async def download(self, path: str, **kwargs: Any) -> bytes:
+        """Async counterpart of Garmin.download, raising the same errors."""
+        try:
+            return await self._request("GET", path, **kwargs)
+        except aiohttp.ClientResponseError as e:
+            logger.exception(
+                "Download failed for path '%s' (status=%s)", path, e.status
+            )
+            raise _download_error(e.status, e) from e
+        except Exception as e:
+            logger.exception("Download failed for path '%s'", path)
+            raise GarminConnectConnectionError(f"Download error: {e}") from e
+
+    async def _send_call(self, call: _ApiCall) -> Any:
+        """Send a request built by one of Garmin's _*_call methods."""
+        kwargs: dict[str, Any] = {}
+        if call.params is not None:
+            kwargs["params"] = call.params
+        if call.json is not None:
+            kwargs["json"] = call.json
+        response = await self.connectapi(call.path, call.method, **kwargs)
+        return response if call.result is None else call.result(response)
+
+    async def get_stats(self, cdate: str) -> dict[str, Any]:
+        """Return user activity summary for 'cdate' format 'YYYY-MM-DD'."""
+
+        return await self.get_user_summary(cdate)
+
+    async def get_user_summary(self, cdate: str) -> dict[str, Any]:
+        """Return user activity summary for 'cdate' format 'YYYY-MM-DD'."""
+
+        return await self._send_call(self.garmin._user_summary_call(cdate))
+
+    async def get_steps_data(self, cdate: str) -> list[dict[str, Any]]:
+        """Fetch available steps data 'cDate' format 'YYYY-MM-DD'."""
+
+        return await self._send_call(self.garmin._steps_data_call(cdate))
+
+    async def get_heart_rates(self, cdate: str) -> dict[str, Any]:
+        """Fetch available heart rates data 'cDate' format 'YYYY-MM-DD'."""
+
+        return await self._send_call(self.garmin._heart_rates_call(cdate))
+
+    async def get_sleep_data(self, cdate: str) -> dict[str, Any]:
+        """Return sleep data for current user."""
+
+        return await self._send_call(self.garmin._sleep_data_call(cdate))
+
+    async def get_hrv_data(self, cdate: str) -> dict[str, Any] | None:
+        """Return Heart Rate Variability (hrv) data for current user."""
+
+        return await self._send_call(self.garmin._hrv_data_call(cdate))
+
+    async def get_all_day_stress(self, cdate: str) -> dict[str, Any]:
+        """Return available all day stress data 'cdate' format 'YYYY-MM-DD'."""
+
+        return await self._send_call(self.garmin._all_day_stress_call(cdate))
+
+    async def get_respiration_data(self, cdate: str) -> dict[str, Any]:
+        """Return available respiration data 'cdate' format 'YYYY-MM-DD'."""
+
+        return await self._send_call(self.garmin._respiration_data_call(cdate))
+
+    async def get_spo2_data(self, cdate: str) -> dict[str, Any]:
+        """Return available SpO2 data 'cdate' format 'YYYY-MM-DD'."""
+
+        return await self._send_call(self.garmin._spo2_data_call(cdate))
+
+    async def get_body_battery(
+        self, startdate: str, enddate: str | None = None
+    ) -> list[dict[str, Any]]:
+        """Return body battery values by day from startdate through enddate."""
+
+        call = self.garmin._body_battery_call(startdate, enddate)
+        return await self._send_call(call)
+
+    async def get_weigh_ins(self, startdate: str, enddate: str) -> dict[str, Any]:
+        """Get weigh-ins between startdate and enddate using format 'YYYY-MM-DD'."""
+
+        call = self.garmin._weigh_ins_call(startdate, enddate)
+        return await self._send_call(call)
+
+    async def get_daily_weigh_ins(self, cdate: str) -> dict[str, Any]:
+        """Get weigh-ins for 'cdate' format 'YYYY-MM-DD'."""
+
+        return await self._send_call(self.garmin._daily_weigh_ins_call(cdate))
+
+    async def add_weigh_in(
+        self, weight: int | float, unitKey: str = "kg", timestamp: str = ""
+    ) -> dict[str, Any]:
+        """Add a weigh-in (default to kg)"""
+
+        call = self.garmin._add_weigh_in_call(weight, unitKey, timestamp)
+        return await self._send_call(call)
+
+    async def add_weigh_in_epoch_ms(
+        self,
+        weight: int | float,
+        local_ms: int,
+        gmt_ms: int,
+        unitKey: str = "kg",
+    ) -> dict[str, Any]:
+        """Add a weigh-in from precomputed epoch milliseconds (default to kg)."""
+
+        call = self.garmin._add_weigh_in_epoch_ms_call(
+            weight, local_ms, gmt_ms, unitKey
+        )
+        return await self._send_call(call)
+
+    async def add_body_composition(
+        self, timestamp: str | None, weight: float, **fields: float | None
+    ) -> dict[str, Any]:
+        """Upload one body composition measurement as a FIT file.
+
+        fields are the optional measurements of Garmin.add_body_composition,
+        such as percent_fat or bmi.
+        """
+
+        data = _body_composition_file(timestamp, weight, **fields)
+        return await self.connectapi(
+            Garmin.garmin_connect_upload,
+            method="POST",
+            files={"file": ("body_composition.fit", data)},
+        )
+
+    async def upload_activity(self, activity_path: str) -> Any:
+        """Upload an activity file; returns the decoded upload response."""
+
+        p = _activity_upload_path(activity_path)
+        try:
+            data = await asyncio.to_thread(p.read_bytes)
+        except OSError as e:
+            raise GarminConnectConnectionError(
+                f"Failed to read file {activity_path}: {e}"
+            ) from e
+        return await self.connectapi(
+            Garmin.garmin_connect_upload, method="POST", files={"file": (p.name, data)}
+        )
+
+    async def get_activities(
+        self,
+        start: int = 0,
+        limit: int = 20,
+        activitytype: str | None = None,
+    ) -> dict[str, Any] | list[Any]:
+        """Return available activities, most recent first."""
+
+        call = self.garmin._activities_call(start, limit, activitytype)
+        return await self._send_call(call)
+
+    async def get_activity(self, activity_id: str) -> dict[str, Any]:
+        """Return activity summary, including basic splits."""
+
+        return await self._send_call(self.garmin._activity_call(activity_id))
+
+    async def download_activity(
+        self,
+        activity_id: str,
+        dl_fmt: Garmin.ActivityDownloadFormat = Garmin.ActivityDownloadFormat.TCX,
+    ) -> bytes:
+        """Download an activity in the requested format; see Garmin."""
+
+        url = self.garmin._activity_download_url(activity_id, dl_fmt)
+        logger.debug("Downloading activity from %s", url)
+
+        return await self.download(url)
@@ -0,0 +1,256 @@
+"""On-disk cache for Garmin Connect API responses."""
+
+import contextlib
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Mapping
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+RECENT_DAY_TTL = 5 * 60  # data for today and yesterday may still change
+ACTIVITY_TTL = 24 * 3600  # activities change only when edited
+SETTLE_DAYS = 2  # days after which a day's data counts as final
+
+# (path, params) -> seconds to keep a response, math.inf or None
+CacheTTL = Callable[[str, dict[str, Any] | None], float | None]
+
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+# Activity lists and records entered by hand change for past days too
+_UNCACHED_PATH = re.compile(
+    r"/(activitylist-service|fitnessstats-service|mobile-gateway/heartRate/forDate"
+    r"|weight-service|bloodpressure-service|usersummary-service/usersummary/hydration)/"
+)
+_ACTIVITY_PATH = re.compile(
+    r"/(activity-service|download-service/(files|export/\w+))/activity/\d+(/|$)"
+)
+
+
+def default_cache_ttl(
+    path: str, params: dict[str, Any] | None, today: date | None = None
+) -> float | None:
+    """Return how long a GET response may be cached, or None to not cache it.
+
+    Requests naming only dates at least SETTLE_DAYS ago never expire, as the
+    devices have synced those days; requests reaching closer to today, or
+    ranges without an endDate, are kept for RECENT_DAY_TTL. Single activities
+    and their downloads are kept for ACTIVITY_TTL. Activity lists and manual
+    entries (weigh-ins, blood pressure, hydration) can change for any day,
+    and anything else (profile, devices) describes the current state, so
+    neither is cached.
+    """
+    if _UNCACHED_PATH.match(path):
+        return None
+    values = [str(value) for value in (params or {}).values()]
+    dates = [d for text in (path, *values) for d in _DATE.findall(text)]
+    if dates:
+        today = today or date.today()
+        settled = (today - timedelta(days=SETTLE_DAYS - 1)).isoformat()
+        open_range = (
+            params is not None and "startDate" in params and "endDate" not in params
+        )
+        # ISO dates compare like the days they name
+        if max(dates) < settled and not open_range:
+            return math.inf
+        return RECENT_DAY_TTL
+    if _ACTIVITY_PATH.match(path):
+        return ACTIVITY_TTL
+    return None
+
+
+class CacheEntry(NamedTuple):
+    """A cached response body with its HTTP validators."""
+
+    body: bytes
+    fresh: bool
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Return the request headers that revalidate this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of API responses in a local directory.
+
+    Pass one to Garmin(response_cache=...) to answer repeated GET requests
+    from disk. `ttl(path, params)` decides per endpoint how many seconds a
+    response stays fresh (math.inf for never expiring, None for not caching
+    it at all); see default_cache_ttl. Expired entries that carry an ETag or
+    Last-Modified date are kept for revalidation. Once the entries exceed
+    `max_bytes` the least recently used are removed. Entries are one file
+    each and the use order is kept in their modification times, so it
+    carries over between runs and processes sharing the directory.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+        ttl: CacheTTL = default_cache_ttl,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if isinstance(max_bytes, bool) or not isinstance(max_bytes, int):
+            raise ValueError("max_bytes must be an integer")
+        if max_bytes <= 0:
+            raise ValueError(f"max_bytes must be positive, got: {max_bytes}")
+
+        self.directory = Path(directory).expanduser()
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Entry name -> size, least recently used first; loaded on first use
+        self._entries: OrderedDict[str, int] | None = None
+        self._size = 0
+
+    def key(self, *parts: Any) -> str:
+        """Return the entry name for a request described by parts."""
+        text = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def get(self, key: str) -> bytes | None:
+        """Return the body stored under key, or None if missing or expired."""
+        entry = self.lookup(key)
+        return entry.body if entry is not None and entry.fresh else None
+
+    def lookup(self, key: str) -> CacheEntry | None:
+        """Return the entry stored under key, expired or not."""
+        path = self.directory / key
+        try:
+            with open(path, "rb") as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        expires_at = meta.get("expires_at")
+        entry = CacheEntry(
+            body,
+            expires_at is None or expires_at > self._clock(),
+            meta.get("etag"),
+            meta.get("last_modified"),
+        )
+        if not entry.fresh and not (entry.etag or entry.last_modified):
+            # Nothing to revalidate with
+            self._remove(key)
+            return None
+        with self._lock:
+            entries = self._load()
+            if key in entries:
+                entries.move_to_end(key)
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        return entry
+
+    def put(
+        self,
+        key: str,
+        body: bytes,
+        ttl: float,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> None:
+        """Store body under key for ttl seconds (math.inf: no expiry).
+
+        etag and last_modified are the response's validators, used to
+        revalidate the entry once it has expired.
+        """
+        meta: dict[str, Any] = {
+            "expires_at": None if ttl == math.inf else self._clock() + ttl
+        }
+        if etag:
+            meta["etag"] = etag
+        if last_modified:
+            meta["last_modified"] = last_modified
+        data = json.dumps(meta).encode() + b"\n" + body
+        if len(data) > self.max_bytes:
+            return
+        path = self.directory / key
+        tmp = path.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.debug("Could not write cache entry %s: %s", path, e)
+            tmp.unlink(missing_ok=True)
+            return
+        with self._lock:
+            entries = self._load()
+            self._size += len(data) - entries.pop(key, 0)
+            entries[key] = len(data)
+            while self._size > self.max_bytes:
+                old, size = entries.popitem(last=False)
+                self._size -= size
+                (self.directory / old).unlink(missing_ok=True)
+
+    def update(
+        self,
+        key: str,
+        ttl: float,
+        entry: CacheEntry | None,
+        status: int,
+        headers: Mapping[str, str],
+        body: bytes,
+    ) -> bytes:
+        """Store the response to a GET for key and return its body.
+
+        entry is what lookup(key) returned before the request; a 304 answer
+        renews it, keeping its body and validators.
+        """
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if status == 304 and entry is not None:
+            body = entry.body
+            etag = etag or entry.etag
+            last_modified = last_modified or entry.last_modified
+        elif status == 204:
+            body = b""
+        self.put(key, body, ttl, etag=etag, last_modified=last_modified)
+        return body
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            for key in self._load():
+                (self.directory / key).unlink(missing_ok=True)
+            self._entries = OrderedDict()
+            self._size = 0
+
+    def _remove(self, key: str) -> None:
+        with self._lock:
+            self._size -= self._load().pop(key, 0)
+            (self.directory / key).unlink(missing_ok=True)
+
+    def _load(self) -> "OrderedDict[str, int]":
+        if self._entries is None:
+            found = []
+            try:
+                with os.scandir(self.directory) as it:
+                    for entry in it:
+                        if entry.is_file() and not entry.name.endswith(".tmp"):
+                            stat = entry.stat()
+                            found.append((stat.st_mtime, entry.name, stat.st_size))
+            except FileNotFoundError:
+                pass
+            found.sort()
+            self._entries = OrderedDict((name, size) for _, name, size in found)
+            self._size = sum(size for _, _, size in found)
+        return self._entries
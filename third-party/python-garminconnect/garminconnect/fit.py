@@ -1,41 +1,63 @@
 # type: ignore  # Complex binary data handling - mypy errors expected
-import time
-from datetime import datetime
+import struct
+from datetime import datetime, timezone
 from io import BytesIO
-from struct import pack, unpack
-from typing import Any
-
-
-def _calcCRC(crc: int, byte: int) -> int:
-    table = [
-        0x0000,
-        0xCC01,
-        0xD801,
-        0x1400,
-        0xF001,
-        0x3C00,
-        0x2800,
-        0xE401,
-        0xA001,
-        0x6C00,
-        0x7800,
-        0xB401,
-        0x5000,
-        0x9C01,
-        0x8801,
-        0x4400,
-    ]
-    # compute checksum of lower four bits of byte
-    tmp = table[crc & 0xF]
-    crc = (crc >> 4) & 0x0FFF
-    crc = crc ^ tmp ^ table[byte & 0xF]
-    # now compute checksum of upper four bits of byte
-    tmp = table[crc & 0xF]
-    crc = (crc >> 4) & 0x0FFF
-    crc = crc ^ tmp ^ table[(byte >> 4) & 0xF]
+from struct import Struct, pack
+from typing import Any, BinaryIO
+
+
+def _make_crc_table() -> list[int]:
+    # FIT uses CRC-16 with the reflected polynomial 0xA001 (CRC-16/ARC)
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+_CRC_TABLE = _make_crc_table()
+
+
+def _crc16(data: bytes | memoryview, crc: int = 0) -> int:
+    """CRC of data, continuing from crc."""
+    table = _CRC_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
     return crc
 
 
+def _gf2_apply(matrix: list[int], vector: int) -> int:
+    result = 0
+    bit = 0
+    while vector:
+        if vector & 1:
+            result ^= matrix[bit]
+        vector >>= 1
+        bit += 1
+    return result
+
+
+def _crc16_combine(crc_a: int, crc_b: int, length_b: int) -> int:
+    """CRC of a + b given crc(a), crc(b) and len(b), in O(log len(b)).
+
+    Feeding a byte is linear in the CRC state, so crc(a + b) is crc(b)
+    xor the state crc(a) advanced over len(b) zero bytes. That advance is
+    a 16x16 GF(2) matrix raised to len(b) by repeated squaring (the same
+    trick as zlib's crc32_combine).
+    """
+    # Columns of the matrix advancing the state by one zero byte
+    matrix = [(1 << bit >> 8) ^ _CRC_TABLE[(1 << bit) & 0xFF] for bit in range(16)]
+    state = crc_a
+    while length_b:
+        if length_b & 1:
+            state = _gf2_apply(matrix, state)
+        matrix = [_gf2_apply(matrix, column) for column in matrix]
+        length_b >>= 1
+    return state ^ crc_b
+
+
 class FitBaseType:
     """BaseType Definition
 
@@ -183,6 +205,10 @@ class FitBaseType:
         return pack(fmt, value)
 
 
+_FIT_EPOCH = datetime(1989, 12, 31, tzinfo=timezone.utc)
+_FIT_EPOCH_NAIVE = _FIT_EPOCH.replace(tzinfo=None)
+
+
 class Fit:
     HEADER_SIZE = 12
 
@@ -196,15 +222,206 @@ class Fit:
     }
 
 
+_INTEGER_BASETYPES = (1, 2, 3, 4, 5, 6, 10, 11, 12)
+
+
+# struct format character -> numpy type code
+_NUMPY_FORMATS = {
+    "b": "i1",
+    "B": "u1",
+    "h": "i2",
+    "H": "u2",
+    "i": "i4",
+    "I": "u4",
+    "q": "i8",
+    "Q": "u8",
+    "f": "f4",
+    "d": "f8",
+}
+
+
+class FitMessageLayout:
+    """A FIT message definition compiled to one struct.Struct.
+
+    `fields` are (field number, FitBaseType, scale) tuples in record order.
+    The definition message is built once; `pack_into` writes a tuple of
+    field values (None for invalid) as a complete data record, record
+    header included, with a single struct call.
+    """
+
+    def __init__(
+        self,
+        global_msg_num: int,
+        lmsg_type: int,
+        fields: list[tuple[int, dict[str, Any], int | None]],
+    ) -> None:
+        self.global_msg_num = global_msg_num
+        self.lmsg_type = lmsg_type
+        self.fields = fields
+        self.struct = Struct(
+            "<B"
+            + "".join(FitBaseType.get_format(basetype) for _, basetype, _ in fields)
+        )
+        self._header = lmsg_type
+        # (invalid value, scale, integer type) per field
+        self._converters = [
+            (basetype["invalid"], scale, basetype["#"] in _INTEGER_BASETYPES)
+            for _, basetype, scale in fields
+        ]
+        # reserved, architecture(0: little endian), global msg number, field count
+        self.definition = pack(
+            "<BBBHB", (1 << 6) + lmsg_type, 0, 0, global_msg_num, len(fields)
+        ) + b"".join(
+            pack("BBB", num, basetype["size"], basetype["field"])
+            for num, basetype, _ in fields
+        )
+
+    def values(self, raw_values: tuple[Any, ...]) -> list[Any]:
+        """Apply invalid values and scales like FitEncoder._build_content_block."""
+        values = []
+        for value, (invalid, scale, is_int) in zip(
+            raw_values, self._converters, strict=True
+        ):
+            if value is None:
+                value = invalid
+            else:
+                if scale is not None:
+                    value *= scale
+                if is_int:
+                    value = int(value)
+            values.append(value)
+        return values
+
+    def pack_into(
+        self, buffer: bytearray, offset: int, raw_values: tuple[Any, ...]
+    ) -> None:
+        self.struct.pack_into(buffer, offset, self._header, *self.values(raw_values))
+
+    def pack_columns(self, columns: list[Any], count: int) -> Any:
+        """Pack `count` data records from one column per field into a uint8
+        numpy array, laid out exactly as repeated `pack_into` calls would.
+
+        A column may be None (all invalid) or anything numpy.asarray turns
+        into numbers; None/NaN entries become the field's invalid value.
+        Values are scaled and truncated like `values`. Requires numpy.
+        """
+        import numpy as np
+
+        formats = self.struct.format.lstrip("<")
+        dtype = np.dtype(
+            [("header", "u1")]
+            + [
+                (f"f{i}", "<" + _NUMPY_FORMATS[fmt])
+                for i, fmt in enumerate(formats[1:])
+            ]
+        )
+        records = np.empty(count, dtype=dtype)
+        records["header"] = self._header
+        for i, (column, (invalid, scale, is_int)) in enumerate(
+            zip(columns, self._converters, strict=True)
+        ):
+            name = f"f{i}"
+            if column is None:
+                records[name] = invalid
+                continue
+            values = np.asarray(column, dtype=np.float64)
+            if values.shape != (count,):
+                raise ValueError(
+                    f"column {i} (field {self.fields[i][0]}) has shape "
+                    f"{values.shape}, expected ({count},)"
+                )
+            missing = np.isnan(values)
+            if scale is not None:
+                values = values * scale
+            if is_int:
+                values = np.trunc(values)
+                info = np.iinfo(dtype[name])
+                present = values[~missing]
+                if present.size and (
+                    present.min() < info.min or present.max() > info.max
+                ):
+                    raise ValueError(
+                        f"field {self.fields[i][0]} value out of range for "
+                        f"{dtype[name]}"
+                    )
+            records[name] = np.where(missing, invalid, values)
+        return records.view(np.uint8)
+
+
 class FitEncoder(Fit):
     FILE_TYPE = 9
     LMSG_TYPE_FILE_INFO = 0
     LMSG_TYPE_FILE_CREATOR = 1
     LMSG_TYPE_DEVICE_INFO = 2
 
-    def __init__(self) -> None:
-        self.buf = BytesIO()
-        self.write_header()  # create header first
+    FILE_INFO_LAYOUT = FitMessageLayout(
+        Fit.GMSG_NUMS["file_id"],
+        LMSG_TYPE_FILE_INFO,
+        [
+            (3, FitBaseType.uint32z, None),
+            (4, FitBaseType.uint32, None),
+            (1, FitBaseType.uint16, None),
+            (2, FitBaseType.uint16, None),
+            (5, FitBaseType.uint16, None),
+            (0, FitBaseType.enum, None),  # type
+        ],
+    )
+    FILE_CREATOR_LAYOUT = FitMessageLayout(
+        Fit.GMSG_NUMS["file_creator"],
+        LMSG_TYPE_FILE_CREATOR,
+        [
+            (0, FitBaseType.uint16, None),
+            (1, FitBaseType.uint8, None),
+        ],
+    )
+    DEVICE_INFO_LAYOUT = FitMessageLayout(
+        Fit.GMSG_NUMS["device_info"],
+        LMSG_TYPE_DEVICE_INFO,
+        [
+            (253, FitBaseType.uint32, 1),
+            (3, FitBaseType.uint32z, 1),
+            (7, FitBaseType.uint32, 1),
+            (8, FitBaseType.uint32, None),  # unknown field(undocumented)
+            (2, FitBaseType.uint16, 1),
+            (4, FitBaseType.uint16, 1),
+            (5, FitBaseType.uint16, 100),
+            (10, FitBaseType.uint16, 256),
+            (0, FitBaseType.uint8, 1),
+            (1, FitBaseType.uint8, 1),
+            (6, FitBaseType.uint8, 1),
+            (11, FitBaseType.uint8, None),
+        ],
+    )
+
+    def __init__(
+        self,
+        incremental_crc: bool = False,
+        stream: BinaryIO | None = None,
+        data_size: int | None = None,
+    ) -> None:
+        """With incremental_crc the CRC of the data records is updated as
+        they are written, so finish() does not re-read the whole buffer.
+
+        With a `stream` (a writable binary file object) records go straight
+        to it instead of an in-memory buffer, always with a running CRC. For
+        a seekable stream finish() seeks back to patch the header data_size;
+        for a socket or pipe the final `data_size` must be given up front,
+        and finish() checks that exactly that many bytes were written.
+        """
+        if stream is not None:
+            incremental_crc = True
+            if data_size is None and not stream.seekable():
+                raise ValueError("data_size is required for a non-seekable stream")
+        self.buf = stream if stream is not None else BytesIO()
+        self.stream = stream
+        self.incremental_crc = incremental_crc
+        self._start = self.buf.tell() if self.buf.seekable() else 0
+        self._declared_data_size = data_size
+        self._data_size = 0
+        self._data_crc = 0
+        self._header_crc = 0
+        self._record_buffer = bytearray()
+        self.write_header(data_size=data_size or 0)  # create header first
         self.device_info_defined = False
 
     def __str__(self) -> str:
@@ -227,7 +444,8 @@ class FitEncoder(Fit):
         data_size: int = 0,
         data_type: bytes = b".FIT",
     ) -> None:
-        self.buf.seek(0)
+        if self.buf.seekable():
+            self.buf.seek(self._start)
         s = pack(
             "BBHI4s",
             header_size,
@@ -237,6 +455,14 @@ class FitEncoder(Fit):
             data_type,
         )
         self.buf.write(s)
+        self._header_crc = _crc16(s)
+
+    def _write(self, data: bytes) -> None:
+        """Append record data after the header."""
+        self.buf.write(data)
+        self._data_size += len(data)
+        if self.incremental_crc:
+            self._data_crc = _crc16(data, self._data_crc)
 
     def _build_content_block(self, content: dict[str, Any]) -> bytes:
         field_defs = []
@@ -252,6 +478,14 @@ class FitEncoder(Fit):
             values.append(FitBaseType.pack(basetype, value))
         return (b"".join(field_defs), b"".join(values))
 
+    def _write_record(self, layout: FitMessageLayout, values: tuple[Any, ...]) -> None:
+        size = layout.struct.size
+        if len(self._record_buffer) < size:
+            self._record_buffer = bytearray(size)
+        layout.pack_into(self._record_buffer, 0, values)
+        with memoryview(self._record_buffer)[:size] as record:
+            self._write(record)
+
     def write_file_info(
         self,
         serial_number: int | None = None,
@@ -261,38 +495,20 @@ class FitEncoder(Fit):
         number: int | None = None,
     ) -> None:
         if time_created is None:
-            time_created = datetime.now()
-
-        content = [
-            (3, FitBaseType.uint32z, serial_number, None),
-            (4, FitBaseType.uint32, self.timestamp(time_created), None),
-            (1, FitBaseType.uint16, manufacturer, None),
-            (2, FitBaseType.uint16, product, None),
-            (5, FitBaseType.uint16, number, None),
-            (0, FitBaseType.enum, self.FILE_TYPE, None),  # type
-        ]
-        fields, values = self._build_content_block(content)
-
-        # create fixed content
-        msg_number = self.GMSG_NUMS["file_id"]
-        fixed_content = pack(
-            "BBHB", 0, 0, msg_number, len(content)
-        )  # reserved, architecture(0: little endian)
-
-        self.buf.write(
-            b"".join(
-                [
-                    # definition
-                    self.record_header(
-                        definition=True, lmsg_type=self.LMSG_TYPE_FILE_INFO
-                    ),
-                    fixed_content,
-                    fields,
-                    # record
-                    self.record_header(lmsg_type=self.LMSG_TYPE_FILE_INFO),
-                    values,
-                ]
-            )
+            time_created = datetime.now(timezone.utc)
+
+        layout = self.FILE_INFO_LAYOUT
+        self._write(layout.definition)
+        self._write_record(
+            layout,
+            (
+                serial_number,
+                self.timestamp(time_created),
+                manufacturer,
+                product,
+                number,
+                self.FILE_TYPE,  # type
+            ),
         )
 
     def write_file_creator(
@@ -300,31 +516,9 @@ class FitEncoder(Fit):
         software_version: int | None = None,
         hardware_version: int | None = None,
     ) -> None:
-        content = [
-            (0, FitBaseType.uint16, software_version, None),
-            (1, FitBaseType.uint8, hardware_version, None),
-        ]
-        fields, values = self._build_content_block(content)
-
-        msg_number = self.GMSG_NUMS["file_creator"]
-        fixed_content = pack(
-            "BBHB", 0, 0, msg_number, len(content)
-        )  # reserved, architecture(0: little endian)
-        self.buf.write(
-            b"".join(
-                [
-                    # definition
-                    self.record_header(
-                        definition=True, lmsg_type=self.LMSG_TYPE_FILE_CREATOR
-                    ),
-                    fixed_content,
-                    fields,
-                    # record
-                    self.record_header(lmsg_type=self.LMSG_TYPE_FILE_CREATOR),
-                    values,
-                ]
-            )
-        )
+        layout = self.FILE_CREATOR_LAYOUT
+        self._write(layout.definition)
+        self._write_record(layout, (software_version, hardware_version))
 
     def write_device_info(
         self,
@@ -340,35 +534,28 @@ class FitEncoder(Fit):
         hardware_version: int | None = None,
         battery_status: int | None = None,
     ) -> None:
-        content = [
-            (253, FitBaseType.uint32, self.timestamp(timestamp), 1),
-            (3, FitBaseType.uint32z, serial_number, 1),
-            (7, FitBaseType.uint32, cum_operationg_time, 1),
-            (8, FitBaseType.uint32, None, None),  # unknown field(undocumented)
-            (2, FitBaseType.uint16, manufacturer, 1),
-            (4, FitBaseType.uint16, product, 1),
-            (5, FitBaseType.uint16, software_version, 100),
-            (10, FitBaseType.uint16, battery_voltage, 256),
-            (0, FitBaseType.uint8, device_index, 1),
-            (1, FitBaseType.uint8, device_type, 1),
-            (6, FitBaseType.uint8, hardware_version, 1),
-            (11, FitBaseType.uint8, battery_status, None),
-        ]
-        fields, values = self._build_content_block(content)
-
+        layout = self.DEVICE_INFO_LAYOUT
         if not self.device_info_defined:
-            header = self.record_header(
-                definition=True, lmsg_type=self.LMSG_TYPE_DEVICE_INFO
-            )
-            msg_number = self.GMSG_NUMS["device_info"]
-            fixed_content = pack(
-                "BBHB", 0, 0, msg_number, len(content)
-            )  # reserved, architecture(0: little endian)
-            self.buf.write(header + fixed_content + fields)
+            self._write(layout.definition)
             self.device_info_defined = True
 
-        header = self.record_header(lmsg_type=self.LMSG_TYPE_DEVICE_INFO)
-        self.buf.write(header + values)
+        self._write_record(
+            layout,
+            (
+                self.timestamp(timestamp),
+                serial_number,
+                cum_operationg_time,
+                None,  # unknown field(undocumented)
+                manufacturer,
+                product,
+                software_version,
+                battery_voltage,
+                device_index,
+                device_type,
+                hardware_version,
+                battery_status,
+            ),
+        )
 
     def record_header(self, definition: bool = False, lmsg_type: int = 0) -> bytes:
         msg = 0
@@ -376,26 +563,31 @@ class FitEncoder(Fit):
             msg = 1 << 6  # 6th bit is a definition message
         return pack("B", msg + lmsg_type)
 
-    def crc(self) -> int:
-        orig_pos = self.buf.tell()
-        self.buf.seek(0)
-
-        crc = 0
-        while True:
-            b = self.buf.read(1)
-            if not b:
-                break
-            crc = _calcCRC(crc, unpack("b", b)[0])
-        self.buf.seek(orig_pos)
+    def crc(self) -> bytes:
+        if self.incremental_crc:
+            crc = _crc16_combine(self._header_crc, self._data_crc, self._data_size)
+        else:
+            view = self.buf.getbuffer()
+            try:
+                crc = _crc16(view)
+            finally:
+                view.release()
         return pack("H", crc)
 
     def finish(self) -> None:
         """re-weite file-header, then append crc to end of file"""
-        data_size = self.get_size() - self.HEADER_SIZE
-        self.write_header(data_size=data_size)
-        crc = self.crc()
-        self.buf.seek(0, 2)
-        self.buf.write(crc)
+        data_size = self._data_size
+        if self.buf.seekable():
+            self.write_header(data_size=data_size)
+            self.buf.seek(self._start + self.HEADER_SIZE + data_size)
+        elif data_size != self._declared_data_size:
+            raise ValueError(
+                f"wrote {data_size} bytes of records but the header "
+                f"declares {self._declared_data_size}"
+            )
+        self.buf.write(self.crc())
+        if self.stream is not None:
+            self.stream.flush()
 
     def get_size(self) -> int:
         orig_pos = self.buf.tell()
@@ -409,9 +601,15 @@ class FitEncoder(Fit):
 
     def timestamp(self, t: datetime | float) -> float:
         """the timestamp in fit protocol is seconds since
-        UTC 00:00 Dec 31 1989 (631065600)"""
+        UTC 00:00 Dec 31 1989 (631065600)
+
+        Aware datetimes are converted from their own timezone, naive
+        datetimes are taken as UTC and numbers as epoch seconds, so the
+        result does not depend on the host timezone."""
         if isinstance(t, datetime):
-            t = time.mktime(t.timetuple())
+            if t.tzinfo is None:
+                return (t - _FIT_EPOCH_NAIVE).total_seconds()
+            return (t - _FIT_EPOCH).total_seconds()
         return t - 631065600
 
 
@@ -419,8 +617,29 @@ class FitEncoderBloodPressure(FitEncoder):
     # Here might be dragons - no idea what lsmg stand for, found 14 somewhere in the deepest web
     LMSG_TYPE_BLOOD_PRESSURE = 14
 
-    def __init__(self) -> None:
-        super().__init__()
+    # BLOOD PRESSURE FILE MESSAGES
+    BLOOD_PRESSURE_LAYOUT = FitMessageLayout(
+        Fit.GMSG_NUMS["blood_pressure"],
+        LMSG_TYPE_BLOOD_PRESSURE,
+        [
+            (253, FitBaseType.uint32, 1),
+            (0, FitBaseType.uint16, 1),
+            (1, FitBaseType.uint16, 1),
+            (2, FitBaseType.uint16, 1),
+            (3, FitBaseType.uint16, 1),
+            (4, FitBaseType.uint16, 1),
+            (5, FitBaseType.uint16, 1),
+            (6, FitBaseType.uint8, 1),
+        ],
+    )
+
+    def __init__(
+        self,
+        incremental_crc: bool = False,
+        stream: BinaryIO | None = None,
+        data_size: int | None = None,
+    ) -> None:
+        super().__init__(incremental_crc, stream, data_size)
         self.blood_pressure_monitor_defined = False
 
     def write_blood_pressure(
@@ -434,41 +653,75 @@ class FitEncoderBloodPressure(FitEncoder):
         map_evening_values: int | None = None,
         heart_rate: int | None = None,
     ) -> None:
-        # BLOOD PRESSURE FILE MESSAGES
-        content = [
-            (253, FitBaseType.uint32, self.timestamp(timestamp), 1),
-            (0, FitBaseType.uint16, systolic_blood_pressure, 1),
-            (1, FitBaseType.uint16, diastolic_blood_pressure, 1),
-            (2, FitBaseType.uint16, mean_arterial_pressure, 1),
-            (3, FitBaseType.uint16, map_3_sample_mean, 1),
-            (4, FitBaseType.uint16, map_morning_values, 1),
-            (5, FitBaseType.uint16, map_evening_values, 1),
-            (6, FitBaseType.uint8, heart_rate, 1),
-        ]
-        fields, values = self._build_content_block(content)
-
+        layout = self.BLOOD_PRESSURE_LAYOUT
         if not self.blood_pressure_monitor_defined:
-            header = self.record_header(
-                definition=True, lmsg_type=self.LMSG_TYPE_BLOOD_PRESSURE
-            )
-            msg_number = self.GMSG_NUMS["blood_pressure"]
-            fixed_content = pack(
-                "BBHB", 0, 0, msg_number, len(content)
-            )  # reserved, architecture(0: little endian)
-            self.buf.write(header + fixed_content + fields)
+            self._write(layout.definition)
             self.blood_pressure_monitor_defined = True
 
-        header = self.record_header(lmsg_type=self.LMSG_TYPE_BLOOD_PRESSURE)
-        self.buf.write(header + values)
+        self._write_record(
+            layout,
+            (
+                self.timestamp(timestamp),
+                systolic_blood_pressure,
+                diastolic_blood_pressure,
+                mean_arterial_pressure,
+                map_3_sample_mean,
+                map_morning_values,
+                map_evening_values,
+                heart_rate,
+            ),
+        )
 
 
 class FitEncoderWeight(FitEncoder):
     LMSG_TYPE_WEIGHT_SCALE = 3
 
-    def __init__(self) -> None:
-        super().__init__()
+    WEIGHT_SCALE_LAYOUT = FitMessageLayout(
+        Fit.GMSG_NUMS["weight_scale"],
+        LMSG_TYPE_WEIGHT_SCALE,
+        [
+            (253, FitBaseType.uint32, 1),
+            (0, FitBaseType.uint16, 100),
+            (1, FitBaseType.uint16, 100),
+            (2, FitBaseType.uint16, 100),
+            (3, FitBaseType.uint16, 100),
+            (4, FitBaseType.uint16, 100),
+            (5, FitBaseType.uint16, 100),
+            (7, FitBaseType.uint16, 4),
+            (9, FitBaseType.uint16, 4),
+            (8, FitBaseType.uint8, 1),
+            (10, FitBaseType.uint8, 1),
+            (11, FitBaseType.uint8, 1),
+            (13, FitBaseType.uint16, 10),
+        ],
+    )
+
+    def __init__(
+        self,
+        incremental_crc: bool = False,
+        stream: BinaryIO | None = None,
+        data_size: int | None = None,
+    ) -> None:
+        super().__init__(incremental_crc, stream, data_size)
         self.weight_scale_defined = False
 
+    @classmethod
+    def data_size_for(cls, count: int) -> int:
+        """Record bytes of a file with file_info, file_creator, one
+        device_info and `count` weight_scale records - the `data_size` to
+        declare when streaming such a file to a non-seekable stream."""
+        size = 0
+        for layout in (
+            cls.FILE_INFO_LAYOUT,
+            cls.FILE_CREATOR_LAYOUT,
+            cls.DEVICE_INFO_LAYOUT,
+        ):
+            size += len(layout.definition) + layout.struct.size
+        layout = cls.WEIGHT_SCALE_LAYOUT
+        if count:
+            size += len(layout.definition) + count * layout.struct.size
+        return size
+
     def write_weight_scale(
         self,
         timestamp: datetime | int | float,
@@ -485,33 +738,415 @@ class FitEncoderWeight(FitEncoder):
         visceral_fat_rating: int | float | None = None,
         bmi: int | float | None = None,
     ) -> None:
-        content = [
-            (253, FitBaseType.uint32, self.timestamp(timestamp), 1),
-            (0, FitBaseType.uint16, weight, 100),
-            (1, FitBaseType.uint16, percent_fat, 100),
-            (2, FitBaseType.uint16, percent_hydration, 100),
-            (3, FitBaseType.uint16, visceral_fat_mass, 100),
-            (4, FitBaseType.uint16, bone_mass, 100),
-            (5, FitBaseType.uint16, muscle_mass, 100),
-            (7, FitBaseType.uint16, basal_met, 4),
-            (9, FitBaseType.uint16, active_met, 4),
-            (8, FitBaseType.uint8, physique_rating, 1),
-            (10, FitBaseType.uint8, metabolic_age, 1),
-            (11, FitBaseType.uint8, visceral_fat_rating, 1),
-            (13, FitBaseType.uint16, bmi, 10),
-        ]
-        fields, values = self._build_content_block(content)
-
+        layout = self.WEIGHT_SCALE_LAYOUT
         if not self.weight_scale_defined:
-            header = self.record_header(
-                definition=True, lmsg_type=self.LMSG_TYPE_WEIGHT_SCALE
+            self._write(layout.definition)
+            self.weight_scale_defined = True
+
+        self._write_record(
+            layout,
+            (
+                self.timestamp(timestamp),
+                weight,
+                percent_fat,
+                percent_hydration,
+                visceral_fat_mass,
+                bone_mass,
+                muscle_mass,
+                basal_met,
+                active_met,
+                physique_rating,
+                metabolic_age,
+                visceral_fat_rating,
+                bmi,
+            ),
+        )
+
+    def write_weight_scale_batch(
+        self,
+        timestamp: Any,
+        weight: Any,
+        percent_fat: Any = None,
+        percent_hydration: Any = None,
+        visceral_fat_mass: Any = None,
+        bone_mass: Any = None,
+        muscle_mass: Any = None,
+        basal_met: Any = None,
+        active_met: Any = None,
+        physique_rating: Any = None,
+        metabolic_age: Any = None,
+        visceral_fat_rating: Any = None,
+        bmi: Any = None,
+    ) -> None:
+        """Write many weight_scale records from column arrays.
+
+        Arguments are the `write_weight_scale` fields as equal-length
+        sequences or numpy arrays (None for a column that is all invalid;
+        None/NaN entries are invalid too). `timestamp` may be datetime64
+        (UTC), epoch seconds, or datetimes (naive ones are UTC). The output is
+        the same as calling `write_weight_scale` once per row. Requires numpy.
+        """
+        import numpy as np
+
+        timestamp = np.asarray(timestamp)
+        if timestamp.ndim != 1:
+            raise ValueError("timestamp must be one-dimensional")
+        if timestamp.dtype.kind == "M":
+            seconds = timestamp.astype("datetime64[s]").astype(np.int64)
+            fit_time = seconds - 631065600
+        elif timestamp.dtype.kind in "iuf":
+            fit_time = timestamp.astype(np.float64) - 631065600
+        else:
+            fit_time = np.fromiter(
+                (self.timestamp(t) for t in timestamp),
+                dtype=np.float64,
+                count=len(timestamp),
             )
-            msg_number = self.GMSG_NUMS["weight_scale"]
-            fixed_content = pack(
-                "BBHB", 0, 0, msg_number, len(content)
-            )  # reserved, architecture(0: little endian)
-            self.buf.write(header + fixed_content + fields)
+
+        layout = self.WEIGHT_SCALE_LAYOUT
+        records = layout.pack_columns(
+            [
+                fit_time,
+                weight,
+                percent_fat,
+                percent_hydration,
+                visceral_fat_mass,
+                bone_mass,
+                muscle_mass,
+                basal_met,
+                active_met,
+                physique_rating,
+                metabolic_age,
+                visceral_fat_rating,
+                bmi,
+            ],
+            len(fit_time),
+        )
+        if not len(records):
+            return
+        if not self.weight_scale_defined:
+            self._write(layout.definition)
             self.weight_scale_defined = True
+        self._write(memoryview(records))
+
+
+# base type number -> (struct format, size, invalid value); see FIT Protocol
+# Document(Page.20). Floats are invalid when all bits are set, i.e. NaN.
+_DECODE_BASETYPES = {
+    0: ("B", 1, 0xFF),  # enum
+    1: ("b", 1, 0x7F),  # sint8
+    2: ("B", 1, 0xFF),  # uint8
+    3: ("h", 2, 0x7FFF),  # sint16
+    4: ("H", 2, 0xFFFF),  # uint16
+    5: ("i", 4, 0x7FFFFFFF),  # sint32
+    6: ("I", 4, 0xFFFFFFFF),  # uint32
+    7: ("s", 1, None),  # string
+    8: ("f", 4, None),  # float32
+    9: ("d", 8, None),  # float64
+    10: ("B", 1, 0x00),  # uint8z
+    11: ("H", 2, 0x0000),  # uint16z
+    12: ("I", 4, 0x00000000),  # uint32z
+    13: ("s", 1, None),  # byte
+    14: ("q", 8, 0x7FFFFFFFFFFFFFFF),  # sint64
+    15: ("Q", 8, 0xFFFFFFFFFFFFFFFF),  # uint64
+    16: ("Q", 8, 0x0000000000000000),  # uint64z
+}
+
+# Well-known global message numbers of the FIT profile
+_MESSAGE_NAMES = {
+    0: "file_id",
+    2: "device_settings",
+    3: "user_profile",
+    7: "zones_target",
+    12: "sport",
+    18: "session",
+    19: "lap",
+    20: "record",
+    21: "event",
+    23: "device_info",
+    26: "workout",
+    27: "workout_step",
+    30: "weight_scale",
+    34: "activity",
+    49: "file_creator",
+    51: "blood_pressure",
+    55: "monitoring",
+    78: "hrv",
+    206: "field_description",
+    207: "developer_data_id",
+    216: "time_in_zone",
+}
+
+_COMPRESSED_TIMESTAMP = 253
+_STRUCTS: dict[str, Struct] = {}
+# Definitions are immutable once compiled and repeat across files of the
+# same device, so they are shared by their raw bytes.
+_DEFINITIONS: dict[bytes, "_FitDefinition"] = {}
+_MAX_CACHED_DEFINITIONS = 4096
+
 
-        header = self.record_header(lmsg_type=self.LMSG_TYPE_WEIGHT_SCALE)
-        self.buf.write(header + values)
+def _compile(fmt: str) -> Struct:
+    compiled = _STRUCTS.get(fmt)
+    if compiled is None:
+        compiled = _STRUCTS[fmt] = Struct(fmt)
+    return compiled
+
+
+class _FitDefinition:
+    """A decoded definition message compiled to one struct.Struct, which
+    unpacks a whole data record including its header byte.
+
+    `fields` are (key, start, count, kind, invalid) tuples: the slice of the
+    unpacked tuple holding the field and how to clean it up.
+    """
+
+    __slots__ = ("global_msg_num", "struct", "size", "fields", "timestamp_index")
+
+    def __init__(
+        self,
+        global_msg_num: int,
+        endian: str,
+        fields: list[tuple[Any, int, int]],
+    ) -> None:
+        self.global_msg_num = global_msg_num
+        formats = []
+        self.fields = []
+        self.timestamp_index = None
+        start = 0
+        for key, size, basetype in fields:
+            fmt, base_size, invalid = _DECODE_BASETYPES.get(
+                basetype & 0x1F, ("s", 1, None)
+            )
+            if isinstance(key, tuple):
+                kind, fmt, count = "raw", f"{size}s", 1
+            elif fmt == "s":
+                kind = "string" if basetype & 0x1F == 7 else "bytes"
+                fmt, count = f"{size}s", 1
+            elif size % base_size:
+                kind, fmt, count = "raw", f"{size}s", 1
+            else:
+                count = size // base_size
+                kind = "float" if fmt in "fd" else "int"
+                if count > 1:
+                    kind += "_array"
+                fmt = f"{count}{fmt}"
+                if key == _COMPRESSED_TIMESTAMP and count == 1:
+                    self.timestamp_index = start
+            formats.append(fmt)
+            self.fields.append((key, start, count, kind, invalid))
+            start += count
+        # The record header byte is skipped as padding, so that runs of
+        # records can be unpacked with one iter_unpack call.
+        self.struct = _compile(endian + "x" + "".join(formats))
+        self.size = self.struct.size
+
+    def with_timestamp(self) -> "_FitDefinition":
+        """The same layout with a trailing timestamp column, for data
+        messages with a compressed timestamp header."""
+        variant = object.__new__(_FitDefinition)
+        variant.global_msg_num = self.global_msg_num
+        variant.struct = self.struct
+        variant.size = self.size
+        variant.timestamp_index = None
+        width = sum(count for _, _, count, _, _ in self.fields)
+        variant.fields = [
+            field for field in self.fields if field[0] != _COMPRESSED_TIMESTAMP
+        ] + [(_COMPRESSED_TIMESTAMP, width, 1, "int", 0xFFFFFFFF)]
+        return variant
+
+
+def _parse_definition(raw: bytes) -> _FitDefinition:
+    big_endian = raw[2] == 1
+    global_msg_num = int.from_bytes(raw[3:5], "big" if big_endian else "little")
+    count = raw[5]
+    fields = [tuple(raw[i : i + 3]) for i in range(6, 6 + 3 * count, 3)]
+    if raw[0] & 0x20:
+        start = 7 + 3 * count
+        fields += [
+            ((raw[i + 2], raw[i]), raw[i + 1], 0x0D)
+            for i in range(start, start + 3 * raw[start - 1], 3)
+        ]
+    return _FitDefinition(global_msg_num, ">" if big_endian else "<", fields)
+
+
+def _clean_column(values: tuple[Any, ...], kind: str, invalid: Any) -> list[Any]:
+    if kind == "int":
+        # Columns are usually all valid or all invalid; count at C speed
+        missing = values.count(invalid)
+        if not missing:
+            return list(values)
+        if missing == len(values):
+            return [None] * missing
+        return [None if v == invalid else v for v in values]
+    if kind == "float":
+        return [None if v != v else v for v in values]  # NaN
+    if kind == "string":
+        return [v.split(b"\0", 1)[0].decode("utf-8", "replace") or None for v in values]
+    if kind == "bytes":
+        return [v if v.strip(b"\xff") else None for v in values]
+    return list(values)
+
+
+def _clean_array_column(
+    values: list[tuple[Any, ...]], kind: str, invalid: Any
+) -> list[Any]:
+    if kind == "float_array":
+        return [None if all(x != x for x in v) else v for v in values]
+    return [None if all(x == invalid for x in v) else v for v in values]
+
+
+class FitDecoder:
+    """Decode FIT files into columns.
+
+    `decode()` returns {message name: {field number: column}} with one list
+    per field in file order. Message types outside the well-known profile
+    messages are named "unknown_<global number>"; developer fields are keyed
+    by (developer data index, field number) and hold raw bytes. Invalid
+    values become None. Values are raw, i.e. scale and offset are not
+    applied, and compressed timestamp headers are expanded into field 253.
+    Chained FIT files are decoded into the same columns.
+    """
+
+    def __init__(
+        self, data: bytes | bytearray | memoryview, check_crc: bool = True
+    ) -> None:
+        self.data = memoryview(data).cast("B")
+        self.check_crc = check_crc
+
+    def decode(self) -> dict[str, dict[Any, list[Any]]]:
+        # global message number -> list of (definition, rows) in file order
+        blocks: dict[int, list[tuple[_FitDefinition | None, list[tuple]]]] = {}
+        offset = 0
+        while offset < len(self.data):
+            offset = self._decode_file(offset, blocks)
+        return {
+            _MESSAGE_NAMES.get(num, f"unknown_{num}"): self._columns(msg_blocks)
+            for num, msg_blocks in blocks.items()
+        }
+
+    def _decode_file(self, start: int, blocks: dict) -> int:
+        data = self.data
+        if len(data) - start < 12:
+            raise ValueError(f"truncated FIT header at byte {start}")
+        header_size = data[start]
+        data_size = int.from_bytes(data[start + 4 : start + 8], "little")
+        if header_size < 12 or bytes(data[start + 8 : start + 12]) != b".FIT":
+            raise ValueError(f"not a FIT file header at byte {start}")
+        end = start + header_size + data_size
+        if end + 2 > len(data):
+            raise ValueError(
+                f"FIT file at byte {start} declares {data_size} bytes of records "
+                f"but only {len(data) - start - header_size} remain"
+            )
+        if self.check_crc:
+            if header_size >= 14:
+                header_crc = int.from_bytes(data[start + 12 : start + 14], "little")
+                if header_crc and _crc16(data[start : start + 12]) != header_crc:
+                    raise ValueError(f"FIT header CRC mismatch at byte {start}")
+            if _crc16(data[start : end + 2]):
+                raise ValueError(f"FIT file CRC mismatch at byte {start}")
+        offset = start + header_size
+        try:
+            offset = self._decode_records(offset, end, blocks)
+        except KeyError as e:
+            raise ValueError(
+                f"data message uses undefined local message type {e} "
+                f"in FIT file at byte {start}"
+            ) from None
+        except (IndexError, struct.error) as e:
+            raise ValueError(f"truncated FIT record in file at byte {start}") from e
+        if offset != end:
+            raise ValueError(f"FIT record overruns data_size at byte {offset}")
+        return end + 2
+
+    def _decode_records(self, offset: int, end: int, blocks: dict) -> int:
+        data = self.data
+        definitions: dict[int, _FitDefinition] = {}
+        compressed: dict[int, _FitDefinition] = {}
+        last_timestamp = 0
+        while offset < end:
+            header = data[offset]
+            if header & 0x80:
+                # compressed timestamp header: 2 bit local type, 5 bit offset
+                local = (header >> 5) & 0x03
+                definition = definitions[local]
+                time_offset = header & 0x1F
+                last_timestamp = (
+                    (last_timestamp & ~0x1F)
+                    + time_offset
+                    + (0x20 if time_offset < last_timestamp & 0x1F else 0)
+                )
+                rows = [definition.struct.unpack_from(data, offset) + (last_timestamp,)]
+                offset += definition.size
+                definition = compressed.get(local)
+                if definition is None:
+                    definition = definitions[local].with_timestamp()
+                    compressed[local] = definition
+            elif header & 0x40:
+                offset = self._decode_definition(offset, definitions)
+                compressed.pop(header & 0x0F, None)
+                continue
+            else:
+                definition = definitions[header & 0x0F]
+                # Unpack the whole run of records with this header at once
+                size = definition.size
+                run_end = offset + size
+                while run_end < end and data[run_end] == header:
+                    run_end += size
+                if run_end > end:
+                    break
+                rows = definition.struct.iter_unpack(data[offset:run_end])
+                offset = run_end
+
+            msg_blocks = blocks.get(definition.global_msg_num)
+            if msg_blocks is None:
+                msg_blocks = blocks[definition.global_msg_num] = [(None, [])]
+            if msg_blocks[-1][0] is not definition:
+                msg_blocks.append((definition, []))
+            block_rows = msg_blocks[-1][1]
+            block_rows.extend(rows)
+            if definition.timestamp_index is not None:
+                last_timestamp = block_rows[-1][definition.timestamp_index]
+        return offset
+
+    def _decode_definition(self, offset: int, definitions: dict) -> int:
+        data = self.data
+        header = data[offset]
+        # reserved, architecture, global message number, field count
+        end = offset + 6 + 3 * data[offset + 5]
+        if header & 0x20:
+            # developer fields: number, size, developer data index
+            end += 1 + 3 * data[end]
+        raw = bytes(data[offset:end])
+        definition = _DEFINITIONS.get(raw)
+        if definition is None:
+            definition = _parse_definition(raw)
+            if len(_DEFINITIONS) >= _MAX_CACHED_DEFINITIONS:
+                _DEFINITIONS.clear()
+            _DEFINITIONS[raw] = definition
+        definitions[header & 0x0F] = definition
+        return end
+
+    @staticmethod
+    def _columns(msg_blocks: list) -> dict[Any, list[Any]]:
+        columns: dict[Any, list[Any]] = {}
+        total = 0
+        for definition, rows in msg_blocks:
+            if not rows:
+                continue
+            raw = list(zip(*rows, strict=True))
+            for key, start, count, kind, invalid in definition.fields:
+                if count == 1:
+                    column = _clean_column(raw[start], kind, invalid)
+                else:
+                    column = _clean_array_column(
+                        list(zip(*raw[start : start + count], strict=True)),
+                        kind,
+                        invalid,
+                    )
+                columns.setdefault(key, [None] * total).extend(column)
+            total += len(rows)
+            for column in columns.values():
+                if len(column) < total:
+                    column.extend([None] * (total - len(column)))
+        return columns
@@ -0,0 +1,207 @@
+import asyncio
+import json
+import math
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+import pytest
+from garth.auth_tokens import OAuth2Token
+
+import garminconnect
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web  # noqa: E402
+from aiohttp.test_utils import TestServer  # noqa: E402
+
+Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+
+def _run(
+    routes: dict[str, Handler],
+    scenario: Callable[[garminconnect.AsyncGarmin], Awaitable[Any]],
+    rate_limiter: garminconnect.RateLimiter | None = None,
+    response_cache: garminconnect.ResponseCache | None = None,
+) -> Any:
+    async def main() -> Any:
+        app = web.Application()
+        for path, handler in routes.items():
+            app.router.add_route("*", path, handler)
+        garmin = garminconnect.Garmin(
+            rate_limiter=rate_limiter, response_cache=response_cache
+        )
+        garmin.display_name = "runner"
+        now = int(time.time())
+        garmin.garth.oauth2_token = OAuth2Token(
+            scope="CONNECT_READ",
+            jti="jti",
+            token_type="Bearer",  # noqa: S106
+            access_token="access",  # noqa: S106
+            refresh_token="refresh",  # noqa: S106
+            expires_in=3600,
+            expires_at=now + 3600,
+            refresh_token_expires_in=86400,
+            refresh_token_expires_at=now + 86400,
+        )
+        async with (
+            TestServer(app) as server,
+            garminconnect.AsyncGarmin(garmin) as client,
+        ):
+            client.base_url = str(server.make_url(""))
+            return await scenario(client)
+
+    return asyncio.run(main())
+
+
+def test_concurrent_getters_share_one_session() -> None:
+    async def sleep(request: web.Request) -> web.Response:
+        assert request.headers["Authorization"] == "Bearer access"
+        assert request.match_info["name"] == "runner"
+        await asyncio.sleep(0.01)
+        return web.json_response({"date": request.query["date"]})
+
+    async def scenario(client: garminconnect.AsyncGarmin) -> list[Any]:
+        days = [f"2024-01-{day:02d}" for day in range(1, 29)]
+        results = await asyncio.gather(*(client.get_sleep_data(d) for d in days))
+        assert client._session is not None
+        assert [r["date"] for r in results] == days
+        return results
+
+    path = garminconnect.Garmin.garmin_connect_daily_sleep_url + "/{name}"
+    assert len(_run({path: sleep}, scenario)) == 28
+
+
+def test_weigh_ins_and_downloads() -> None:
+    posted: list[dict] = []
+
+    async def weigh_ins(request: web.Request) -> web.Response:
+        assert request.query["includeAll"] == "True"
+        return web.json_response({"dailyWeightSummaries": []})
+
+    async def add(request: web.Request) -> web.Response:
+        posted.append(await request.json())
+        return web.Response(status=204)
+
+    async def fit(request: web.Request) -> web.Response:
+        return web.Response(body=b"PK\x03\x04")
+
+    async def scenario(client: garminconnect.AsyncGarmin) -> None:
+        assert await client.get_weigh_ins("2024-01-01", "2024-01-31") == {
+            "dailyWeightSummaries": []
+        }
+        assert (await client.add_weigh_in_epoch_ms(80.5, 0, 3_600_000))["success"]
+        data = await client.download_activity(
+            "42", client.ActivityDownloadFormat.ORIGINAL
+        )
+        assert data == b"PK\x03\x04"
+
+    weight = garminconnect.Garmin.garmin_connect_weight_url
+    _run(
+        {
+            f"{weight}/weight/range/2024-01-01/2024-01-31": weigh_ins,
+            f"{weight}/user-weight": add,
+            f"{garminconnect.Garmin.garmin_connect_fit_download}/42": fit,
+        },
+        scenario,
+    )
+    assert posted == [
+        {
+            "dateTimestamp": "1970-01-01T00:00:00.000",
+            "gmtTimestamp": "1970-01-01T01:00:00.000",
+            "unitKey": "kg",
+            "sourceType": "MANUAL",
+            "value": 80.5,
+        }
+    ]
+
+
+def test_errors_are_mapped_like_connectapi() -> None:
+    attempts: list[int] = []
+
+    async def throttled(request: web.Request) -> web.Response:
+        attempts.append(1)
+        if len(attempts) == 1:
+            return web.Response(status=429, headers={"Retry-After": "0"})
+        return web.Response(text=json.dumps({"ok": True}))
+
+    async def status(request: web.Request) -> web.Response:
+        return web.Response(status=int(request.match_info["code"]))
+
+    async def scenario(client: garminconnect.AsyncGarmin) -> None:
+        assert await client.connectapi("/throttled") == {"ok": True}
+        with pytest.raises(garminconnect.GarminConnectAuthenticationError):
+            await client.connectapi("/status/401")
+        with pytest.raises(
+            garminconnect.GarminConnectConnectionError, match=r"client error \(404\)"
+        ):
+            await client.download("/status/404")
+        with pytest.raises(ValueError):
+            await client.get_hrv_data("yesterday")
+
+    limiter = garminconnect.RateLimiter(requests_per_second=100, burst=10)
+    _run({"/throttled": throttled, "/status/{code}": status}, scenario, limiter)
+    assert len(attempts) == 2
+    assert limiter.rate < 100  # backed off, recovering
+
+
+def test_uploads_post_files(tmp_path: Path) -> None:
+    uploaded: list[tuple[str, bytes]] = []
+
+    async def upload(request: web.Request) -> web.Response:
+        form = await request.post()
+        file = form["file"]
+        assert isinstance(file, web.FileField)
+        uploaded.append((file.filename, file.file.read()))
+        return web.json_response({"detailedImportResult": {"uploadId": 1}})
+
+    activity = tmp_path / "run.fit"
+    activity.write_bytes(b"FIT data")
+
+    async def scenario(client: garminconnect.AsyncGarmin) -> None:
+        response = await client.add_body_composition(
+            "2024-01-01T08:00:00+00:00", 80.5, percent_fat=20.0
+        )
+        assert response == {"detailedImportResult": {"uploadId": 1}}
+        await client.upload_activity(str(activity))
+        with pytest.raises(garminconnect.GarminConnectInvalidFileFormatError):
+            await client.upload_activity(__file__)
+
+    _run({garminconnect.Garmin.garmin_connect_upload: upload}, scenario)
+    assert [name for name, _ in uploaded] == ["body_composition.fit", "run.fit"]
+    assert uploaded[0][1][8:12] == b".FIT"
+    assert uploaded[1][1] == b"FIT data"
+
+
+def test_getters_use_the_response_cache(tmp_path: Path) -> None:
+    requests: list[str | None] = []
+
+    async def daily(request: web.Request) -> web.Response:
+        requests.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+        return web.json_response({"day": request.path}, headers={"ETag": '"v1"'})
+
+    async def scenario(client: garminconnect.AsyncGarmin) -> None:
+        for _ in range(2):
+            assert await client.get_hrv_data("2024-01-01") == {
+                "day": f"{garminconnect.Garmin.garmin_connect_hrv_url}/2024-01-01"
+            }
+            assert await client.get_all_day_stress("2024-01-01") == {
+                "day": f"{garminconnect.Garmin.garmin_connect_daily_stress_url}"
+                "/2024-01-01"
+            }
+
+    # Stress responses expire at once and are revalidated with their ETag
+    cache = garminconnect.ResponseCache(
+        tmp_path, ttl=lambda path, params: 0 if "Stress" in path else math.inf
+    )
+    _run(
+        {
+            f"{garminconnect.Garmin.garmin_connect_hrv_url}/{{day}}": daily,
+            f"{garminconnect.Garmin.garmin_connect_daily_stress_url}/{{day}}": daily,
+        },
+        scenario,
+        response_cache=cache,
+    )
+    assert requests == [None, None, '"v1"']
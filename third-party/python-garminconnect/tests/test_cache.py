@@ -0,0 +1,182 @@
+import json
+import math
+import os
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import pytest
+import requests
+
+import garminconnect
+from garminconnect.cache import (
+    ACTIVITY_TTL,
+    RECENT_DAY_TTL,
+    CacheEntry,
+    ResponseCache,
+    default_cache_ttl,
+)
+
+TODAY = date(2024, 6, 15)
+
+
+@pytest.mark.parametrize(
+    ("path", "params", "ttl"),
+    [
+        ("/hrv-service/hrv/2024-06-01", None, math.inf),
+        ("/hrv-service/hrv/2024-06-13", None, math.inf),
+        ("/hrv-service/hrv/2024-06-14", None, RECENT_DAY_TTL),
+        (
+            "/wellness-service/wellness/dailySleepData/me",
+            {"date": "2024-06-15"},
+            RECENT_DAY_TTL,
+        ),
+        (
+            "/usersummary-service/usersummary/daily/me",
+            {"calendarDate": "2024-01-01"},
+            math.inf,
+        ),
+        (
+            "/weight-service/weight/range/2024-01-01/2024-02-01",
+            {"includeAll": True},
+            None,
+        ),
+        (
+            "/activitylist-service/activities/search/activities",
+            {"startDate": "2024-01-01", "endDate": "2024-02-01"},
+            None,
+        ),
+        (
+            "/activitylist-service/activities/search/activities",
+            {"startDate": "2024-01-01"},
+            None,
+        ),
+        ("/activity-service/activity/123/splits", None, ACTIVITY_TTL),
+        ("/download-service/files/activity/123", None, ACTIVITY_TTL),
+        ("/activity-service/activity/activityTypes", None, None),
+        ("/device-service/deviceregistration/devices", None, None),
+    ],
+)
+def test_default_cache_ttl(path: str, params: dict | None, ttl: float | None) -> None:
+    assert default_cache_ttl(path, params, today=TODAY) == ttl
+
+
+def test_entries_expire_and_survive_restarts(tmp_path: Path) -> None:
+    now = [1000.0]
+    cache = ResponseCache(tmp_path, clock=lambda: now[0])
+    cache.put("forever", b"old day", math.inf)
+    cache.put("today", b"today", 60)
+    assert cache.get("today") == b"today"
+
+    now[0] += 61
+    reopened = ResponseCache(tmp_path, clock=lambda: now[0])
+    assert reopened.get("forever") == b"old day"
+    assert reopened.get("today") is None
+    assert sorted(os.listdir(tmp_path)) == ["forever"]
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path: Path) -> None:
+    cache = ResponseCache(tmp_path, max_bytes=100)
+    for name in "abc":
+        cache.put(name, b"x" * 20, math.inf)  # about 40 bytes with metadata
+        os.utime(tmp_path / name, (0, {"a": 1, "b": 2, "c": 3}[name]))
+    assert sorted(os.listdir(tmp_path)) == ["b", "c"]
+
+    # Use order is read back from the files by a new instance
+    reopened = ResponseCache(tmp_path, max_bytes=100)
+    assert reopened.get("b") == b"x" * 20
+    reopened.put("d", b"x" * 20, math.inf)
+    assert sorted(os.listdir(tmp_path)) == ["b", "d"]
+
+    reopened.put("huge", b"x" * 200, math.inf)
+    assert reopened.get("huge") is None
+
+
+def _fake_server(
+    monkeypatch: pytest.MonkeyPatch, api: garminconnect.Garmin, calls: list[dict]
+) -> None:
+    def request(method: str, subdomain: str, path: str, **kwargs: Any) -> Any:
+        calls.append({"method": method, "path": path, **kwargs})
+        response = requests.Response()
+        response.headers["ETag"] = f'"{path}"'
+        if kwargs.get("headers", {}).get("If-None-Match") == f'"{path}"':
+            response.status_code = 304
+            response._content = b""
+        else:
+            response.status_code = 200
+            response._content = json.dumps({"path": path}).encode()
+        return response
+
+    monkeypatch.setattr(api.garth, "request", request)
+
+    def connectapi(path: str, method: str = "GET", **kwargs: Any) -> Any:
+        return request(method, "connectapi", path, **kwargs).json()
+
+    monkeypatch.setattr(api.garth, "connectapi", connectapi)
+
+
+def test_connectapi_serves_repeat_requests_from_cache(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    calls: list[dict] = []
+
+    def client() -> garminconnect.Garmin:
+        api = garminconnect.Garmin(response_cache=ResponseCache(tmp_path))
+        api.display_name = "runner"
+        _fake_server(monkeypatch, api, calls)
+        return api
+
+    first = client()
+    sleep = first.get_sleep_data("2020-01-01")
+    assert sleep == {"path": first.garmin_connect_daily_sleep_url + "/runner"}
+    assert client().get_sleep_data("2020-01-01") == sleep
+    assert len(calls) == 1
+
+    # Other dates, uncacheable endpoints and writes go to the server
+    first.get_sleep_data("2020-01-02")
+    first.get_devices()
+    first.get_devices()
+    first.connectapi("/hrv-service/hrv/2020-01-01", method="POST")
+    assert len(calls) == 5
+
+
+def test_expired_entries_are_revalidated(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    now = [1000.0]
+    calls: list[dict] = []
+    cache = ResponseCache(tmp_path, clock=lambda: now[0])
+    api = garminconnect.Garmin(response_cache=cache)
+    api.display_name = "runner"
+    _fake_server(monkeypatch, api, calls)
+
+    activity = api.get_activity_splits("123")
+    fit = api.download_activity("123", api.ActivityDownloadFormat.ORIGINAL)
+    assert [call["headers"] for call in calls] == [{}, {}]
+
+    now[0] += ACTIVITY_TTL + 1
+    assert api.get_activity_splits("123") == activity
+    assert api.download_activity("123", api.ActivityDownloadFormat.ORIGINAL) == fit
+    assert [call["headers"] for call in calls[2:]] == [
+        {"If-None-Match": f'"{api.garmin_connect_activity}/123/splits"'},
+        {"If-None-Match": f'"{api.garmin_connect_fit_download}/123"'},
+    ]
+
+    # The 304 renewed the entries
+    assert api.get_activity_splits("123") == activity
+    assert len(calls) == 4
+
+
+def test_entries_without_validators_are_dropped_when_expired(
+    tmp_path: Path,
+) -> None:
+    now = [0.0]
+    cache = ResponseCache(tmp_path, clock=lambda: now[0])
+    cache.put("plain", b"body", 10)
+    cache.put("tagged", b"body", 10, last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    now[0] = 11
+    assert cache.lookup("plain") is None
+    assert cache.lookup("tagged") == CacheEntry(
+        b"body", False, None, "Mon, 01 Jan 2024 00:00:00 GMT"
+    )
+    assert cache.get("tagged") is None
@@ -0,0 +1,248 @@
+import io
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from garminconnect.fit import (  # type: ignore[attr-defined]
+    FitBaseType,
+    FitDecoder,
+    FitEncoder,
+    FitEncoderWeight,
+    FitMessageLayout,
+    _crc16,
+    _crc16_combine,
+)
+
+ACTIVITY_FIT = Path(__file__).parent / "12129115726_ACTIVITY.fit"
+
+
+def _write_weight_file(encoder: FitEncoderWeight) -> None:
+    encoder.write_file_info(time_created=1688198400)
+    encoder.write_file_creator()
+    encoder.write_device_info(datetime(2023, 7, 1, tzinfo=timezone.utc))
+    for i in range(100):
+        encoder.write_weight_scale(1688198400 + 60 * i, weight=80 + i / 10, bmi=24.2)
+    encoder.finish()
+
+
+def _weight_file(incremental_crc: bool = False) -> bytes:
+    encoder = FitEncoderWeight(incremental_crc=incremental_crc)
+    _write_weight_file(encoder)
+    return encoder.getvalue()
+
+
+def test_crc16_check_value() -> None:
+    # Standard CRC-16/ARC check value
+    assert _crc16(b"123456789") == 0xBB3D
+
+
+def test_crc16_of_valid_fit_file_is_zero() -> None:
+    # The trailing CRC makes the CRC of the whole file zero
+    assert _crc16(ACTIVITY_FIT.read_bytes()) == 0
+    assert _crc16(_weight_file()) == 0
+
+
+@pytest.mark.parametrize("length", [0, 1, 2, 255, 256, 4097])
+def test_crc16_combine(length: int) -> None:
+    a = bytes(range(13))
+    b = bytes((i * 7) & 0xFF for i in range(length))
+    assert _crc16_combine(_crc16(a), _crc16(b), len(b)) == _crc16(a + b)
+
+
+def test_incremental_crc_matches_full_pass() -> None:
+    assert _weight_file(incremental_crc=True) == _weight_file()
+
+
+def test_layout_matches_content_block() -> None:
+    encoder = FitEncoderWeight()
+    layout = FitEncoderWeight.WEIGHT_SCALE_LAYOUT
+    raw: tuple[Any, ...] = (1688198400, 80.55, None, 55.5, None, 3.1, None, 1500.25)
+    raw += (None, 5, None, 7, 24.2)
+    buffer = bytearray(layout.struct.size)
+    layout.pack_into(buffer, 0, raw)
+    fields = [
+        (num, basetype, value, scale)
+        for (num, basetype, scale), value in zip(layout.fields, raw, strict=True)
+    ]
+    header, content = encoder._build_content_block(fields)
+    assert header == layout.definition[6:]
+    assert bytes(buffer) == bytes([layout.lmsg_type]) + content
+    assert layout.struct.size == 1 + sum(
+        basetype["size"] for _, basetype, _ in layout.fields
+    )
+    assert FitBaseType.uint16["invalid"] == layout.values(raw)[2]
+
+
+def _batch_columns(n: int) -> dict:
+    return {
+        "timestamp": [1688198400 + 60 * i for i in range(n)],
+        "weight": [80 + i / 10 for i in range(n)],
+        "percent_fat": [None if i % 3 else 20.5 + i / 100 for i in range(n)],
+        "basal_met": [float("nan") if i % 2 else 1500.25 for i in range(n)],
+        "bmi": [24.2] * n,
+    }
+
+
+def test_weight_scale_batch_matches_rows() -> None:
+    np = pytest.importorskip("numpy")
+    columns = _batch_columns(50)
+
+    rows = FitEncoderWeight()
+    for i in range(50):
+        row = {name: col[i] for name, col in columns.items()}
+        if row["basal_met"] != row["basal_met"]:
+            row["basal_met"] = None  # NaN
+        rows.write_weight_scale(**row)
+    rows.finish()
+
+    for timestamp in (
+        columns["timestamp"],
+        np.array(columns["timestamp"], dtype="datetime64[s]"),
+    ):
+        batch = FitEncoderWeight(incremental_crc=True)
+        batch.write_weight_scale_batch(**{**columns, "timestamp": timestamp})
+        batch.finish()
+        assert batch.getvalue() == rows.getvalue()
+
+
+def test_weight_scale_batch_rejects_bad_columns() -> None:
+    pytest.importorskip("numpy")
+    encoder = FitEncoderWeight()
+    with pytest.raises(ValueError):
+        encoder.write_weight_scale_batch([1688198400, 1688198460], weight=[80.0])
+    with pytest.raises(ValueError):
+        encoder.write_weight_scale_batch([1688198400], weight=[1000.0])
+
+
+def test_stream_to_seekable_file(tmp_path: Path) -> None:
+    path = tmp_path / "weight.fit"
+    with path.open("wb") as f:
+        f.write(b"prefix")
+        _write_weight_file(FitEncoderWeight(stream=f))
+    assert path.read_bytes() == b"prefix" + _weight_file()
+
+
+class _Socket(io.RawIOBase):
+    """A write-only, non-seekable sink."""
+
+    def __init__(self) -> None:
+        self.data = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    # Buffer, the supertype's parameter type, is only in collections.abc from 3.12
+    def write(self, b: bytes | bytearray | memoryview) -> int:  # type: ignore[override]
+        self.data += b
+        return len(b)
+
+
+def test_stream_to_non_seekable_sink() -> None:
+    with pytest.raises(ValueError):
+        FitEncoderWeight(stream=_Socket())
+
+    sink = _Socket()
+    data_size = FitEncoderWeight.data_size_for(100)
+    encoder = FitEncoderWeight(stream=sink, data_size=data_size)
+    _write_weight_file(encoder)
+    assert bytes(sink.data) == _weight_file()
+
+    encoder = FitEncoderWeight(stream=_Socket(), data_size=data_size - 1)
+    with pytest.raises(ValueError):
+        _write_weight_file(encoder)
+
+
+def test_decode_activity() -> None:
+    messages = FitDecoder(ACTIVITY_FIT.read_bytes()).decode()
+    assert messages["file_id"][1] == [1]  # manufacturer: garmin
+    assert messages["file_id"][0] == [4]  # type: activity
+    records = messages["record"]
+    assert len({len(column) for column in records.values()}) == 1
+    assert records[253] == sorted(records[253])
+    assert len(messages["session"][253]) == 1
+
+
+def test_decode_weight_file_round_trips_byte_for_byte() -> None:
+    data = _weight_file()
+    messages = FitDecoder(data).decode()
+    weight = messages["weight_scale"]
+    assert weight[0][::10][:3] == [8000, 8100, 8200]  # weight in kg * 100
+    assert weight[13] == [242] * 100  # bmi * 10
+    assert weight[1] == [None] * 100  # percent_fat was not given
+
+    # Re-encoding the raw decoded values gives back the same file
+    encoder = FitEncoderWeight()
+    for name, layout in [
+        ("file_id", FitEncoderWeight.FILE_INFO_LAYOUT),
+        ("file_creator", FitEncoderWeight.FILE_CREATOR_LAYOUT),
+        ("device_info", FitEncoderWeight.DEVICE_INFO_LAYOUT),
+        ("weight_scale", FitEncoderWeight.WEIGHT_SCALE_LAYOUT),
+    ]:
+        raw = FitMessageLayout(
+            layout.global_msg_num,
+            layout.lmsg_type,
+            [(num, basetype, None) for num, basetype, _ in layout.fields],
+        )
+        columns = messages[name]
+        encoder._write(raw.definition)
+        for row in zip(*(columns[num] for num, _, _ in raw.fields), strict=True):
+            encoder._write_record(raw, row)
+    encoder.finish()
+    assert encoder.getvalue() == data
+
+
+def test_decode_rejects_corrupt_files() -> None:
+    data = bytearray(_weight_file())
+    data[40] ^= 0xFF
+    with pytest.raises(ValueError):
+        FitDecoder(data).decode()
+    FitDecoder(data, check_crc=False).decode()
+    with pytest.raises(ValueError):
+        FitDecoder(data[:-10], check_crc=False).decode()
+
+
+def test_decode_chained_files() -> None:
+    data = _weight_file()
+    messages = FitDecoder(data + data).decode()
+    assert len(messages["weight_scale"][253]) == 200
+
+
+def test_decode_compressed_timestamps() -> None:
+    # record messages: one with a full timestamp, then compressed headers
+    full = FitMessageLayout(
+        20, 0, [(253, FitBaseType.uint32, None), (3, FitBaseType.uint8, None)]
+    )
+    compressed = FitMessageLayout(20, 1, [(3, FitBaseType.uint8, None)])
+    encoder = FitEncoder()
+    encoder._write(full.definition)
+    encoder._write_record(full, (1000, 60))  # 1000 & 0x1F == 8
+    encoder._write(compressed.definition)
+    for time_offset, heart_rate in [(10, 61), (31, 62), (2, 63)]:
+        encoder._write(bytes([0x80 | 1 << 5 | time_offset, heart_rate]))
+    encoder.finish()
+
+    records = FitDecoder(encoder.getvalue()).decode()["record"]
+    assert records[3] == [60, 61, 62, 63]
+    # offsets roll over every 32 seconds
+    assert records[253] == [1000, 1002, 1023, 1026]
+
+
+def test_timestamp_ignores_host_timezone(monkeypatch: pytest.MonkeyPatch) -> None:
+    if not hasattr(time, "tzset"):
+        pytest.skip("time.tzset is not available")
+    encoder = FitEncoderWeight()
+    aware = datetime(2023, 7, 1, 10, 0, tzinfo=timezone(timedelta(hours=2)))
+    naive = datetime(2023, 7, 1, 8, 0)
+    try:
+        for tz in ("UTC", "America/New_York", "Asia/Kolkata"):
+            monkeypatch.setenv("TZ", tz)
+            time.tzset()
+            assert encoder.timestamp(aware) == 1688198400 - 631065600
+            assert encoder.timestamp(naive) == 1688198400 - 631065600
+            assert encoder.timestamp(1688198400.5) == 1688198400.5 - 631065600
+    finally:
+        monkeypatch.undo()
+        time.tzset()
@@ -1,6 +1,17 @@
+import functools
+import io
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
 import pytest
+import requests
+from garth.auth_tokens import OAuth1Token, OAuth2Token
 
 import garminconnect
+from garminconnect.fit import FitDecoder  # type: ignore[attr-defined]
 
 DATE = "2023-07-01"
 
@@ -190,3 +201,551 @@ def test_request_reload(garmin: garminconnect.Garmin) -> None:
     # Get steps data after reload - should still be accessible
     final_steps = sum(steps["steps"] for steps in garmin.get_steps_data(cdate))
     assert final_steps >= 0  # Steps data should be non-negative
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def test_rate_limiter_token_bucket() -> None:
+    clock = FakeClock()
+    limiter = garminconnect.RateLimiter(
+        requests_per_second=2, burst=3, clock=clock, sleep=clock.sleep
+    )
+    for _ in range(3):
+        limiter.acquire()
+    assert clock.now == 0.0  # burst is free
+    limiter.acquire()
+    assert clock.now == pytest.approx(0.5)
+    for _ in range(4):
+        limiter.acquire()
+    assert clock.now == pytest.approx(2.5)
+
+
+def test_rate_limiter_backs_off_and_recovers() -> None:
+    clock = FakeClock()
+    limiter = garminconnect.RateLimiter(
+        requests_per_second=4, burst=1, clock=clock, sleep=clock.sleep
+    )
+    limiter.on_rate_limited(retry_after=10)
+    assert limiter.rate == 2
+    limiter.acquire()
+    assert clock.now == pytest.approx(10)
+    for _ in range(100):
+        limiter.on_success()
+    assert limiter.rate == 4
+
+
+def test_add_body_compositions_packs_fit_files(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    np = pytest.importorskip("numpy")
+    client = garminconnect.Garmin()
+    uploads = []
+
+    class Response:
+        def json(self) -> dict:
+            return {"uploaded": True}
+
+    def post(*args: Any, files: dict, **kwargs: Any) -> Response:
+        uploads.append(files["file"][1])
+        return Response()
+
+    monkeypatch.setattr(client.garth, "post", post)
+    times = [garminconnect.datetime(2023, 7, 1, 8, 0, i) for i in range(25)]
+    weights = [80 + i / 10 for i in range(25)]
+    measurements = [
+        {"timestamp": t.isoformat(), "weight": w, "bmi": 24.0}
+        for t, w in zip(times, weights, strict=True)
+    ]
+    responses = client.add_body_compositions(measurements, max_records_per_file=10)
+    assert responses == [{"uploaded": True}] * 3
+    # Three files with one header/definition block each and 10, 10, 5 records
+    assert len(uploads[0]) == len(uploads[1]) > len(uploads[2])
+
+    # Columns produce the same records as the equivalent dicts
+    dict_uploads = uploads[:]
+    uploads.clear()
+    client.add_body_composition_columns(
+        np.array([t.timestamp() for t in times]),
+        np.array(weights),
+        max_records_per_file=10,
+        bmi=np.full(25, 24.0),
+    )
+    # Compared decoded, as file_id.time_created differs
+    assert [FitDecoder(u).decode()["weight_scale"] for u in uploads] == [
+        FitDecoder(u).decode()["weight_scale"] for u in dict_uploads
+    ]
+
+
+def test_upload_fit_stream_sends_chunked_multipart(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    client = garminconnect.Garmin()
+    bodies = []
+
+    class Response:
+        def json(self) -> dict:
+            return {"uploaded": True}
+
+    def post(*args: Any, data: Any, headers: dict, **kwargs: Any) -> Response:
+        bodies.append((headers["Content-Type"], list(data)))
+        return Response()
+
+    monkeypatch.setattr(client.garth, "post", post)
+    content = bytes(range(256)) * 10
+    response = client.upload_fit_stream(
+        io.BytesIO(content), "weight.fit", chunk_size=1000
+    )
+    assert response == {"uploaded": True}
+    content_type, chunks = bodies[0]
+    boundary = content_type.split("boundary=")[1]
+    # Prefix, three file chunks, closing boundary
+    assert [len(c) for c in chunks[1:-1]] == [1000, 1000, 560]
+    assert b"".join(chunks[1:-1]) == content
+    assert b'filename="weight.fit"' in chunks[0]
+    assert chunks[-1] == f"\r\n--{boundary}--\r\n".encode()
+
+
+def test_add_weigh_in_epoch_ms_payload(monkeypatch: pytest.MonkeyPatch) -> None:
+    client = garminconnect.Garmin()
+    payloads = []
+
+    class Response:
+        status_code = 204
+
+        def json(self) -> dict:
+            raise ValueError("empty body")
+
+    def post(*args: Any, json: dict, **kwargs: Any) -> Response:
+        payloads.append(json)
+        return Response()
+
+    monkeypatch.setattr(client.garth, "post", post)
+    result = client.add_weigh_in_epoch_ms(
+        80.5, local_ms=1688198400123, gmt_ms=1688223600123, unitKey="kg"
+    )
+    assert result["success"] is True
+    assert payloads[0]["dateTimestamp"] == "2023-07-01T08:00:00.123"
+    assert payloads[0]["gmtTimestamp"] == "2023-07-01T15:00:00.123"
+
+
+def test_write_calls_go_through_rate_limiter(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = FakeClock()
+    limiter = garminconnect.RateLimiter(
+        requests_per_second=1, burst=10, clock=clock, sleep=clock.sleep
+    )
+    client = garminconnect.Garmin(rate_limiter=limiter)
+    requests_made = []
+
+    class Response:
+        def json(self) -> dict:
+            return {}
+
+    def request(method: str, *args: Any, **kwargs: Any) -> Response:
+        requests_made.append(method)
+        return Response()
+
+    monkeypatch.setattr(client.garth, "request", request)
+    monkeypatch.setattr(client.garth, "post", functools.partial(request, "POST"))
+    monkeypatch.setattr(client.garth, "put", functools.partial(request, "PUT"))
+    client.delete_weigh_in("123", "2024-01-01")
+    client.set_blood_pressure(120, 80, 60)
+    client.add_hydration_data(250)
+    client.set_activity_name("1", "Run")
+    assert requests_made == ["DELETE", "POST", "PUT", "PUT"]
+    assert limiter._tokens == 10 - 4
+
+
+def _profile_cache_client(
+    monkeypatch: pytest.MonkeyPatch, calls: list[str], session: str = "session-1"
+) -> garminconnect.Garmin:
+    client = garminconnect.Garmin(profile_cache_ttl=3600)
+
+    def load(path: str) -> None:
+        # The session name stands in for the OAuth1 token of a login
+        client.garth.oauth1_token = OAuth1Token(
+            oauth_token=session, oauth_token_secret=session
+        )
+
+    def connectapi(path: str, **kwargs: Any) -> dict:
+        calls.append(path)
+        if path == "/userprofile-service/socialProfile":
+            return {"displayName": "runner", "fullName": "A Runner"}
+        return {"userData": {"measurementSystem": "metric"}}
+
+    monkeypatch.setattr(client.garth, "load", load)
+    monkeypatch.setattr(client.garth, "connectapi", connectapi)
+    return client
+
+
+def test_login_reuses_cached_profile(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    calls: list[str] = []
+    first = _profile_cache_client(monkeypatch, calls)
+    first.login(str(tmp_path))
+    assert len(calls) == 2  # profile and user settings
+
+    second = _profile_cache_client(monkeypatch, calls)
+    second.login(str(tmp_path))
+    assert len(calls) == 2
+    assert (second.display_name, second.full_name, second.unit_system) == (
+        "runner",
+        "A Runner",
+        "metric",
+    )
+
+    # Tokens of another login do not match the cache
+    other = _profile_cache_client(monkeypatch, calls, session="session-2")
+    other.login(str(tmp_path))
+    assert len(calls) == 4
+
+    # Expired entries are refetched
+    cache_file = tmp_path / garminconnect.PROFILE_CACHE_FILE
+    cache = json.loads(cache_file.read_text())
+    cache["cached_at"] -= 7200
+    cache_file.write_text(json.dumps(cache))
+    _profile_cache_client(monkeypatch, calls, session="session-2").login(str(tmp_path))
+    assert len(calls) == 6
+
+
+def test_unauthorized_response_drops_profile_cache(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    calls: list[str] = []
+    client = _profile_cache_client(monkeypatch, calls)
+    client.login(str(tmp_path))
+    cache_file = tmp_path / garminconnect.PROFILE_CACHE_FILE
+    assert cache_file.exists()
+
+    response = requests.Response()
+    response.status_code = 401
+
+    def unauthorized() -> None:
+        raise requests.HTTPError(response=response)
+
+    with pytest.raises(requests.HTTPError):
+        client._rate_limited(unauthorized)
+    assert not cache_file.exists()
+
+
+def _oauth2_token(expires_in: int) -> OAuth2Token:
+    now = int(time.time())
+    return OAuth2Token(
+        scope="CONNECT_READ",
+        jti="jti",
+        token_type="Bearer",  # noqa: S106
+        access_token=f"access-{now + expires_in}",
+        refresh_token="refresh",  # noqa: S106
+        expires_in=expires_in,
+        expires_at=now + expires_in,
+        refresh_token_expires_in=86400,
+        refresh_token_expires_at=now + 86400,
+    )
+
+
+def _refreshing_client(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, expires_in: int
+) -> tuple[garminconnect.Garmin, list[int]]:
+    client = garminconnect.Garmin(token_refresh_margin=300)
+    client.garth.oauth2_token = _oauth2_token(expires_in)
+    client._tokenstore_path = tmp_path
+    refreshes: list[int] = []
+
+    def refresh_oauth2() -> None:
+        time.sleep(0.05)  # let the other callers pile up
+        refreshes.append(1)
+        client.garth.oauth2_token = _oauth2_token(3600)
+
+    monkeypatch.setattr(client.garth, "refresh_oauth2", refresh_oauth2)
+    return client, refreshes
+
+
+def _current_token(client: garminconnect.Garmin) -> OAuth2Token:
+    token = client.garth.oauth2_token
+    assert isinstance(token, OAuth2Token)
+    return token
+
+
+def _join_refresh(client: garminconnect.Garmin) -> None:
+    thread = client._refresh_thread
+    assert thread is not None
+    thread.join()
+
+
+def _call_concurrently(client: garminconnect.Garmin, callers: int = 8) -> list[int]:
+    seen: list[int] = []
+
+    def call() -> None:
+        seen.append(client._rate_limited(lambda: _current_token(client).expires_in))
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return seen
+
+
+def test_token_refreshed_in_background_before_expiry(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    client, refreshes = _refreshing_client(monkeypatch, tmp_path, expires_in=60)
+    # Callers keep using the still-valid token while it is refreshed
+    assert _call_concurrently(client) == [60] * 8
+    _join_refresh(client)
+    assert len(refreshes) == 1
+    assert _current_token(client).expires_in == 3600
+
+    saved = json.loads((tmp_path / "oauth2_token.json").read_text())
+    assert saved["access_token"] == _current_token(client).access_token
+    assert list(tmp_path.iterdir()) == [tmp_path / "oauth2_token.json"]
+
+
+def test_expired_token_refreshed_once(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    client, refreshes = _refreshing_client(monkeypatch, tmp_path, expires_in=-1)
+    assert _call_concurrently(client) == [3600] * 8
+    assert len(refreshes) == 1
+    assert client._refresh_thread is None
+
+
+def test_failed_background_refresh_is_not_retried_immediately(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    client, _ = _refreshing_client(monkeypatch, tmp_path, expires_in=60)
+    attempts: list[int] = []
+
+    def refresh_oauth2() -> None:
+        attempts.append(1)
+        raise requests.ConnectionError("offline")
+
+    monkeypatch.setattr(client.garth, "refresh_oauth2", refresh_oauth2)
+    assert client._rate_limited(lambda: "ok") == "ok"
+    _join_refresh(client)
+    assert client._rate_limited(lambda: "ok") == "ok"
+    assert len(attempts) == 1
+
+
+def test_fetch_range_streams_days_and_collects_failures(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    sleeps: list[float] = []
+    limiter = garminconnect.RateLimiter(
+        requests_per_second=1000, burst=1000, clock=lambda: 0.0, sleep=sleeps.append
+    )
+    client = garminconnect.Garmin(rate_limiter=limiter)
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def connectapi(path: str, **kwargs: Any) -> dict:
+        nonlocal active, peak
+        day = path.rsplit("/", 1)[1]
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        try:
+            # The first day is slowest, so it completes last
+            time.sleep(0.1 if day == "2024-02-27" else 0.01)
+            if day == "2024-03-01":
+                raise requests.ConnectionError("reset")
+            return {"calendarDate": day}
+        finally:
+            with lock:
+                active -= 1
+
+    monkeypatch.setattr(client.garth, "connectapi", connectapi)
+    fetch = client.fetch_range(
+        "get_hrv_data", "2024-02-27", garminconnect.date(2024, 3, 4), concurrency=3
+    )
+    assert len(fetch) == 7
+    pairs = list(fetch)
+
+    assert [day.isoformat() for day, _ in pairs][-1] == "2024-02-27"
+    assert {day.isoformat(): result["calendarDate"] for day, result in pairs} == {
+        day: day
+        for day in (
+            "2024-02-27",
+            "2024-02-28",
+            "2024-02-29",
+            "2024-03-02",
+            "2024-03-03",
+            "2024-03-04",
+        )
+    }
+    assert list(fetch.failures) == [garminconnect.date(2024, 3, 1)]
+    assert isinstance(
+        fetch.failures[garminconnect.date(2024, 3, 1)],
+        garminconnect.GarminConnectConnectionError,
+    )
+    assert peak <= 3
+    assert limiter._tokens == 1000 - 7  # every day went through the limiter
+
+
+def test_fetch_range_rejects_bad_ranges() -> None:
+    client = garminconnect.Garmin()
+    with pytest.raises(ValueError, match="after end"):
+        client.fetch_range(client.get_sleep_data, "2024-01-02", "2024-01-01")
+    with pytest.raises(ValueError, match="Unknown Garmin method"):
+        client.fetch_range("get_nothing", "2024-01-01", "2024-01-02")
+    with pytest.raises(ValueError):
+        client.fetch_range(client.get_sleep_data, "2024-1-1", "2024-01-02")
+    with pytest.raises(ValueError):
+        client.fetch_range(client.get_sleep_data, "2024-01-01", "2024-01-02", 0)
+
+
+def _paged_activities(
+    monkeypatch: pytest.MonkeyPatch, count: int, server_limit: int = 1000
+) -> tuple[garminconnect.Garmin, list[int]]:
+    client = garminconnect.Garmin()
+    activities = [{"activityId": i} for i in range(count)]
+    starts: list[int] = []
+
+    def connectapi(path: str, params: dict[str, str], **kwargs: Any) -> list:
+        assert path == client.garmin_connect_activities
+        start, limit = int(params["start"]), int(params["limit"])
+        starts.append(start)
+        return activities[start : start + min(limit, server_limit)]
+
+    monkeypatch.setattr(client.garth, "connectapi", connectapi)
+    return client, starts
+
+
+def test_activities_by_date_stops_at_short_page(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    client, starts = _paged_activities(monkeypatch, 250)
+    activities = client.get_activities_by_date("2024-01-01", page_size=100, prefetch=0)
+    assert [a["activityId"] for a in activities] == list(range(250))
+    assert starts == [0, 100, 200]
+
+    # A short first page is checked with one request, not prefetched past
+    client, starts = _paged_activities(monkeypatch, 5)
+    activities = client.get_activities_by_date("2024-01-01", page_size=100, prefetch=2)
+    assert len(activities) == 5
+    assert starts == [0, 5]
+
+    with pytest.raises(ValueError, match="page_size"):
+        client.get_activities_by_date("2024-01-01", page_size=1001)
+
+
+def test_activities_by_date_follows_server_page_cap(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # The server returns at most 30 activities whatever limit is asked for
+    client, starts = _paged_activities(monkeypatch, 75, server_limit=30)
+    activities = client.get_activities_by_date("2024-01-01", page_size=100, prefetch=2)
+    assert [a["activityId"] for a in activities] == list(range(75))
+    assert sorted(starts)[:3] == [0, 30, 60]
+
+    client, starts = _paged_activities(monkeypatch, 90, server_limit=30)
+    activities = client.get_activities_by_date("2024-01-01", page_size=100, prefetch=0)
+    assert [a["activityId"] for a in activities] == list(range(90))
+    assert starts == [0, 30, 60, 90]
+
+
+def test_activities_by_date_prefetches_pages(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    client, starts = _paged_activities(monkeypatch, 1000)
+    fetch_page = client.garth.connectapi
+    prefetched = threading.Event()
+
+    def connectapi(path: str, params: dict[str, str], **kwargs: Any) -> list:
+        page = fetch_page(path, params)
+        assert isinstance(page, list)
+        if params["start"] == "50":
+            # Pages ahead are requested while the second one is outstanding
+            assert prefetched.wait(timeout=5)
+        elif {100, 150} <= set(starts):
+            prefetched.set()
+        return page
+
+    monkeypatch.setattr(client.garth, "connectapi", connectapi)
+    activities = client.iter_activities_by_date("2024-01-01", page_size=50, prefetch=2)
+    assert next(activities) == {"activityId": 0}
+    assert [a["activityId"] for a in activities] == list(range(1, 1000))
+    assert sorted(starts)[:4] == [0, 50, 100, 150]
+    assert len(starts) <= 1000 // 50 + 3
+
+
+class _BrokenStream(io.BytesIO):
+    def read(self, size: int | None = -1) -> bytes:
+        if self.tell():
+            raise OSError("connection reset")
+        return super().read(size)
+
+
+def test_download_activities_streams_atomically_and_skips_existing(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    client = garminconnect.Garmin()
+    fmt = client.ActivityDownloadFormat
+    requested: list[str] = []
+
+    def get(subdomain: str, path: str, **kwargs: Any) -> requests.Response:
+        assert kwargs["stream"] is True
+        requested.append(path)
+        response = requests.Response()
+        if path == f"{client.garmin_connect_gpx_download}/3":
+            response.status_code = 404
+            raise requests.HTTPError(response=response)
+        response.status_code = 200
+        body = f"body of {path}".encode()
+        if path == f"{client.garmin_connect_gpx_download}/2":
+            response.raw = _BrokenStream(body)
+        else:
+            response.raw = io.BytesIO(body)
+        return response
+
+    monkeypatch.setattr(client.garth, "get", get)
+    (tmp_path / "1_ACTIVITY.zip").write_bytes(b"already archived")
+
+    activities: list[int | str | dict[str, Any]] = [
+        "1",
+        {"activityId": 2},
+        {"activityName": "no id"},
+        3,
+    ]
+    run = client.download_activities(
+        iter(activities),
+        tmp_path,
+        formats=[fmt.ORIGINAL, fmt.GPX],
+        concurrency=2,
+        chunk_size=4,
+    )
+    written = {(activity_id, dl_fmt): path for activity_id, dl_fmt, path in run}
+
+    assert set(written) == {
+        ("1", fmt.ORIGINAL),
+        ("1", fmt.GPX),
+        ("2", fmt.ORIGINAL),
+        ("3", fmt.ORIGINAL),
+    }
+    assert run.skipped == [("1", fmt.ORIGINAL)]
+    assert run.unidentified == [{"activityName": "no id"}]
+    assert set(run.failures) == {("2", fmt.GPX), ("3", fmt.GPX)}
+    assert "client error (404)" in str(run.failures[("3", fmt.GPX)])
+    assert f"{client.garmin_connect_fit_download}/1" not in requested
+    assert written[("3", fmt.ORIGINAL)] == tmp_path / "3_ACTIVITY.zip"
+    assert written[("3", fmt.ORIGINAL)].read_bytes() == (
+        f"body of {client.garmin_connect_fit_download}/3".encode()
+    )
+    assert (tmp_path / "1_ACTIVITY.zip").read_bytes() == b"already archived"
+    # The interrupted stream left neither a partial file nor a temp file
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "1_ACTIVITY.gpx",
+        "1_ACTIVITY.zip",
+        "2_ACTIVITY.zip",
+        "3_ACTIVITY.zip",
+    ]